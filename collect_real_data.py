@@ -18,7 +18,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 from data_collection.yahoo_finance_collector import YahooFinanceCollector
 from data_collection.news_api_collector import NewsAPICollector
 from data_collection.alpha_vantage_collector import AlphaVantageCollector
-from data_processing.sentiment_analyzer import SentimentAnalyzer
+from data_processing.sentiment_analyzer import get_sentiment_analyzer
 
 
 def main():
@@ -30,7 +30,7 @@ def main():
     yahoo_collector = YahooFinanceCollector()
     news_collector = NewsAPICollector()
     alpha_collector = AlphaVantageCollector()
-    sentiment_analyzer = SentimentAnalyzer()
+    sentiment_analyzer = get_sentiment_analyzer()
     
     # Sample companies
     companies = ["AAPL", "MSFT", "GOOGL", "TSLA", "NVDA"]
@@ -111,7 +111,13 @@ def main():
             total_data["errors"].append(error_msg)
             print(f"  ❌ {error_msg}")
         
-        total_data["companies"][ticker] = company_data
+        # Keep only counts; the articles and scores themselves are not needed past this point
+        total_data["companies"][ticker] = {
+            "name": company_data["company_info"]["name"] if company_data["company_info"] else None,
+            "esg_scores": len(company_data["esg_scores"]),
+            "news": len(company_data["news"]),
+            "errors": len(company_data["errors"])
+        }
     
     # Print summary
     print("\n" + "=" * 50)
@@ -126,12 +132,12 @@ def main():
     print("\n📋 Company Details:")
     for ticker, data in total_data["companies"].items():
         print(f"  {ticker}:")
-        if data["company_info"]:
-            print(f"    Company: {data['company_info']['name']}")
-        print(f"    ESG Scores: {len(data['esg_scores'])}")
-        print(f"    News Articles: {len(data['news'])}")
+        if data["name"]:
+            print(f"    Company: {data['name']}")
+        print(f"    ESG Scores: {data['esg_scores']}")
+        print(f"    News Articles: {data['news']}")
         if data["errors"]:
-            print(f"    Errors: {len(data['errors'])}")
+            print(f"    Errors: {data['errors']}")
     
     if total_data["errors"]:
         print("\n❌ Errors encountered:")
@@ -142,6 +148,7 @@ def main():
     print("Next steps:")
     print("1. Run the dashboard: streamlit run src/visualization/main.py")
     print("2. Check the collected data in your database")
+    print("3. Save large universes or backfills with flat memory: python -m src.data_collection.pipeline --days-back 365")
 
 
 if __name__ == "__main__":
@@ -34,6 +34,7 @@ CREATE TABLE IF NOT EXISTS news (
     content TEXT,
     url TEXT,
     sentiment_score FLOAT,
+    relevance_score FLOAT,
     source VARCHAR(100),
     published_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -49,31 +50,162 @@ CREATE TABLE IF NOT EXISTS metrics (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Daily price history (keyed by ticker; upserted by the collectors)
+CREATE TABLE IF NOT EXISTS stock_prices (
+    id SERIAL PRIMARY KEY,
+    ticker VARCHAR(10) NOT NULL,
+    date TIMESTAMP NOT NULL,
+    stock_price FLOAT,
+    volume BIGINT,
+    market_cap FLOAT,
+    data_source VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (ticker, date)
+);
+
+-- Ingestion watermarks (last successfully ingested timestamp per ticker and source)
+CREATE TABLE IF NOT EXISTS ingestion_watermarks (
+    id SERIAL PRIMARY KEY,
+    ticker VARCHAR(10) NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    last_ingested_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (ticker, source)
+);
+
+-- Collection job queue (one row per feed and ticker, leased by collector workers)
+CREATE TABLE IF NOT EXISTS collection_jobs (
+    id SERIAL PRIMARY KEY,
+    feed VARCHAR(20) NOT NULL,
+    ticker VARCHAR(10) NOT NULL,
+    days_back INTEGER DEFAULT 30,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    lease_owner VARCHAR(100),
+    lease_token VARCHAR(36),
+    lease_expires_at TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (feed, ticker)
+);
+
+-- Earnings calendar (whole-market snapshot from Alpha Vantage, replaced daily)
+CREATE TABLE IF NOT EXISTS earnings_calendar (
+    id SERIAL PRIMARY KEY,
+    symbol VARCHAR(20) NOT NULL,
+    name VARCHAR(255),
+    report_date DATE NOT NULL,
+    fiscal_date_ending DATE,
+    estimate DECIMAL(12,4),
+    currency VARCHAR(10),
+    ingested_at TIMESTAMP NOT NULL,
+    UNIQUE (symbol, report_date)
+);
+
+-- Columns added after the first release (for databases created before them)
+ALTER TABLE news ADD COLUMN IF NOT EXISTS relevance_score FLOAT;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_companies_ticker ON companies(ticker);
 CREATE INDEX IF NOT EXISTS idx_esg_scores_company_id ON esg_scores(company_id);
 CREATE INDEX IF NOT EXISTS idx_esg_scores_created_at ON esg_scores(created_at);
 CREATE INDEX IF NOT EXISTS idx_news_company_id ON news(company_id);
 CREATE INDEX IF NOT EXISTS idx_news_created_at ON news(created_at);
+CREATE INDEX IF NOT EXISTS idx_news_company_url ON news(company_id, url);
 CREATE INDEX IF NOT EXISTS idx_metrics_company_id ON metrics(company_id);
+CREATE INDEX IF NOT EXISTS idx_collection_jobs_due ON collection_jobs(status, available_at);
+CREATE INDEX IF NOT EXISTS idx_collection_jobs_lease_token ON collection_jobs(lease_token);
+CREATE INDEX IF NOT EXISTS idx_earnings_calendar_ingested_at ON earnings_calendar(ingested_at);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE companies ENABLE ROW LEVEL SECURITY;
 ALTER TABLE esg_scores ENABLE ROW LEVEL SECURITY;
 ALTER TABLE news ENABLE ROW LEVEL SECURITY;
 ALTER TABLE metrics ENABLE ROW LEVEL SECURITY;
+ALTER TABLE stock_prices ENABLE ROW LEVEL SECURITY;
+ALTER TABLE ingestion_watermarks ENABLE ROW LEVEL SECURITY;
+ALTER TABLE collection_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE earnings_calendar ENABLE ROW LEVEL SECURITY;
 
 -- Create policies to allow public read access
 CREATE POLICY "Allow public read access on companies" ON companies FOR SELECT USING (true);
 CREATE POLICY "Allow public read access on esg_scores" ON esg_scores FOR SELECT USING (true);
 CREATE POLICY "Allow public read access on news" ON news FOR SELECT USING (true);
 CREATE POLICY "Allow public read access on metrics" ON metrics FOR SELECT USING (true);
+CREATE POLICY "Allow public read access on stock_prices" ON stock_prices FOR SELECT USING (true);
+CREATE POLICY "Allow public read access on ingestion_watermarks" ON ingestion_watermarks FOR SELECT USING (true);
+CREATE POLICY "Allow public read access on collection_jobs" ON collection_jobs FOR SELECT USING (true);
+CREATE POLICY "Allow public read access on earnings_calendar" ON earnings_calendar FOR SELECT USING (true);
 
 -- Allow public insert for data collection
 CREATE POLICY "Allow public insert on companies" ON companies FOR INSERT WITH CHECK (true);
 CREATE POLICY "Allow public insert on esg_scores" ON esg_scores FOR INSERT WITH CHECK (true);
 CREATE POLICY "Allow public insert on news" ON news FOR INSERT WITH CHECK (true);
 CREATE POLICY "Allow public insert on metrics" ON metrics FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow public insert on stock_prices" ON stock_prices FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow public update on stock_prices" ON stock_prices FOR UPDATE USING (true);
+CREATE POLICY "Allow public insert on ingestion_watermarks" ON ingestion_watermarks FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow public update on ingestion_watermarks" ON ingestion_watermarks FOR UPDATE USING (true);
+CREATE POLICY "Allow public insert on collection_jobs" ON collection_jobs FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow public update on collection_jobs" ON collection_jobs FOR UPDATE USING (true);
+CREATE POLICY "Allow public insert on earnings_calendar" ON earnings_calendar FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow public update on earnings_calendar" ON earnings_calendar FOR UPDATE USING (true);
+CREATE POLICY "Allow public delete on earnings_calendar" ON earnings_calendar FOR DELETE USING (true);
+
+-- Lease due collection jobs to a worker. FOR UPDATE SKIP LOCKED lets any number
+-- of workers call this concurrently without blocking on or double-leasing rows.
+CREATE OR REPLACE FUNCTION lease_collection_jobs(worker_id TEXT, max_jobs INTEGER,
+                                                 lease_seconds INTEGER, max_attempts INTEGER)
+RETURNS SETOF collection_jobs AS $$
+#variable_conflict use_column
+DECLARE
+    token TEXT := md5(random()::text || clock_timestamp()::text);
+BEGIN
+    -- Jobs whose lease expired on their last attempt are not retried again
+    UPDATE collection_jobs SET status = 'failed', last_error = 'lease expired'
+    WHERE status = 'leased' AND lease_expires_at < now() AND attempts >= max_attempts;
+    
+    RETURN QUERY
+    UPDATE collection_jobs SET
+        status = 'leased',
+        lease_owner = worker_id,
+        lease_token = token,
+        lease_expires_at = now() + make_interval(secs => lease_seconds),
+        attempts = collection_jobs.attempts + 1,
+        updated_at = now()
+    WHERE collection_jobs.id IN (
+        SELECT id FROM collection_jobs
+        WHERE (status = 'pending' AND available_at <= now())
+           OR (status = 'leased' AND lease_expires_at < now())
+        ORDER BY available_at
+        LIMIT max_jobs
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING collection_jobs.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create (or reset to pending) one job per feed and ticker. Jobs a worker still
+-- holds a live lease on are left alone, so they are not handed out twice.
+CREATE OR REPLACE FUNCTION enqueue_collection_jobs(tickers TEXT[], feeds TEXT[], days_back INTEGER)
+RETURNS VOID AS $$
+#variable_conflict use_column
+BEGIN
+    INSERT INTO collection_jobs (feed, ticker, days_back, status, attempts, available_at, last_error)
+    SELECT feed_name, ticker_name, enqueue_collection_jobs.days_back, 'pending', 0, now(), NULL
+    FROM unnest(feeds) AS feed_name CROSS JOIN unnest(tickers) AS ticker_name
+    ON CONFLICT (feed, ticker) DO UPDATE SET
+        status = 'pending',
+        attempts = 0,
+        days_back = EXCLUDED.days_back,
+        available_at = now(),
+        last_error = NULL,
+        updated_at = now()
+    WHERE collection_jobs.status <> 'leased' OR collection_jobs.lease_expires_at < now();
+END;
+$$ LANGUAGE plpgsql;
 
 -- Create a function to update the updated_at column
 CREATE OR REPLACE FUNCTION update_updated_at_column()
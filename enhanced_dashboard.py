@@ -20,6 +20,17 @@ import json
 # Load environment variables
 load_dotenv()
 
+# Per-provider token buckets shared with the collectors (and other dashboard processes)
+from src.data_collection.rate_limiter import get_rate_limiter
+rate_limiter = get_rate_limiter()
+
+# Disk-backed HTTP cache shared with the collectors
+from src.data_collection.http_cache import get_http_cache
+http_cache = get_http_cache()
+
+# Provider base URLs, overridable to replay recorded fixtures from the local stub server
+from src.data_collection.endpoints import get_base_url
+
 # Page configuration
 st.set_page_config(
     page_title="🌱 ESG Data Tracker Pro",
@@ -65,6 +76,7 @@ def get_stock_data(symbol, period="1y"):
     """Get stock data using yfinance"""
     try:
         stock = yf.Ticker(symbol)
+        rate_limiter.acquire("yahoo_finance")
         hist = stock.history(period=period)
         return hist
     except Exception as e:
@@ -78,13 +90,13 @@ def get_weather_data(city="New York"):
         return None
     
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather"
+        url = f"{get_base_url('openweather')}/weather"
         params = {
             "q": city,
             "appid": api_key,
             "units": "metric"
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = http_cache.get(url, params=params, timeout=10, before_fetch=lambda: rate_limiter.acquire("openweather"))
         if response.status_code == 200:
             return response.json()
     except Exception as e:
@@ -411,14 +423,14 @@ def get_alpha_vantage_data(symbol):
         return None
     
     try:
-        url = "https://www.alphavantage.co/query"
+        url = f"{get_base_url('alpha_vantage')}/query"
         params = {
             "function": "OVERVIEW",
             "symbol": symbol,
             "apikey": api_key
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_cache.get(url, params=params, timeout=15, before_fetch=lambda: rate_limiter.acquire("alpha_vantage"))
         if response.status_code == 200:
             data = response.json()
             if "Error Message" not in data and "Note" not in data:
@@ -446,7 +458,7 @@ def get_news_data():
         return []
     
     try:
-        url = "https://newsapi.org/v2/everything"
+        url = f"{get_base_url('news_api')}/everything"
         params = {
             "q": "ESG sustainability corporate responsibility",
             "apiKey": api_key,
@@ -455,7 +467,7 @@ def get_news_data():
             "pageSize": 5
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_cache.get(url, params=params, timeout=15, before_fetch=lambda: rate_limiter.acquire("news_api"))
         if response.status_code == 200:
             data = response.json()
             if data.get("status") == "ok":
@@ -16,6 +16,17 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Per-provider token buckets shared with the collectors (and other dashboard processes)
+from src.data_collection.rate_limiter import get_rate_limiter
+rate_limiter = get_rate_limiter()
+
+# Disk-backed HTTP cache shared with the collectors
+from src.data_collection.http_cache import get_http_cache
+http_cache = get_http_cache()
+
+# Provider base URLs, overridable to replay recorded fixtures from the local stub server
+from src.data_collection.endpoints import get_base_url
+
 def get_alpha_vantage_data(symbol):
     """Get company data from Alpha Vantage"""
     api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
@@ -24,14 +35,14 @@ def get_alpha_vantage_data(symbol):
         return None
     
     try:
-        url = "https://www.alphavantage.co/query"
+        url = f"{get_base_url('alpha_vantage')}/query"
         params = {
             "function": "OVERVIEW",
             "symbol": symbol,
             "apikey": api_key
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_cache.get(url, params=params, timeout=15, before_fetch=lambda: rate_limiter.acquire("alpha_vantage"))
         if response.status_code == 200:
             data = response.json()
             if "Error Message" not in data and "Note" not in data:
@@ -59,7 +70,7 @@ def get_news_data():
         return []
     
     try:
-        url = "https://newsapi.org/v2/everything"
+        url = f"{get_base_url('news_api')}/everything"
         params = {
             "q": "ESG sustainability corporate responsibility",
             "apiKey": api_key,
@@ -68,7 +79,7 @@ def get_news_data():
             "pageSize": 5
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_cache.get(url, params=params, timeout=15, before_fetch=lambda: rate_limiter.acquire("news_api"))
         if response.status_code == 200:
             data = response.json()
             if data.get("status") == "ok":
@@ -76,6 +76,24 @@ def show_data():
     except Exception as e:
         print(f"❌ Error showing data: {e}")
 
+def run_scheduler():
+    """Run the resident collection scheduler"""
+    print_header("Starting Collection Scheduler")
+    
+    if not check_directory():
+        return
+    
+    try:
+        print("⏱️  Refreshing prices intraday, news hourly and ESG scores daily...")
+        print("   Press Ctrl+C to stop the scheduler")
+        print()
+        
+        subprocess.run([sys.executable, "-m", "src.data_collection.scheduler"] + sys.argv[2:])
+    except KeyboardInterrupt:
+        print("\n🛑 Scheduler stopped by user")
+    except Exception as e:
+        print(f"❌ Error running scheduler: {e}")
+
 def test_apis():
     """Test API connections"""
     print_header("Testing API Connections")
@@ -99,9 +117,10 @@ def main():
         print("4. 🧪 Test APIs")
         print("5. 📁 Show Project Structure")
         print("6. ❓ Help")
+        print("7. ⏱️  Start Collection Scheduler")
         print("0. 🚪 Exit")
         
-        choice = input("\nEnter your choice (0-6): ").strip()
+        choice = input("\nEnter your choice (0-7): ").strip()
         
         if choice == "1":
             run_dashboard()
@@ -115,11 +134,13 @@ def main():
             show_project_structure()
         elif choice == "6":
             show_help()
+        elif choice == "7":
+            run_scheduler()
         elif choice == "0":
             print("👋 Goodbye!")
             break
         else:
-            print("❌ Invalid choice. Please enter 0-6.")
+            print("❌ Invalid choice. Please enter 0-7.")
 
 def show_project_structure():
     """Show project structure"""
@@ -132,7 +153,12 @@ def show_project_structure():
 │   │   ├── yahoo_finance_collector.py
 │   │   ├── news_api_collector.py
 │   │   ├── alpha_vantage_collector.py
-│   │   └── data_orchestrator.py
+│   │   ├── fmp_collector.py    # Multi-symbol FMP profiles and quotes
+│   │   ├── data_orchestrator.py
+│   │   ├── stage_dag.py        # Per-ticker stages run as a dependency graph
+│   │   ├── scheduler.py        # Resident collection scheduler
+│   │   ├── pipeline.py         # Streaming bulk collection into the database
+│   │   └── job_worker.py       # Distributed workers over a leased job queue
 │   ├── 📁 data_processing/     # AI sentiment analysis
 │   │   └── sentiment_analyzer.py
 │   └── 📁 visualization/       # Dashboard
@@ -155,6 +181,8 @@ def show_help():
 1. Choose option 1 to start the dashboard
 2. Choose option 2 to collect real data
 3. Choose option 3 to see what data you have
+4. Choose option 7 (or run `python run_esg_tracker.py scheduler`)
+   to keep data fresh continuously
 
 📊 Data Sources:
 - News API: Real ESG news articles
@@ -184,4 +212,7 @@ Check these files:
     print(help_text)
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "scheduler":
+        run_scheduler()
+    else:
+        main()
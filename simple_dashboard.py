@@ -9,7 +9,6 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-import requests
 import os
 from dotenv import load_dotenv
 import yfinance as yf
@@ -18,6 +17,17 @@ import numpy as np
 # Load environment variables
 load_dotenv()
 
+# Per-provider token buckets shared with the collectors (and other dashboard processes)
+from src.data_collection.rate_limiter import get_rate_limiter
+rate_limiter = get_rate_limiter()
+
+# Disk-backed HTTP cache shared with the collectors
+from src.data_collection.http_cache import get_http_cache
+http_cache = get_http_cache()
+
+# Provider base URLs, overridable to replay recorded fixtures from the local stub server
+from src.data_collection.endpoints import get_base_url
+
 # Page configuration
 st.set_page_config(
     page_title="🌱 ESG Dashboard",
@@ -29,6 +39,7 @@ def get_simple_stock_data(symbol, period="1y"):
     """Get stock data with fallback"""
     try:
         stock = yf.Ticker(symbol)
+        rate_limiter.acquire("yahoo_finance")
         hist = stock.history(period=period)
         if hist.empty:
             # Generate mock data
@@ -69,8 +80,8 @@ def get_simple_weather():
     api_key = os.getenv("OPENWEATHER_API_KEY")
     if api_key:
         try:
-            url = f"http://api.openweathermap.org/data/2.5/weather?q=New York&appid={api_key}&units=metric"
-            response = requests.get(url, timeout=5)
+            url = f"{get_base_url('openweather')}/weather?q=New York&appid={api_key}&units=metric"
+            response = http_cache.get(url, timeout=5, before_fetch=lambda: rate_limiter.acquire("openweather"))
             if response.status_code == 200:
                 return response.json()
         except:
@@ -170,8 +181,8 @@ def main():
         news_api_key = os.getenv("NEWS_API_KEY")
         if news_api_key:
             try:
-                url = f"https://newsapi.org/v2/everything?q=ESG sustainability&apiKey={news_api_key}&pageSize=3"
-                response = requests.get(url, timeout=5)
+                url = f"{get_base_url('news_api')}/everything?q=ESG sustainability&apiKey={news_api_key}&pageSize=3"
+                response = http_cache.get(url, timeout=5, before_fetch=lambda: rate_limiter.acquire("news_api"))
                 if response.status_code == 200:
                     articles = response.json().get('articles', [])
                     for article in articles[:2]:
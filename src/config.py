@@ -20,6 +20,7 @@ class Settings(BaseSettings):
     yahoo_finance_api_key: Optional[str] = Field(None, env="YAHOO_FINANCE_API_KEY")
     alpha_vantage_api_key: Optional[str] = Field(None, env="ALPHA_VANTAGE_API_KEY")
     news_api_key: Optional[str] = Field(None, env="NEWS_API_KEY")
+    fmp_api_key: Optional[str] = Field(None, env="FMP_API_KEY")
     esg_book_api_key: Optional[str] = Field(None, env="ESG_BOOK_API_KEY")
     huggingface_api_key: Optional[str] = Field(None, env="HUGGINGFACE_API_KEY")
     
@@ -32,6 +33,55 @@ class Settings(BaseSettings):
     data_collection_interval_hours: int = Field(24, env="DATA_COLLECTION_INTERVAL_HOURS")
     max_retries: int = Field(3, env="MAX_RETRIES")
     request_timeout: int = Field(30, env="REQUEST_TIMEOUT")
+    esg_async_collection: bool = Field(False, env="ESG_ASYNC_COLLECTION")
+    rate_limit_state_path: Optional[str] = Field("/tmp/esg_tracker_rate_limits.db", env="RATE_LIMIT_STATE_PATH")
+    http_pool_connections: int = Field(16, env="HTTP_POOL_CONNECTIONS")
+    http_pool_maxsize: int = Field(16, env="HTTP_POOL_MAXSIZE")
+    hedged_requests: bool = Field(True, env="HEDGED_REQUESTS")
+    hedge_default_delay: float = Field(2.0, env="HEDGE_DEFAULT_DELAY")
+    hedge_min_delay: float = Field(0.25, env="HEDGE_MIN_DELAY")
+    hedge_max_delay: float = Field(10.0, env="HEDGE_MAX_DELAY")
+    http_cache_dir: str = Field("/tmp/esg_tracker_http_cache", env="HTTP_CACHE_DIR")
+    http_cache_max_mb: int = Field(256, env="HTTP_CACHE_MAX_MB")
+    http_record_dir: Optional[str] = Field(None, env="HTTP_RECORD_DIR")
+    
+    # Scheduler Settings (ESG scores refresh every data_collection_interval_hours)
+    price_refresh_minutes: int = Field(15, env="PRICE_REFRESH_MINUTES")
+    news_refresh_minutes: int = Field(60, env="NEWS_REFRESH_MINUTES")
+    scheduler_workers: int = Field(4, env="SCHEDULER_WORKERS")
+    scheduler_queue_size: int = Field(100, env="SCHEDULER_QUEUE_SIZE")
+    
+    # Distributed Collection (leased job queue, see src/data_collection/job_worker.py)
+    esg_universe_file: Optional[str] = Field(None, env="ESG_UNIVERSE_FILE")
+    esg_tickers: Optional[str] = Field(None, env="ESG_TICKERS")
+    job_batch_size: int = Field(10, env="JOB_BATCH_SIZE")
+    job_lease_seconds: int = Field(600, env="JOB_LEASE_SECONDS")
+    job_max_attempts: int = Field(3, env="JOB_MAX_ATTEMPTS")
+    job_retry_delay_seconds: int = Field(60, env="JOB_RETRY_DELAY_SECONDS")
+    
+    # Daily Call Budgets (free tiers; the ledger is shared by collectors and dashboards)
+    quota_ledger_path: str = Field("/tmp/esg_tracker_quota.db", env="QUOTA_LEDGER_PATH")
+    alpha_vantage_daily_budget: int = Field(500, env="ALPHA_VANTAGE_DAILY_BUDGET")
+    fmp_daily_budget: int = Field(250, env="FMP_DAILY_BUDGET")
+    fmp_batch_size: int = Field(50, env="FMP_BATCH_SIZE")
+    
+    # Provider Base URLs (point these at the stub server for offline benchmarks)
+    alpha_vantage_base_url: str = Field("https://www.alphavantage.co", env="ALPHA_VANTAGE_BASE_URL")
+    fmp_base_url: str = Field("https://financialmodelingprep.com/api/v3", env="FMP_BASE_URL")
+    news_api_base_url: str = Field("https://newsapi.org/v2", env="NEWS_API_BASE_URL")
+    openweather_base_url: str = Field("http://api.openweathermap.org/data/2.5", env="OPENWEATHER_BASE_URL")
+    epa_base_url: str = Field("https://enviro.epa.gov/enviro/efservice", env="EPA_BASE_URL")
+    
+    # Sentiment Analysis (batched transformer inference on CPU)
+    sentiment_batch_size: int = Field(32, env="SENTIMENT_BATCH_SIZE")
+    sentiment_threads: int = Field(0, env="SENTIMENT_THREADS")
+    sentiment_backend: str = Field("pytorch", env="SENTIMENT_BACKEND")
+    sentiment_onnx_dir: Optional[str] = Field(None, env="SENTIMENT_ONNX_DIR")
+    sentiment_model_dir: Optional[str] = Field(None, env="SENTIMENT_MODEL_DIR")
+    sentiment_cache: bool = Field(True, env="SENTIMENT_CACHE")
+    sentiment_cache_path: str = Field("/tmp/esg_tracker_sentiment.db", env="SENTIMENT_CACHE_PATH")
+    sentiment_cache_size: int = Field(10000, env="SENTIMENT_CACHE_SIZE")
+    esg_lexicon_path: Optional[str] = Field(None, env="ESG_LEXICON_PATH")
     
     # Dashboard Settings
     streamlit_server_port: int = Field(8501, env="STREAMLIT_SERVER_PORT")
@@ -3,21 +3,66 @@ Alpha Vantage Data Collector
 Collects additional financial and ESG data from Alpha Vantage API
 """
 
-import requests
+import asyncio
+import csv
+import io
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 import logging
 
+import aiohttp
+
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .http_cache import CachedResponse, HTTPCache, get_http_cache
+from .endpoints import get_base_url
+from .quota_planner import QuotaExceededError, QuotaPlanner, alpha_vantage_data_type, get_quota_planner
+
 logger = logging.getLogger(__name__)
 
+# NEWS_SENTIMENT returns at most this many articles per call
+NEWS_SENTIMENT_MAX_LIMIT = 1000
+
+# NEWS_SENTIMENT timestamp format (time_published, time_from, time_to)
+NEWS_TIME_FORMAT = "%Y%m%dT%H%M"
+
+
+def sentiment_label(alpha_label: str) -> str:
+    """Map an Alpha Vantage label (Bearish ... Bullish) onto our positive/neutral/negative labels"""
+    alpha_label = (alpha_label or "").lower()
+    if "bullish" in alpha_label:
+        return "positive"
+    if "bearish" in alpha_label:
+        return "negative"
+    return "neutral"
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def _parse_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
 
 class AlphaVantageCollector:
     """Collects data from Alpha Vantage API"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, rate_limiter: Optional[RateLimiter] = None,
+                 http_cache: Optional[HTTPCache] = None, base_url: Optional[str] = None,
+                 quota_planner: Optional[QuotaPlanner] = None):
         self.api_key = api_key or os.getenv("ALPHA_VANTAGE_API_KEY")
-        self.base_url = "https://www.alphavantage.co/query"
+        self.base_url = (base_url or get_base_url("alpha_vantage")).rstrip("/")
+        self.query_url = f"{self.base_url}/query"
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.http_cache = http_cache or get_http_cache()
+        self.quota_planner = quota_planner or get_quota_planner()
     
     def get_company_overview(self, ticker: str) -> Optional[Dict[str, Any]]:
         """Get detailed company overview"""
@@ -32,36 +77,27 @@ class AlphaVantageCollector:
                 "apikey": self.api_key
             }
             
-            response = requests.get(self.base_url, params=params)
+            response = self._get(params)
+            if response is None:
+                return None
             
             if response.status_code == 200:
-                data = response.json()
-                
-                if "Error Message" in data:
-                    logger.warning(f"Alpha Vantage error for {ticker}: {data['Error Message']}")
-                    return None
-                
-                return {
-                    "ticker": ticker,
-                    "name": data.get("Name", ""),
-                    "sector": data.get("Sector", ""),
-                    "industry": data.get("Industry", ""),
-                    "market_cap": data.get("MarketCapitalization", ""),
-                    "pe_ratio": data.get("PERatio", ""),
-                    "dividend_yield": data.get("DividendYield", ""),
-                    "description": data.get("Description", ""),
-                    "data_source": "alpha_vantage"
-                }
+                return self._parse_overview(ticker, response.json())
             else:
                 logger.warning(f"Alpha Vantage request failed: {response.status_code}")
                 return None
-                
+        
         except Exception as e:
             logger.error(f"Error getting company overview for {ticker}: {e}")
             return None
     
     def get_earnings_calendar(self, ticker: str) -> List[Dict[str, Any]]:
-        """Get earnings calendar data"""
+        """
+        Get earnings calendar data for one symbol
+        
+        Costs one API call per symbol; collection runs use the whole-market
+        stream_earnings_calendar download and read symbols from the database.
+        """
         if not self.api_key:
             return []
         
@@ -73,31 +109,198 @@ class AlphaVantageCollector:
                 "apikey": self.api_key
             }
             
-            response = requests.get(self.base_url, params=params)
+            response = self._get(params)
+            if response is None:
+                return []
             
             if response.status_code == 200:
                 # This returns CSV data
-                lines = response.text.strip().split('\n')
-                if len(lines) < 2:
-                    return []
-                
-                headers = lines[0].split(',')
-                earnings = []
-                
-                for line in lines[1:]:
-                    values = line.split(',')
-                    if len(values) == len(headers):
-                        earnings.append(dict(zip(headers, values)))
-                
-                return earnings
+                reader = csv.DictReader(io.StringIO(response.text))
+                return [row for row in reader if None not in row and None not in row.values()]
             else:
                 logger.warning(f"Alpha Vantage earnings request failed: {response.status_code}")
                 return []
-                
+        
         except Exception as e:
             logger.error(f"Error getting earnings for {ticker}: {e}")
             return []
     
+    def stream_earnings_calendar(self, horizon: str = "3month") -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        Download the earnings calendar of the whole market in one call
+        
+        Args:
+            horizon: "3month", "6month" or "12month"
+        
+        Returns:
+            Iterator of report rows (symbol, name, report_date, fiscal_date_ending,
+            estimate, currency) parsed lazily from the CSV, or None when the
+            download failed or was deferred
+        """
+        if not self.api_key:
+            logger.warning("No Alpha Vantage API key provided")
+            return None
+        
+        params = {
+            "function": "EARNINGS_CALENDAR",
+            "horizon": horizon,
+            "apikey": self.api_key
+        }
+        quota_hook = self._quota_hook(params, self.rate_limiter)
+        try:
+            response = self.http_cache.get(self.query_url, params=params, before_fetch=quota_hook)
+        except QuotaExceededError as e:
+            logger.info(str(e))
+            return None
+        except Exception as e:
+            logger.error(f"Error downloading earnings calendar: {e}")
+            return None
+        self.quota_planner.observe("alpha_vantage", quota_hook, response)
+        
+        if response.status_code != 200:
+            logger.warning(f"Alpha Vantage earnings calendar request failed: {response.status_code}")
+            return None
+        if response.content.lstrip()[:1] == b"{":
+            # Errors and throttle notes come back as JSON instead of CSV
+            logger.warning(f"Alpha Vantage earnings calendar returned no CSV: {response.text[:200]}")
+            return None
+        return self._parse_earnings_csv(response.text)
+    
+    def _parse_earnings_csv(self, text: str) -> Iterator[Dict[str, Any]]:
+        """Yield normalized report rows from an EARNINGS_CALENDAR CSV body, skipping malformed ones"""
+        for row in csv.DictReader(io.StringIO(text)):
+            symbol = (row.get("symbol") or "").strip().upper()
+            report_date = _parse_date(row.get("reportDate"))
+            if not symbol or report_date is None:
+                continue
+            yield {
+                "symbol": symbol,
+                "name": (row.get("name") or "").strip(),
+                "report_date": report_date,
+                "fiscal_date_ending": _parse_date(row.get("fiscalDateEnding")),
+                "estimate": _parse_float(row.get("estimate")),
+                "currency": (row.get("currency") or "").strip() or None
+            }
+    
+    def get_news_sentiment_batch(self, tickers: Iterable[str], time_from: datetime,
+                                 limit: int = NEWS_SENTIMENT_MAX_LIMIT, max_calls: int = 3,
+                                 min_relevance: float = 0.1) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Collect the NEWS_SENTIMENT feed once for a whole group of tickers
+        
+        The `tickers` filter of NEWS_SENTIMENT only matches articles that
+        mention every listed ticker, so a group cannot be queried that way.
+        Instead the latest market-wide feed is paged backwards from now to
+        time_from (up to max_calls calls of `limit` articles), and each
+        article is routed to the tickers in its ticker_sentiment list. Every
+        article is kept, with the ticker's own sentiment and relevance.
+        
+        Args:
+            tickers: Tickers to keep articles for
+            time_from: Oldest publication time to fetch
+            limit: Articles per call (Alpha Vantage allows up to 1000)
+            max_calls: Upper bound on calls per batch
+            min_relevance: Skip articles that only mention a ticker in passing
+        
+        Returns:
+            Articles in our news format keyed by ticker (every ticker present),
+            or None when no call could be made
+        """
+        if not self.api_key:
+            return None
+        
+        wanted = {ticker.upper() for ticker in tickers}
+        articles: Dict[str, List[Dict[str, Any]]] = {ticker: [] for ticker in wanted}
+        seen_urls = set()
+        time_to = None
+        calls = 0
+        
+        while calls < max_calls:
+            params = {
+                "function": "NEWS_SENTIMENT",
+                "sort": "LATEST",
+                "limit": limit,
+                "time_from": time_from.strftime(NEWS_TIME_FORMAT),
+                "apikey": self.api_key
+            }
+            if time_to is not None:
+                params["time_to"] = time_to.strftime(NEWS_TIME_FORMAT)
+            
+            try:
+                response = self._get(params)
+            except Exception as e:
+                logger.error(f"Error getting news sentiment feed: {e}")
+                response = None
+            if response is None or response.status_code != 200:
+                break
+            calls += 1
+            
+            feed = response.json().get("feed") or []
+            oldest = None
+            for item in feed:
+                published = self._parse_time_published(item.get("time_published"))
+                if published is not None and (oldest is None or published < oldest):
+                    oldest = published
+                url = item.get("url")
+                if not url or url in seen_urls or published is None:
+                    continue
+                seen_urls.add(url)
+                for ticker_sentiment in item.get("ticker_sentiment") or []:
+                    ticker = (ticker_sentiment.get("ticker") or "").upper()
+                    relevance = _parse_float(ticker_sentiment.get("relevance_score")) or 0.0
+                    if ticker in wanted and relevance >= min_relevance:
+                        articles[ticker].append(self._format_feed_article(item, published, ticker_sentiment, relevance))
+            
+            # A full page may have more behind it; continue from its oldest article
+            if len(feed) < limit or oldest is None or oldest <= time_from or oldest == time_to:
+                break
+            time_to = oldest
+        
+        if calls == 0:
+            return None
+        routed = sum(len(ticker_articles) for ticker_articles in articles.values())
+        logger.info(
+            f"Alpha Vantage news feed: {len(seen_urls)} articles in {calls} calls, "
+            f"{routed} matched {sum(1 for a in articles.values() if a)}/{len(wanted)} tickers"
+        )
+        return articles
+    
+    def summarize_sentiment(self, ticker: str, articles: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Relevance-weighted sentiment of a ticker's feed articles, in the get_sentiment_analysis format"""
+        if not articles:
+            return None
+        total_relevance = sum(article["relevance_score"] for article in articles) or 1.0
+        score = sum(article["sentiment_score"] * article["relevance_score"] for article in articles) / total_relevance
+        return {
+            "ticker": ticker,
+            "sentiment_score": score,
+            "sentiment_label": "positive" if score >= 0.15 else "negative" if score <= -0.15 else "neutral",
+            "news_count": len(articles),
+            "data_source": "alpha_vantage"
+        }
+    
+    def _parse_time_published(self, value: Optional[str]) -> Optional[datetime]:
+        try:
+            return datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+        except (TypeError, ValueError):
+            return None
+    
+    def _format_feed_article(self, item: Dict[str, Any], published: datetime,
+                             ticker_sentiment: Dict[str, Any], relevance: float) -> Dict[str, Any]:
+        """Convert a NEWS_SENTIMENT feed item into our news format for one of its tickers"""
+        return {
+            "date": published.isoformat(),
+            "headline": item.get("title", ""),
+            "content": item.get("summary", ""),
+            "source": item.get("source", ""),
+            "url": item.get("url", ""),
+            "sentiment_score": _parse_float(ticker_sentiment.get("ticker_sentiment_score")) or 0.0,
+            "sentiment_label": sentiment_label(ticker_sentiment.get("ticker_sentiment_label")),
+            "sentiment_method": "alpha_vantage",
+            "relevance_score": relevance,
+            "data_source": "alpha_vantage"
+        }
+    
     def get_sentiment_analysis(self, ticker: str) -> Optional[Dict[str, Any]]:
         """Get news sentiment analysis"""
         if not self.api_key:
@@ -110,25 +313,134 @@ class AlphaVantageCollector:
                 "apikey": self.api_key
             }
             
-            response = requests.get(self.base_url, params=params)
+            response = self._get(params)
+            if response is None:
+                return None
             
             if response.status_code == 200:
-                data = response.json()
-                
-                if "feed" in data and data["feed"]:
-                    # Get the most recent sentiment data
-                    latest_news = data["feed"][0]
-                    
-                    return {
-                        "ticker": ticker,
-                        "sentiment_score": latest_news.get("overall_sentiment_score", 0),
-                        "sentiment_label": latest_news.get("overall_sentiment_label", "neutral"),
-                        "news_count": len(data["feed"]),
-                        "data_source": "alpha_vantage"
-                    }
+                return self._parse_sentiment(ticker, response.json())
             
             return None
-            
+        
         except Exception as e:
             logger.error(f"Error getting sentiment for {ticker}: {e}")
             return None
+    
+    async def get_company_overview_async(self, session: aiohttp.ClientSession, ticker: str,
+                                         semaphore: Optional[asyncio.Semaphore] = None) -> Optional[Dict[str, Any]]:
+        """Get detailed company overview using a shared aiohttp session"""
+        if not self.api_key:
+            logger.warning("No Alpha Vantage API key provided")
+            return None
+        
+        try:
+            params = {
+                "function": "OVERVIEW",
+                "symbol": ticker,
+                "apikey": self.api_key
+            }
+            data = await self._get_json_async(session, params, semaphore)
+            return self._parse_overview(ticker, data) if data is not None else None
+        except Exception as e:
+            logger.error(f"Error getting company overview for {ticker}: {e}")
+            return None
+    
+    async def get_sentiment_analysis_async(self, session: aiohttp.ClientSession, ticker: str,
+                                           semaphore: Optional[asyncio.Semaphore] = None) -> Optional[Dict[str, Any]]:
+        """Get news sentiment analysis using a shared aiohttp session"""
+        if not self.api_key:
+            return None
+        
+        try:
+            params = {
+                "function": "NEWS_SENTIMENT",
+                "tickers": ticker,
+                "apikey": self.api_key
+            }
+            data = await self._get_json_async(session, params, semaphore)
+            return self._parse_sentiment(ticker, data) if data is not None else None
+        except Exception as e:
+            logger.error(f"Error getting sentiment for {ticker}: {e}")
+            return None
+    
+    async def _get_json_async(self, session: aiohttp.ClientSession, params: Dict[str, Any],
+                              semaphore: Optional[asyncio.Semaphore] = None) -> Optional[Dict[str, Any]]:
+        """GET the query endpoint and decode JSON, honouring the concurrency limit"""
+        semaphore = semaphore or asyncio.Semaphore(1)
+        quota_hook = self._quota_hook(params)
+        
+        async def before_fetch():
+            quota_hook()
+            await self.rate_limiter.acquire_async("alpha_vantage")
+        
+        try:
+            async with semaphore:
+                response = await self.http_cache.get_async(
+                    session, self.query_url, params=params, before_fetch=before_fetch
+                )
+        except QuotaExceededError as e:
+            logger.info(str(e))
+            return None
+        self.quota_planner.observe("alpha_vantage", quota_hook, response)
+        
+        if response.status_code != 200:
+            logger.warning(f"Alpha Vantage request failed: {response.status_code}")
+            return None
+        return response.json()
+    
+    def _get(self, params: Dict[str, Any]) -> Optional[CachedResponse]:
+        """
+        GET the query endpoint through the shared cache
+        
+        Only real requests spend daily quota and wait on the rate limiter.
+        Returns None when the quota planner defers the call.
+        """
+        quota_hook = self._quota_hook(params, self.rate_limiter)
+        try:
+            response = self.http_cache.get(self.query_url, params=params, before_fetch=quota_hook)
+        except QuotaExceededError as e:
+            logger.info(str(e))
+            return None
+        self.quota_planner.observe("alpha_vantage", quota_hook, response)
+        return response
+    
+    def _quota_hook(self, params: Dict[str, Any], rate_limiter: Optional[RateLimiter] = None):
+        """before_fetch hook charging this query to the daily Alpha Vantage budget"""
+        ticker = params.get("symbol") or params.get("tickers")
+        return self.quota_planner.before_fetch(
+            "alpha_vantage", ticker, alpha_vantage_data_type(params), rate_limiter
+        )
+    
+    def _parse_overview(self, ticker: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Convert an OVERVIEW response into our company format"""
+        if "Error Message" in data:
+            logger.warning(f"Alpha Vantage error for {ticker}: {data['Error Message']}")
+            return None
+        
+        return {
+            "ticker": ticker,
+            "name": data.get("Name", ""),
+            "sector": data.get("Sector", ""),
+            "industry": data.get("Industry", ""),
+            "market_cap": data.get("MarketCapitalization", ""),
+            "pe_ratio": data.get("PERatio", ""),
+            "dividend_yield": data.get("DividendYield", ""),
+            "description": data.get("Description", ""),
+            "data_source": "alpha_vantage"
+        }
+    
+    def _parse_sentiment(self, ticker: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Convert a NEWS_SENTIMENT response into our sentiment summary"""
+        if "feed" in data and data["feed"]:
+            # Get the most recent sentiment data
+            latest_news = data["feed"][0]
+            
+            return {
+                "ticker": ticker,
+                "sentiment_score": latest_news.get("overall_sentiment_score", 0),
+                "sentiment_label": latest_news.get("overall_sentiment_label", "neutral"),
+                "news_count": len(data["feed"]),
+                "data_source": "alpha_vantage"
+            }
+        
+        return None
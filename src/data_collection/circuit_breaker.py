@@ -0,0 +1,310 @@
+"""
+Provider Circuit Breakers
+Per-provider circuit breakers with adaptive backoff and rolling health stats
+"""
+
+import time
+import random
+import threading
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Alpha Vantage answers throttled calls with HTTP 200 and one of these keys
+_THROTTLE_KEYS = ("Note", "Information")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the provider's circuit is open."""
+    
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"Circuit for {provider} is open, retry in {retry_in:.1f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    """Convert a Retry-After header (seconds or HTTP date) into seconds from now"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception means the provider is rate limiting us"""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    # yfinance raises YFRateLimitError; older versions only say so in the message
+    message = str(error).lower()
+    return type(error).__name__ == "YFRateLimitError" or "too many requests" in message or "rate limit" in message
+
+
+def _retry_after_from(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    return parse_retry_after(headers.get("Retry-After"))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider
+    
+    Closed: calls go through. After failure_threshold consecutive failures the
+    circuit opens and calls are refused immediately for an exponentially
+    growing, jittered backoff (or the provider's Retry-After, if longer).
+    Once that expires the circuit is half-open: a single trial call is let
+    through, closing the circuit on success or reopening it on failure.
+    
+    A rolling window of outcomes and latencies backs the health stats the
+    fallback chains use to order providers.
+    """
+    
+    def __init__(self, provider: str, failure_threshold: int = 3, base_backoff: float = 5.0,
+                 max_backoff: float = 300.0, jitter: float = 0.2, window: int = 50):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._consecutive_opens = 0
+        self._open_until = 0.0
+        self._trial_in_flight = False
+        self.total_calls = 0
+        self.total_failures = 0
+        self.rejected = 0
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+    
+    def allow_request(self) -> bool:
+        """Check (and reserve, when half-open) permission to call the provider"""
+        with self._lock:
+            state = self._current_state()
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+    
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a trial call through"""
+        with self._lock:
+            return max(0.0, self._open_until - time.time()) if self._state == STATE_OPEN else 0.0
+    
+    def record_success(self, latency: Optional[float] = None):
+        with self._lock:
+            self.total_calls += 1
+            self._outcomes.append((True, latency))
+            self._consecutive_failures = 0
+            self._consecutive_opens = 0
+            self._trial_in_flight = False
+            if self._state != STATE_CLOSED:
+                logger.info(f"Circuit for {self.provider} closed")
+            self._state = STATE_CLOSED
+    
+    def record_failure(self, latency: Optional[float] = None, retry_after: Optional[float] = None):
+        with self._lock:
+            self.total_calls += 1
+            self.total_failures += 1
+            self._outcomes.append((False, latency))
+            self._consecutive_failures += 1
+            
+            half_open = self._current_state() == STATE_HALF_OPEN
+            self._trial_in_flight = False
+            if half_open or retry_after is not None or self._consecutive_failures >= self.failure_threshold:
+                self._open(retry_after)
+    
+    def call(self, func: Callable[..., Any], *args, retries: int = 0, **kwargs) -> Any:
+        """
+        Call func through the breaker
+        
+        Exceptions count as failures, as do returned responses with status 429
+        or 5xx and Alpha Vantage throttle notes; responses served from the HTTP
+        cache are not counted at all. Failed calls are retried up to `retries`
+        times with jittered exponential backoff, unless the provider asked us
+        to back off (rate limit) or the circuit opened meanwhile.
+        
+        Raises:
+            CircuitOpenError: If the circuit refuses the call
+        """
+        for attempt in range(retries + 1):
+            if not self.allow_request():
+                raise CircuitOpenError(self.provider, self.retry_in())
+            
+            start = time.time()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not getattr(e, "provider_failure", True):
+                    # The request never reached the provider (e.g. quota deferral)
+                    self._release_trial()
+                    raise
+                retry_after = _retry_after_from(e)
+                if retry_after is None and is_rate_limit_error(e):
+                    retry_after = 0.0
+                self.record_failure(time.time() - start, retry_after)
+                if retry_after is not None or attempt == retries or self.state == STATE_OPEN:
+                    raise
+            else:
+                if getattr(result, "from_cache", False):
+                    self._release_trial()
+                    return result
+                failed, retry_after = self._classify_response(result)
+                if not failed:
+                    self.record_success(time.time() - start)
+                    return result
+                self.record_failure(time.time() - start, retry_after)
+                if retry_after is not None or attempt == retries or self.state == STATE_OPEN:
+                    return result
+            
+            time.sleep(self._backoff(attempt, base=0.5, cap=4.0))
+        return None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Rolling health stats for this provider"""
+        with self._lock:
+            outcomes = list(self._outcomes)
+            state = self._current_state()
+            retry_in = max(0.0, self._open_until - time.time()) if state == STATE_OPEN else 0.0
+        latencies = sorted(latency for ok, latency in outcomes if ok and latency is not None)
+        return {
+            "provider": self.provider,
+            "state": state,
+            "success_rate": sum(ok for ok, _ in outcomes) / len(outcomes) if outcomes else None,
+            "p50_latency": latencies[len(latencies) // 2] if latencies else None,
+            "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+            "calls": self.total_calls,
+            "failures": self.total_failures,
+            "rejected": self.rejected,
+            "retry_in": round(retry_in, 1)
+        }
+    
+    def _current_state(self) -> str:
+        if self._state == STATE_OPEN and time.time() >= self._open_until:
+            self._state = STATE_HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+    
+    def _open(self, retry_after: Optional[float]):
+        self._consecutive_opens += 1
+        delay = self._backoff(self._consecutive_opens - 1)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self._state = STATE_OPEN
+        self._open_until = time.time() + delay
+        logger.warning(f"Circuit for {self.provider} opened for {delay:.1f}s")
+    
+    def _release_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def _backoff(self, attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+        """Exponential backoff for the given attempt with +/- jitter"""
+        base = self.base_backoff if base is None else base
+        cap = self.max_backoff if cap is None else cap
+        delay = min(cap, base * (2 ** attempt))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def _classify_response(self, result: Any):
+        """Return (failed, retry_after) for an HTTP-like response"""
+        status = getattr(result, "status_code", None)
+        if status is None:
+            return False, None
+        if status == 429:
+            retry_after = parse_retry_after((getattr(result, "headers", None) or {}).get("Retry-After"))
+            return True, retry_after if retry_after is not None else 0.0
+        if status >= 500:
+            return True, None
+        if status == 200 and self.provider == "alpha_vantage":
+            try:
+                body = result.json()
+            except ValueError:
+                return False, None
+            if isinstance(body, dict) and any(key in body for key in _THROTTLE_KEYS):
+                return True, 60.0
+        return False, None
+
+
+class CircuitBreakerRegistry:
+    """One circuit breaker per provider, created on first use"""
+    
+    def __init__(self, **breaker_options):
+        self._breaker_options = breaker_options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = CircuitBreaker(provider, **self._breaker_options)
+                self._breakers[provider] = breaker
+            return breaker
+    
+    def is_available(self, provider: str) -> bool:
+        """True unless the provider's circuit is open"""
+        return self.get(provider).state != STATE_OPEN
+    
+    def rank(self, providers: List[str]) -> List[str]:
+        """
+        Order providers for a fallback chain
+        
+        Providers with an open circuit are dropped. The rest keep their given
+        order unless their rolling success rate differs, in which case the
+        healthier provider goes first.
+        """
+        available = [provider for provider in providers if self.is_available(provider)]
+        
+        def health(provider: str):
+            stats = self.get(provider).stats()
+            success_rate = stats["success_rate"] if stats["success_rate"] is not None else 1.0
+            return -round(success_rate, 1)
+        
+        return sorted(available, key=health)
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Health stats of every provider seen so far"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [breaker.stats() for breaker in breakers]
+
+
+# Global circuit breaker registry
+_circuit_breakers: Optional[CircuitBreakerRegistry] = None
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Get the process-wide circuit breaker registry."""
+    global _circuit_breakers
+    with _circuit_breakers_lock:
+        if _circuit_breakers is None:
+            _circuit_breakers = CircuitBreakerRegistry()
+        return _circuit_breakers
@@ -4,8 +4,6 @@ Fetches ESG data from various sources and stores in database.
 """
 
 import logging
-import time
-import requests
 import yfinance as yf
 import sys
 import os
@@ -18,6 +16,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.config import settings
 from utils.database import get_db_manager
 from utils.mock_data import SAMPLE_COMPANIES, generate_esg_scores, generate_news
+from data_collection.rate_limiter import get_rate_limiter
+from data_collection.http_client import get_http_session
 
 # Configure logging
 logging.basicConfig(
@@ -32,10 +32,8 @@ class ESGDataCollector:
     
     def __init__(self):
         self.db_manager = get_db_manager()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ESG-Data-Tracker/1.0 (Educational Project)'
-        })
+        self.rate_limiter = get_rate_limiter()
+        self.session = get_http_session()
     
     def collect_company_info(self, ticker: str) -> Optional[Dict[str, Any]]:
         """
@@ -51,6 +49,7 @@ class ESGDataCollector:
             logger.info(f"Collecting company info for {ticker}")
             
             # Use yfinance to get company info
+            self.rate_limiter.acquire("yahoo_finance")
             stock = yf.Ticker(ticker)
             info = stock.info
             
@@ -196,16 +195,26 @@ class ESGDataCollector:
                 company_id = self.db_manager.insert_company(company_data)
                 logger.info(f"Inserted company {ticker} with ID {company_id}")
             
-            # Collect ESG scores
-            esg_data = self.collect_esg_scores(ticker)
-            if esg_data:
-                esg_data['company_id'] = company_id
-                self.db_manager.insert_esg_scores(esg_data)
-                logger.info(f"Inserted ESG scores for {ticker}")
+            # Collect ESG scores (one snapshot per day)
+            esg_watermark = self.db_manager.get_watermark(ticker, "esg_scores")
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            if esg_watermark is not None and esg_watermark >= today:
+                logger.info(f"ESG scores for {ticker} already collected today")
+            else:
+                esg_data = self.collect_esg_scores(ticker)
+                if esg_data:
+                    esg_data['company_id'] = company_id
+                    self.db_manager.insert_esg_scores(esg_data)
+                    self.db_manager.set_watermark(ticker, "esg_scores", datetime.fromisoformat(esg_data['date']))
+                    logger.info(f"Inserted ESG scores for {ticker}")
             
-            # Collect and process news
+            # Collect and process news newer than the last ingested article
             company_name = existing_company['name'] if existing_company else ticker
-            news_articles = self.collect_news(ticker, company_name)
+            news_watermark = self.db_manager.get_watermark(ticker, "news")
+            news_articles = [
+                article for article in self.collect_news(ticker, company_name)
+                if news_watermark is None or datetime.fromisoformat(article['date']) > news_watermark
+            ]
             
             for article in news_articles:
                 # Analyze sentiment
@@ -217,6 +226,10 @@ class ESGDataCollector:
                 # Insert news article
                 self.db_manager.insert_news(article)
             
+            if news_articles:
+                latest = max(datetime.fromisoformat(article['date']) for article in news_articles)
+                self.db_manager.set_watermark(ticker, "news", latest)
+            
             logger.info(f"Inserted {len(news_articles)} news articles for {ticker}")
             
             return True
@@ -255,9 +268,6 @@ class ESGDataCollector:
                     results["companies_failed"] += 1
                     results["errors"].append(f"Failed to process {ticker}")
                 
-                # Add delay between requests to be respectful to APIs
-                time.sleep(1)
-                
             except Exception as e:
                 results["companies_failed"] += 1
                 results["errors"].append(f"Error processing {ticker}: {str(e)}")
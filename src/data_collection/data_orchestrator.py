@@ -4,97 +4,146 @@ Coordinates data collection from multiple sources
 """
 
 import os
+import asyncio
+import threading
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 import sys
 
+import aiohttp
+
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_collection.yahoo_finance_collector import YahooFinanceCollector
+from data_collection.yahoo_finance_collector import TickerContext, YahooFinanceCollector
 from data_collection.news_api_collector import NewsAPICollector
 from data_collection.alpha_vantage_collector import AlphaVantageCollector
-from data_processing.sentiment_analyzer import SentimentAnalyzer
+from data_collection.fmp_collector import FMPCollector
+from data_collection.quota_planner import get_quota_planner
+from data_collection.http_client import create_async_session
+from data_collection.universe import resolve_universe
+from data_collection.stage_dag import StageDAG
+from data_processing.sentiment_analyzer import get_sentiment_analyzer
+from data_processing.dedup import dedupe_news
 from ..database import get_db_manager
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# Default number of in-flight requests per provider in async mode
+DEFAULT_PROVIDER_CONCURRENCY = {
+    "yahoo_finance": 8,
+    "news_api": 4,
+    "alpha_vantage": 1
+}
+
+# Watermark source names, one per incrementally collected feed
+WATERMARK_YAHOO_NEWS = "yahoo_news"
+WATERMARK_NEWS_API = "news_api"
+WATERMARK_YAHOO_PRICES = "yahoo_prices"
+WATERMARK_ALPHA_NEWS = "alpha_vantage_news"
+
+# Alpha Vantage calls made per company, planned against the daily quota
+ALPHA_DATA_TYPES = ["overview", "news_sentiment"]
+
+# Feeds that can be refreshed on their own (see DataOrchestrator.collect_feed)
+FEED_PRICES = "prices"
+FEED_NEWS = "news"
+FEED_ESG = "esg"
+FEED_EARNINGS = "earnings"
+
+# A whole-market earnings calendar younger than this is not downloaded again
+EARNINGS_CALENDAR_MAX_AGE = timedelta(hours=20)
+
+# Sample companies to collect data for
+SAMPLE_TICKERS = [
+    "AAPL", "MSFT", "GOOGL", "TSLA", "NVDA", "JPM", "JNJ", "PG", "V", "UNH"
+]
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse a record timestamp into a naive datetime (wall time of its source)"""
+    try:
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        return parsed.replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
+
+
+def _latest_timestamp(records: List[Dict[str, Any]]) -> Optional[datetime]:
+    """Most recent `date` among records, if any parse"""
+    timestamps = [ts for ts in (_parse_timestamp(record.get("date")) for record in records) if ts]
+    return max(timestamps) if timestamps else None
+
 
 class DataOrchestrator:
     """Orchestrates data collection from multiple sources"""
     
-    def __init__(self):
+    def __init__(self, provider_concurrency: Optional[Dict[str, int]] = None):
         self.yahoo_collector = YahooFinanceCollector()
-        self.news_collector = NewsAPICollector()
-        self.alpha_collector = AlphaVantageCollector()
-        self.sentiment_analyzer = SentimentAnalyzer()
+        self.news_collector = NewsAPICollector(base_url=settings.news_api_base_url)
+        self.alpha_collector = AlphaVantageCollector(base_url=settings.alpha_vantage_base_url)
+        self.fmp_collector = FMPCollector(base_url=settings.fmp_base_url, batch_size=settings.fmp_batch_size)
+        # Shared by every orchestrator in the process; the model loads on first use
+        self.sentiment_analyzer = get_sentiment_analyzer()
         self.db_manager = get_db_manager()
+        self.quota_planner = get_quota_planner()
+        self.provider_concurrency = {**DEFAULT_PROVIDER_CONCURRENCY, **(provider_concurrency or {})}
     
-    def collect_company_data(self, ticker: str, days_back: int = 30) -> Dict[str, Any]:
-        """Collect all available data for a company"""
+    def collect_company_data(self, ticker: str, days_back: int = 30,
+                             alpha_data_types: Optional[Set[str]] = None,
+                             context: Optional[TickerContext] = None) -> Dict[str, Any]:
+        """
+        Collect all available data for a company
+        
+        Independent sources are fetched concurrently as a stage DAG (see
+        _company_stages); per-stage seconds are returned in "stage_timings".
+        News is only requested from after each source's watermark, so daily
+        runs fetch (and later insert) just what is new since the last run.
+        alpha_data_types limits the Alpha Vantage calls to those planned
+        against today's quota (None makes all of them). context shares
+        Yahoo Finance lookups already made for the ticker in this run.
+        """
+        alpha_data_types = set(ALPHA_DATA_TYPES) if alpha_data_types is None else alpha_data_types
+        context = context or self.yahoo_collector.ticker_context(ticker)
         logger.info(f"Starting data collection for {ticker}")
+        watermarks = self._get_watermarks(ticker)
         
-        collected_data = {
-            "ticker": ticker,
-            "collection_date": datetime.now().isoformat(),
-            "company_info": None,
-            "esg_scores": [],
-            "news": [],
-            "financial_metrics": [],
-            "errors": []
-        }
+        collected_data = self._empty_collected_data(ticker)
         
         try:
-            # 1. Get company information from Yahoo Finance
-            logger.info(f"Collecting company info for {ticker}")
-            company_info = self.yahoo_collector.get_company_info(ticker)
+            run = self._company_stages(ticker, days_back, watermarks, alpha_data_types, context).run()
+            results = run.results
+            collected_data["stage_timings"] = run.timings
+            for stage, error in run.errors.items():
+                collected_data["errors"].append(f"Error in {stage} stage for {ticker}: {error}")
+            
+            company_info = results["company_info"]
             if company_info:
                 collected_data["company_info"] = company_info
             else:
                 collected_data["errors"].append("Failed to get company info from Yahoo Finance")
             
-            # 2. Get ESG scores from Yahoo Finance
-            logger.info(f"Collecting ESG scores for {ticker}")
-            esg_scores = self.yahoo_collector.get_esg_scores(ticker, days_back)
-            collected_data["esg_scores"] = esg_scores
-            
-            # 3. Get news from multiple sources
-            logger.info(f"Collecting news for {ticker}")
-            news_data = []
-            
-            # Yahoo Finance news
-            yahoo_news = self.yahoo_collector.get_news(ticker, days_back)
-            news_data.extend(yahoo_news)
-            
-            # News API (if company name is available)
-            if company_info and company_info.get("name"):
-                news_api_news = self.news_collector.get_esg_news(company_info["name"], days_back)
-                news_data.extend(news_api_news)
-            
-            # 4. Analyze sentiment for all news
-            if news_data:
-                logger.info(f"Analyzing sentiment for {len(news_data)} news articles")
-                analyzed_news = self.sentiment_analyzer.analyze_news_batch(news_data)
-                collected_data["news"] = analyzed_news
+            collected_data["esg_scores"] = results["esg_scores"] or []
+            collected_data["news"] = results["news"] or []
             
-            # 5. Get additional financial data from Alpha Vantage
-            logger.info(f"Collecting additional financial data for {ticker}")
-            alpha_overview = self.alpha_collector.get_company_overview(ticker)
+            # Merge the Alpha Vantage overview with the Yahoo Finance company info
+            alpha_overview = results.get("alpha_overview")
             if alpha_overview:
-                # Merge with existing company info
                 if collected_data["company_info"]:
                     collected_data["company_info"].update(alpha_overview)
                 else:
                     collected_data["company_info"] = alpha_overview
             
-            # 6. Get sentiment analysis from Alpha Vantage
-            alpha_sentiment = self.alpha_collector.get_sentiment_analysis(ticker)
-            if alpha_sentiment:
-                collected_data["alpha_sentiment"] = alpha_sentiment
-            
-            logger.info(f"Data collection completed for {ticker}")
+            if results.get("alpha_sentiment"):
+                collected_data["alpha_sentiment"] = results["alpha_sentiment"]
             
+            logger.info(f"Data collection completed for {ticker} in {run.elapsed:.2f}s")
+        
         except Exception as e:
             error_msg = f"Error collecting data for {ticker}: {e}"
             logger.error(error_msg)
@@ -102,13 +151,140 @@ class DataOrchestrator:
         
         return collected_data
     
+    def _company_stages(self, ticker: str, days_back: int, watermarks: Dict[str, Optional[datetime]],
+                        alpha_data_types: Set[str], context: TickerContext) -> StageDAG:
+        """
+        Build the per-company collection stages
+        
+        Only the NewsAPI search waits (for the company name), and sentiment
+        analysis waits for both news sources; everything else runs at once.
+        The Yahoo Finance stages share one TickerContext.
+        """
+        def news_api_news(company_info):
+            if company_info and company_info.get("name"):
+                return self.news_collector.get_esg_news(
+                    company_info["name"], days_back, since=watermarks[WATERMARK_NEWS_API]
+                )
+            return []
+        
+        def news(yahoo_news, news_api_news):
+            # Sentiment once per story (syndicated copies are collapsed first)
+            news_data = (yahoo_news or []) + (news_api_news or [])
+            return self.analyze_news(news_data) if news_data else []
+        
+        dag = StageDAG(name=ticker)
+        dag.add("company_info", lambda: self.yahoo_collector.get_company_info(ticker, context=context))
+        dag.add("esg_scores", lambda: self.yahoo_collector.get_esg_scores(ticker, days_back, context=context))
+        dag.add("yahoo_news", lambda: self.yahoo_collector.get_news(
+            ticker, days_back, since=watermarks[WATERMARK_YAHOO_NEWS], context=context
+        ))
+        dag.add("news_api_news", news_api_news, depends_on=("company_info",))
+        dag.add("news", news, depends_on=("yahoo_news", "news_api_news"))
+        if "overview" in alpha_data_types:
+            dag.add("alpha_overview", lambda: self.alpha_collector.get_company_overview(ticker))
+        if "news_sentiment" in alpha_data_types:
+            dag.add("alpha_sentiment", lambda: self.alpha_collector.get_sentiment_analysis(ticker))
+        return dag
+    
+    def analyze_news(self, news_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Collapse near-duplicate articles across sources, then score one article per story"""
+        stories = dedupe_news(news_data)
+        logger.info(f"Analyzing sentiment for {len(stories)} news stories ({len(news_data)} articles)")
+        return self.sentiment_analyzer.analyze_news_batch(stories)
+    
+    def collect_alpha_news(self, tickers: List[str], days_back: int = 30) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch Alpha Vantage news sentiment for many companies with a few feed calls
+        
+        The feed is requested from the oldest of the tickers' watermarks, and
+        each ticker keeps only articles newer than its own watermark. Articles
+        without a parsable date are skipped.
+        
+        Returns:
+            Feed articles (with Alpha Vantage sentiment and relevance) keyed by ticker
+        """
+        if not tickers:
+            return {}
+        cutoff = datetime.now() - timedelta(days=days_back)
+        watermarks = {ticker: self.db_manager.get_watermark(ticker, WATERMARK_ALPHA_NEWS) for ticker in tickers}
+        time_from = min(max(cutoff, watermark) if watermark else cutoff for watermark in watermarks.values())
+        
+        articles = self.alpha_collector.get_news_sentiment_batch(tickers, time_from) or {}
+        news = {}
+        for ticker in tickers:
+            news[ticker] = []
+            for article in articles.get(ticker.upper(), []):
+                published = _parse_timestamp(article.get("date"))
+                if published is not None and (watermarks[ticker] is None or published > watermarks[ticker]):
+                    news[ticker].append(article)
+        return news
+    
+    def collect_fmp_profiles(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Company info from FMP for many companies, one request per FMP_BATCH_SIZE tickers
+        
+        Profiles are cached per symbol for a day, so repeated runs (and the
+        dashboard) reuse them. Returns an empty dict without an FMP API key.
+        """
+        if not self.fmp_collector.api_key:
+            return {}
+        return self.fmp_collector.get_company_info_batch(tickers)
+    
+    def _merge_fmp_profile(self, collected_data: Dict[str, Any], fmp_info: Optional[Dict[str, Any]]):
+        """Use the FMP profile where Yahoo Finance had no company info or left fields empty"""
+        if not fmp_info:
+            return
+        company_info = collected_data["company_info"]
+        if not company_info:
+            collected_data["company_info"] = dict(fmp_info)
+            return
+        for field, value in fmp_info.items():
+            if field != "data_source" and company_info.get(field) in (None, "", 0, "Unknown"):
+                company_info[field] = value
+    
+    def _merge_alpha_news(self, collected_data: Dict[str, Any], alpha_news: List[Dict[str, Any]]):
+        """
+        Add a ticker's Alpha Vantage feed articles to its collected news
+        
+        Feed articles already carry sentiment, so they are merged after
+        analyze_news: stories already collected (by URL or near-duplicate
+        text) keep their own scoring and list the feed copy as a duplicate.
+        """
+        if not alpha_news:
+            return
+        by_url = {}
+        for article in collected_data["news"]:
+            for record in [article] + article.get("duplicates", []):
+                if record.get("url"):
+                    by_url.setdefault(record["url"], article)
+        
+        new_articles = []
+        for article in alpha_news:
+            known = by_url.get(article["url"])
+            if known is None:
+                new_articles.append(article)
+            else:
+                known.setdefault("duplicates", []).append(
+                    {key: article.get(key) for key in ("url", "source", "date", "data_source")}
+                )
+        collected_data["news"] = dedupe_news(collected_data["news"] + new_articles)
+        collected_data["alpha_sentiment"] = self.alpha_collector.summarize_sentiment(
+            collected_data["ticker"], alpha_news
+        )
+    
     def save_to_database(self, collected_data: Dict[str, Any]) -> bool:
-        """Save collected data to database"""
+        """Save collected data to database and advance the ingestion watermarks"""
         try:
             ticker = collected_data["ticker"]
             
-            # Save company info
-            if collected_data["company_info"]:
+            # Prices are keyed by ticker, so they are stored even before the company row exists
+            prices_saved = self.save_prices(ticker, collected_data.get("financial_metrics", []))
+            
+            # Save company info (reuse the existing row on incremental runs)
+            existing_company = self.db_manager.get_company_by_ticker(ticker)
+            if existing_company:
+                company_id = existing_company["id"]
+            elif collected_data["company_info"]:
                 company_id = self.db_manager.insert_company(collected_data["company_info"])
                 logger.info(f"Saved company info for {ticker} (ID: {company_id})")
             else:
@@ -122,45 +298,289 @@ class DataOrchestrator:
                     self.db_manager.insert_esg_scores(score)
                 logger.info(f"Saved {len(collected_data['esg_scores'])} ESG scores for {ticker}")
             
-            # Save news
+            # Save news, skipping articles whose URL is already stored for the company
             if collected_data["news"]:
-                for article in collected_data["news"]:
-                    article["company_id"] = company_id
-                    self.db_manager.insert_news(article)
-                logger.info(f"Saved {len(collected_data['news'])} news articles for {ticker}")
-            
-            return True
+                stored_urls = self.db_manager.get_news_urls(
+                    company_id, [article.get("url") for article in collected_data["news"]]
+                )
+                rows = [
+                    {**article, "company_id": company_id, "date": _parse_timestamp(article.get("date"))}
+                    for article in collected_data["news"]
+                    if not (article.get("url") and article["url"] in stored_urls)
+                ]
+                saved = self.db_manager.insert_news_batch([row for row in rows if row["date"] and row.get("headline")])
+                logger.info(f"Saved {saved} news articles for {ticker} ({len(stored_urls)} already stored)")
             
+            self._advance_watermarks(collected_data)
+            return prices_saved
+        
         except Exception as e:
             logger.error(f"Error saving data to database: {e}")
             return False
     
-    def collect_all_companies(self, tickers: List[str], days_back: int = 30) -> Dict[str, Any]:
-        """Collect data for all specified companies"""
-        results = {
-            "total_companies": len(tickers),
-            "successful": 0,
-            "failed": 0,
-            "errors": [],
-            "companies": {}
+    def save_prices(self, ticker: str, financial_metrics: List[Dict[str, Any]]) -> bool:
+        """
+        Store a ticker's daily price rows, then advance its price watermark
+        
+        The watermark moves only to the newest row actually written, so a
+        failed write is fetched again on the next run.
+        
+        Returns:
+            True if there was nothing to store or every row was stored
+        """
+        rows = [
+            {**row, "ticker": ticker, "date": _parse_timestamp(row.get("date"))}
+            for row in financial_metrics
+        ]
+        rows = [row for row in rows if row["date"]]
+        if not rows:
+            return True
+        try:
+            saved = self.db_manager.upsert_stock_prices_batch(rows)
+            self.db_manager.set_watermark(ticker, WATERMARK_YAHOO_PRICES, max(row["date"] for row in rows))
+            logger.info(f"Saved {saved} daily prices for {ticker}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving prices for {ticker}: {e}")
+            return False
+    
+    def _get_watermarks(self, ticker: str) -> Dict[str, Optional[datetime]]:
+        """Look up the ingestion watermark of every incremental source for a ticker"""
+        return {
+            source: self.db_manager.get_watermark(ticker, source)
+            for source in (WATERMARK_YAHOO_NEWS, WATERMARK_NEWS_API, WATERMARK_YAHOO_PRICES, WATERMARK_ALPHA_NEWS)
+        }
+    
+    def _advance_watermarks(self, collected_data: Dict[str, Any]):
+        """Move each news source's watermark up to the newest record just saved (prices: see save_prices)"""
+        ticker = collected_data["ticker"]
+        # Collapsed copies count too, or their source would refetch them next run
+        news = [
+            record for article in collected_data.get("news", [])
+            for record in [article] + article.get("duplicates", [])
+        ]
+        latest = {
+            WATERMARK_YAHOO_NEWS: _latest_timestamp([a for a in news if a.get("data_source") == "yahoo_finance"]),
+            WATERMARK_NEWS_API: _latest_timestamp([a for a in news if a.get("data_source") == "news_api"]),
+            WATERMARK_ALPHA_NEWS: _latest_timestamp([a for a in news if a.get("data_source") == "alpha_vantage"])
         }
+        for source, timestamp in latest.items():
+            if timestamp is not None:
+                self.db_manager.set_watermark(ticker, source, timestamp)
+    
+    async def collect_company_data_async(self, session: aiohttp.ClientSession, ticker: str,
+                                         days_back: int = 30,
+                                         semaphores: Optional[Dict[str, asyncio.Semaphore]] = None,
+                                         alpha_data_types: Optional[Set[str]] = None,
+                                         context: Optional[TickerContext] = None) -> Dict[str, Any]:
+        """
+        Collect all available data for a company, running providers concurrently
+        
+        Returns the same dictionary as collect_company_data. Yahoo Finance has no
+        async client, so its calls run in worker threads under their own limit.
+        """
+        alpha_data_types = set(ALPHA_DATA_TYPES) if alpha_data_types is None else alpha_data_types
+        context = context or self.yahoo_collector.ticker_context(ticker)
+        logger.info(f"Starting async data collection for {ticker}")
+        semaphores = semaphores or self._provider_semaphores()
+        watermarks = await asyncio.to_thread(self._get_watermarks, ticker)
+        
+        collected_data = self._empty_collected_data(ticker)
+        
+        async def yahoo(method, *args, **kwargs):
+            async with semaphores["yahoo_finance"]:
+                return await asyncio.to_thread(method, *args, **kwargs)
+        
+        async def news_api_news(company_info_task):
+            try:
+                company_info = await company_info_task
+            except Exception:
+                return []  # reported with the company_info stage
+            if company_info and company_info.get("name"):
+                return await self.news_collector.get_esg_news_async(
+                    session, company_info["name"], days_back, semaphores["news_api"],
+                    since=watermarks[WATERMARK_NEWS_API]
+                )
+            return []
+        
+        async def skipped():
+            return None
+        
+        try:
+            company_info_task = asyncio.ensure_future(yahoo(self.yahoo_collector.get_company_info, ticker, context=context))
+            stages = {
+                "company_info": company_info_task,
+                "esg_scores": yahoo(self.yahoo_collector.get_esg_scores, ticker, days_back, context=context),
+                "yahoo_news": yahoo(self.yahoo_collector.get_news, ticker, days_back,
+                                    since=watermarks[WATERMARK_YAHOO_NEWS], context=context),
+                "news_api_news": news_api_news(company_info_task),
+                "alpha_overview": self.alpha_collector.get_company_overview_async(session, ticker, semaphores["alpha_vantage"])
+                if "overview" in alpha_data_types else skipped(),
+                "alpha_sentiment": self.alpha_collector.get_sentiment_analysis_async(session, ticker, semaphores["alpha_vantage"])
+                if "news_sentiment" in alpha_data_types else skipped()
+            }
+            # Like the stage DAG, a failed stage is reported and yields None instead of
+            # discarding what the other providers returned
+            results = dict(zip(stages, await asyncio.gather(*stages.values(), return_exceptions=True)))
+            for stage, result in results.items():
+                if isinstance(result, Exception):
+                    logger.error(f"{ticker}: stage {stage} failed: {result}")
+                    collected_data["errors"].append(f"Error in {stage} stage for {ticker}: {result}")
+                    results[stage] = None
+            
+            company_info = results["company_info"]
+            alpha_overview = results["alpha_overview"]
+            alpha_sentiment = results["alpha_sentiment"]
+            if company_info:
+                collected_data["company_info"] = company_info
+            else:
+                collected_data["errors"].append("Failed to get company info from Yahoo Finance")
+            
+            collected_data["esg_scores"] = results["esg_scores"] or []
+            
+            news_data = (results["yahoo_news"] or []) + (results["news_api_news"] or [])
+            if news_data:
+                collected_data["news"] = await asyncio.to_thread(self.analyze_news, news_data)
+            
+            if alpha_overview:
+                if collected_data["company_info"]:
+                    collected_data["company_info"].update(alpha_overview)
+                else:
+                    collected_data["company_info"] = alpha_overview
+            
+            if alpha_sentiment:
+                collected_data["alpha_sentiment"] = alpha_sentiment
+            
+            logger.info(f"Async data collection completed for {ticker}")
+        
+        except Exception as e:
+            error_msg = f"Error collecting data for {ticker}: {e}"
+            logger.error(error_msg)
+            collected_data["errors"].append(error_msg)
+        
+        return collected_data
+    
+    async def collect_all_companies_async(self, tickers: List[str], days_back: int = 30) -> Dict[str, Any]:
+        """
+        Collect data for all specified companies concurrently
+        
+        Fans out across tickers and providers; the number of in-flight requests
+        per provider is bounded by self.provider_concurrency. Database writes are
+        serialized so SQLite never sees concurrent writers.
+        """
+        results = self._empty_results(tickers)
+        sentiment_cache_before = self.sentiment_analyzer.cache_stats()
+        self.warm_sentiment_model()
+        semaphores = self._provider_semaphores()
+        db_lock = asyncio.Lock()
+        
+        # One multi-symbol download covers the price history of the whole universe; the
+        # `info` it needs is kept in each ticker's context for the per-company stages
+        contexts = {ticker: self.yahoo_collector.ticker_context(ticker) for ticker in tickers}
+        price_watermarks = await asyncio.to_thread(self._price_watermarks, tickers)
+        financial_metrics = await asyncio.to_thread(
+            self.yahoo_collector.get_batch_financial_metrics, tickers, days_back,
+            since=price_watermarks, contexts=contexts
+        )
+        alpha_news = await asyncio.to_thread(self.collect_alpha_news, tickers, days_back)
+        alpha_plan = await asyncio.to_thread(self._alpha_batch_plan, tickers, alpha_news)
+        fmp_profiles = await asyncio.to_thread(self.collect_fmp_profiles, tickers)
+        
+        async def process(session: aiohttp.ClientSession, ticker: str):
+            try:
+                collected_data = await self.collect_company_data_async(
+                    session, ticker, days_back, semaphores, alpha_plan[ticker], contexts.pop(ticker)
+                )
+                collected_data["financial_metrics"] = financial_metrics.get(ticker, [])
+                self._merge_alpha_news(collected_data, alpha_news.pop(ticker, []))
+                self._merge_fmp_profile(collected_data, fmp_profiles.get(ticker))
+                async with db_lock:
+                    saved = await asyncio.to_thread(self.save_to_database, collected_data)
+                self._record_result(results, ticker, saved)
+            
+            except Exception as e:
+                results["failed"] += 1
+                results["companies"][ticker] = "error"
+                error_msg = f"Error processing {ticker}: {e}"
+                results["errors"].append(error_msg)
+                logger.error(error_msg)
+        
+        async with create_async_session() as session:
+            await asyncio.gather(*(process(session, ticker) for ticker in tickers))
+        
+        self.report_sentiment_cache(results, sentiment_cache_before)
+        logger.info(f"Data collection completed: {results['successful']} successful, {results['failed']} failed")
+        return results
+    
+    def _price_watermarks(self, tickers: List[str]) -> Dict[str, Optional[datetime]]:
+        """Price-history watermark per ticker for the batch download"""
+        return {ticker: self.db_manager.get_watermark(ticker, WATERMARK_YAHOO_PRICES) for ticker in tickers}
+    
+    def _alpha_plan(self, tickers: List[str], data_types: List[str] = ALPHA_DATA_TYPES,
+                    skip: Optional[Set[Tuple[str, str]]] = None) -> Dict[str, Set[str]]:
+        """Alpha Vantage data types to fetch per ticker, split from today's remaining quota"""
+        skip = skip or set()
+        plan = {ticker: set() for ticker in tickers}
+        for ticker, data_type in self.quota_planner.plan("alpha_vantage", tickers, data_types, skip=skip):
+            plan[ticker].add(data_type)
+        
+        planned = sum(len(planned_types) for planned_types in plan.values())
+        if planned < len(tickers) * len(data_types) - len(skip):
+            logger.info(f"Alpha Vantage: {planned} calls planned, the rest are fresh or over today's budget")
+        return plan
+    
+    def _alpha_batch_plan(self, tickers: List[str],
+                          alpha_news: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Set[str]]:
+        """
+        Alpha Vantage data types to fetch per ticker in a multi-company run
+        
+        News sentiment comes from the batched feed, which only reaches the
+        latest market-wide articles; tickers it returned nothing for still get
+        their own NEWS_SENTIMENT call, planned against today's quota.
+        """
+        covered = {(ticker, "news_sentiment") for ticker in tickers if alpha_news.get(ticker)}
+        return self._alpha_plan(tickers, ALPHA_DATA_TYPES, skip=covered)
+    
+    def _provider_semaphores(self) -> Dict[str, asyncio.Semaphore]:
+        """Create one semaphore per provider for the running event loop"""
+        return {
+            provider: asyncio.Semaphore(max(1, limit))
+            for provider, limit in self.provider_concurrency.items()
+        }
+    
+    def collect_all_companies(self, tickers: List[str], days_back: int = 30,
+                              use_async: bool = False) -> Dict[str, Any]:
+        """Collect data for all specified companies"""
+        if use_async:
+            return asyncio.run(self.collect_all_companies_async(tickers, days_back))
+        
+        results = self._empty_results(tickers)
+        sentiment_cache_before = self.sentiment_analyzer.cache_stats()
+        self.warm_sentiment_model()
+        
+        # One multi-symbol download covers the price history of the whole universe; the
+        # `info` it needs is kept in each ticker's context for the per-company stages
+        contexts = {ticker: self.yahoo_collector.ticker_context(ticker) for ticker in tickers}
+        financial_metrics = self.yahoo_collector.get_batch_financial_metrics(
+            tickers, days_back, since=self._price_watermarks(tickers), contexts=contexts
+        )
+        alpha_news = self.collect_alpha_news(tickers, days_back)
+        alpha_plan = self._alpha_batch_plan(tickers, alpha_news)
+        fmp_profiles = self.collect_fmp_profiles(tickers)
         
         for ticker in tickers:
             try:
                 logger.info(f"Processing {ticker} ({results['successful'] + results['failed'] + 1}/{len(tickers)})")
                 
                 # Collect data
-                collected_data = self.collect_company_data(ticker, days_back)
+                collected_data = self.collect_company_data(ticker, days_back, alpha_plan[ticker], contexts.pop(ticker))
+                collected_data["financial_metrics"] = financial_metrics.get(ticker, [])
+                self._merge_alpha_news(collected_data, alpha_news.pop(ticker, []))
+                self._merge_fmp_profile(collected_data, fmp_profiles.get(ticker))
                 
                 # Save to database
-                if self.save_to_database(collected_data):
-                    results["successful"] += 1
-                    results["companies"][ticker] = "success"
-                else:
-                    results["failed"] += 1
-                    results["companies"][ticker] = "failed"
-                    results["errors"].append(f"Failed to save data for {ticker}")
-                
+                self._record_result(results, ticker, self.save_to_database(collected_data))
+            
             except Exception as e:
                 results["failed"] += 1
                 results["companies"][ticker] = "error"
@@ -168,8 +588,201 @@ class DataOrchestrator:
                 results["errors"].append(error_msg)
                 logger.error(error_msg)
         
+        self.report_sentiment_cache(results, sentiment_cache_before)
         logger.info(f"Data collection completed: {results['successful']} successful, {results['failed']} failed")
         return results
+    
+    def warm_sentiment_model(self):
+        """Load the sentiment model in the background, so its start-up overlaps the first network fetches"""
+        if not self.sentiment_analyzer.loaded:
+            threading.Thread(target=self.sentiment_analyzer.warmup, name="sentiment-warmup", daemon=True).start()
+    
+    def report_sentiment_cache(self, results: Dict[str, Any], since: Optional[Dict[str, Any]]):
+        """Add the sentiment cache hit rate since an earlier cache_stats() snapshot to a run's results"""
+        stats = self.sentiment_analyzer.cache_stats(since)
+        if stats is None:
+            return
+        results["sentiment_cache"] = stats
+        logger.info(
+            f"Sentiment cache: {stats['hit_rate']:.0%} hit rate over {stats['lookups']} texts "
+            f"({stats['memory_hits']} in memory, {stats['disk_hits']} on disk, {stats['misses']} scored)"
+        )
+    
+    # Single-feed collection, used by the scheduler to refresh each feed on its own interval
+    
+    def collect_feed(self, feed: str, tickers: List[str], days_back: int = 30) -> Dict[str, Any]:
+        """
+        Collect and save one feed for the given companies
+        
+        Args:
+            feed: FEED_PRICES, FEED_NEWS, FEED_ESG or FEED_EARNINGS
+            tickers: Companies to refresh
+            days_back: Number of days of historical data
+        
+        Returns:
+            Results dictionary in the same shape as collect_all_companies
+        """
+        if feed == FEED_PRICES:
+            return self.collect_prices(tickers, days_back)
+        if feed == FEED_EARNINGS:
+            return self.collect_earnings_calendar(tickers)
+        if feed not in (FEED_NEWS, FEED_ESG):
+            raise ValueError(f"Unknown feed: {feed}")
+        
+        collect = self.collect_news if feed == FEED_NEWS else self.collect_esg
+        fmp_profiles = self.collect_fmp_profiles(tickers) if feed == FEED_ESG else {}
+        results = self._empty_results(tickers)
+        for ticker in tickers:
+            try:
+                collected_data = collect(ticker, days_back)
+                self._merge_fmp_profile(collected_data, fmp_profiles.get(ticker))
+                results["errors"].extend(collected_data["errors"])
+                self._record_result(results, ticker, self.save_to_database(collected_data))
+            except Exception as e:
+                results["failed"] += 1
+                results["companies"][ticker] = "error"
+                error_msg = f"Error processing {feed} for {ticker}: {e}"
+                results["errors"].append(error_msg)
+                logger.error(error_msg)
+        return results
+    
+    def collect_prices(self, tickers: List[str], days_back: int = 30) -> Dict[str, Any]:
+        """
+        Refresh price history for all tickers with one batched download
+        
+        Only prices are stored, so tickers without a company row (new to the
+        universe) succeed too.
+        """
+        results = self._empty_results(tickers)
+        financial_metrics = self.yahoo_collector.get_batch_financial_metrics(
+            tickers, days_back, since=self._price_watermarks(tickers)
+        )
+        
+        for ticker in tickers:
+            self._record_result(results, ticker, self.save_prices(ticker, financial_metrics.get(ticker, [])))
+        return results
+    
+    def collect_earnings_calendar(self, tickers: List[str]) -> Dict[str, Any]:
+        """Refresh the whole-market earnings calendar, which covers every ticker at once"""
+        results = self._empty_results(tickers)
+        refreshed = self.refresh_earnings_calendar()
+        for ticker in tickers:
+            self._record_result(results, ticker, refreshed)
+        return results
+    
+    def refresh_earnings_calendar(self, max_age: timedelta = EARNINGS_CALENDAR_MAX_AGE) -> bool:
+        """
+        Download the earnings calendar of the whole market unless today's is stored
+        
+        One Alpha Vantage call replaces the calendar table; afterwards
+        get_earnings_calendar answers per-ticker lookups without any API call.
+        
+        Returns:
+            True if the stored calendar is current
+        """
+        refreshed_at = self.db_manager.get_earnings_calendar_refreshed_at()
+        if refreshed_at is not None and datetime.utcnow() - refreshed_at < max_age:
+            logger.info(f"Earnings calendar is current (ingested {refreshed_at.isoformat()})")
+            return True
+        
+        reports = self.alpha_collector.stream_earnings_calendar()
+        if reports is None:
+            return False
+        try:
+            return self.db_manager.replace_earnings_calendar(reports) > 0
+        except Exception as e:
+            logger.error(f"Error saving earnings calendar: {e}")
+            return False
+    
+    def get_earnings_calendar(self, ticker: str) -> List[Dict[str, Any]]:
+        """Upcoming earnings reports for a ticker, read from the stored whole-market calendar"""
+        return self.db_manager.get_earnings_calendar(ticker)
+    
+    def collect_news(self, ticker: str, days_back: int = 30) -> Dict[str, Any]:
+        """Collect and score news published since the last run for one company"""
+        collected_data = self._empty_collected_data(ticker)
+        watermarks = self._get_watermarks(ticker)
+        context = self.yahoo_collector.ticker_context(ticker)
+        
+        try:
+            company = (self.db_manager.get_company_by_ticker(ticker)
+                       or self.yahoo_collector.get_company_info(ticker, context=context))
+            if not company:
+                collected_data["errors"].append("Failed to get company info from Yahoo Finance")
+                return collected_data
+            if not company.get("id"):
+                collected_data["company_info"] = company
+            
+            news_data = self.yahoo_collector.get_news(
+                ticker, days_back, since=watermarks[WATERMARK_YAHOO_NEWS], context=context
+            )
+            if company.get("name"):
+                news_data.extend(self.news_collector.get_esg_news(
+                    company["name"], days_back, since=watermarks[WATERMARK_NEWS_API]
+                ))
+            
+            if news_data:
+                collected_data["news"] = self.analyze_news(news_data)
+        
+        except Exception as e:
+            error_msg = f"Error collecting news for {ticker}: {e}"
+            logger.error(error_msg)
+            collected_data["errors"].append(error_msg)
+        
+        return collected_data
+    
+    def collect_esg(self, ticker: str, days_back: int = 30) -> Dict[str, Any]:
+        """Collect company profile and ESG scores for one company"""
+        collected_data = self._empty_collected_data(ticker)
+        context = self.yahoo_collector.ticker_context(ticker)
+        
+        try:
+            company_info = self.yahoo_collector.get_company_info(ticker, context=context)
+            alpha_overview = self.alpha_collector.get_company_overview(ticker)
+            if company_info and alpha_overview:
+                company_info.update(alpha_overview)
+            collected_data["company_info"] = company_info or alpha_overview
+            if not collected_data["company_info"]:
+                collected_data["errors"].append("Failed to get company info from Yahoo Finance")
+            
+            collected_data["esg_scores"] = self.yahoo_collector.get_esg_scores(ticker, days_back, context=context)
+        
+        except Exception as e:
+            error_msg = f"Error collecting ESG data for {ticker}: {e}"
+            logger.error(error_msg)
+            collected_data["errors"].append(error_msg)
+        
+        return collected_data
+    
+    def _empty_collected_data(self, ticker: str) -> Dict[str, Any]:
+        return {
+            "ticker": ticker,
+            "collection_date": datetime.now().isoformat(),
+            "company_info": None,
+            "esg_scores": [],
+            "news": [],
+            "financial_metrics": [],
+            "stage_timings": {},
+            "errors": []
+        }
+    
+    def _empty_results(self, tickers: List[str]) -> Dict[str, Any]:
+        return {
+            "total_companies": len(tickers),
+            "successful": 0,
+            "failed": 0,
+            "errors": [],
+            "companies": {}
+        }
+    
+    def _record_result(self, results: Dict[str, Any], ticker: str, saved: bool):
+        if saved:
+            results["successful"] += 1
+            results["companies"][ticker] = "success"
+        else:
+            results["failed"] += 1
+            results["companies"][ticker] = "failed"
+            results["errors"].append(f"Failed to save data for {ticker}")
 
 
 def main():
@@ -180,16 +793,13 @@ def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    # Sample companies to collect data for
-    sample_tickers = [
-        "AAPL", "MSFT", "GOOGL", "TSLA", "NVDA", "JPM", "JNJ", "PG", "V", "UNH"
-    ]
-    
     # Initialize orchestrator
     orchestrator = DataOrchestrator()
     
     # Collect data for all companies
-    results = orchestrator.collect_all_companies(sample_tickers, days_back=30)
+    use_async = settings.esg_async_collection
+    tickers = resolve_universe(default=SAMPLE_TICKERS)
+    results = orchestrator.collect_all_companies(tickers, days_back=30, use_async=use_async)
     
     # Print results
     print(f"\nData Collection Results:")
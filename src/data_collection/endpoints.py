@@ -0,0 +1,49 @@
+"""
+Provider Endpoints
+Base URLs for the HTTP data providers, overridable for offline benchmarking
+"""
+
+from typing import Optional, Tuple
+
+from src.config import Settings, settings
+
+# Providers with a <provider>_base_url setting
+PROVIDERS = ("alpha_vantage", "fmp", "news_api", "openweather", "epa")
+
+# Query parameters that carry credentials; they never reach cache keys or fixtures
+SECRET_PARAMS = {"apikey", "apiKey", "appid", "token"}
+
+
+def base_url_setting(provider: str) -> str:
+    """Name of the setting holding a provider's base URL, e.g. alpha_vantage_base_url"""
+    return f"{provider}_base_url"
+
+
+def get_base_url(provider: str) -> str:
+    """
+    Get the configured base URL for a provider
+    
+    Set e.g. ALPHA_VANTAGE_BASE_URL to point collectors and dashboards at the
+    local stub server without code changes.
+    """
+    return getattr(settings, base_url_setting(provider)).rstrip("/")
+
+
+def split_provider_url(url: str) -> Tuple[Optional[str], str]:
+    """
+    Split a request URL into (provider, path relative to the provider base URL)
+    
+    Both the configured and the public (default setting) base URLs are
+    recognised, so responses recorded against either map to the same
+    fixture. Returns (None, url) for URLs that belong to no known provider.
+    """
+    candidates = []
+    for provider in PROVIDERS:
+        candidates.append((get_base_url(provider), provider))
+        candidates.append((Settings.model_fields[base_url_setting(provider)].default.rstrip("/"), provider))
+    
+    # Longest prefix first, so e.g. a stub at http://host/fmp beats http://host
+    for base_url, provider in sorted(candidates, key=lambda item: len(item[0]), reverse=True):
+        if url == base_url or url.startswith(base_url + "/"):
+            return provider, url[len(base_url):] or "/"
+    return None, url
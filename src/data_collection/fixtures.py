@@ -0,0 +1,118 @@
+"""
+Provider Fixtures
+Record real provider responses to fixture files for offline replay
+"""
+
+import os
+import json
+import base64
+import hashlib
+import tempfile
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+from .endpoints import SECRET_PARAMS, split_provider_url
+
+logger = logging.getLogger(__name__)
+
+
+def fixture_request(url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], str, Dict[str, str]]:
+    """
+    Normalize a request into (provider, path, query) as stored in fixtures
+    
+    Credentials are dropped from the query, and the path is relative to the
+    provider base URL so fixtures recorded against the public APIs replay
+    under any stub server prefix.
+    """
+    parts = urlsplit(url)
+    query = {**dict(parse_qsl(parts.query)), **{k: str(v) for k, v in (params or {}).items()}}
+    query = {k: v for k, v in query.items() if k not in SECRET_PARAMS}
+    provider, path = split_provider_url(f"{parts.scheme}://{parts.netloc}{parts.path}")
+    return provider, path, query
+
+
+def fixture_name(provider: str, path: str, query: Dict[str, str]) -> str:
+    """Relative file name of the fixture for a normalized request"""
+    normalized = json.dumps([path, sorted(query.items())])
+    return os.path.join(provider, f"{hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:20]}.json")
+
+
+class FixtureRecorder:
+    """Writes provider responses to JSON fixture files, one per distinct request"""
+    
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = fixture_dir
+        self._lock = threading.Lock()
+        self.recorded = 0
+    
+    def record(self, url: str, params: Optional[Dict[str, Any]], status_code: int,
+               content: bytes, headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        Record one response
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            status_code: HTTP status of the response
+            content: Raw response body
+            headers: Response headers (only Content-Type is kept)
+        
+        Returns:
+            Path of the fixture file, or None if the URL belongs to no known provider
+        """
+        provider, path, query = fixture_request(url, params)
+        if provider is None:
+            return None
+        
+        fixture = {
+            "provider": provider,
+            "path": path,
+            "query": query,
+            "status": status_code,
+            "content_type": {k.lower(): v for k, v in (headers or {}).items()}.get("content-type", ""),
+            "recorded_at": datetime.now().isoformat()
+        }
+        try:
+            fixture["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            fixture["body"] = base64.b64encode(content).decode("ascii")
+            fixture["encoding"] = "base64"
+        
+        fixture_path = os.path.join(self.fixture_dir, fixture_name(provider, path, query))
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(fixture_path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(fixture_path))
+                with os.fdopen(fd, "w", encoding="utf-8") as fixture_file:
+                    json.dump(fixture, fixture_file, indent=2)
+                os.replace(tmp_path, fixture_path)
+                self.recorded += 1
+            return fixture_path
+        except OSError as e:
+            logger.warning(f"Could not record fixture for {url}: {e}")
+            return None
+
+
+def fixture_body(fixture: Dict[str, Any]) -> bytes:
+    """Raw response body stored in a fixture"""
+    if fixture.get("encoding") == "base64":
+        return base64.b64decode(fixture["body"])
+    return fixture["body"].encode("utf-8")
+
+
+def load_fixtures(fixture_dir: str) -> List[Dict[str, Any]]:
+    """Load every fixture file under a directory"""
+    fixtures = []
+    for root, _, files in os.walk(fixture_dir):
+        for name in sorted(files):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(root, name), encoding="utf-8") as fixture_file:
+                    fixtures.append(json.load(fixture_file))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable fixture {name}: {e}")
+    return fixtures
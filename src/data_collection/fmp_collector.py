@@ -0,0 +1,187 @@
+"""
+Financial Modeling Prep Collector
+Fetches company profiles and quotes for many symbols per request
+"""
+
+import os
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.config import settings
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .http_cache import HTTPCache, get_http_cache
+from .endpoints import get_base_url
+from .quota_planner import QuotaExceededError, QuotaPlanner, get_quota_planner
+
+logger = logging.getLogger(__name__)
+
+# Quota planner data type of each batched endpoint
+ENDPOINT_DATA_TYPES = {
+    "profile": "profile",
+    "quote": "prices"
+}
+
+
+class FMPCollector:
+    """
+    Collects company profiles and quotes from Financial Modeling Prep
+    
+    The profile and quote endpoints accept comma-separated symbol lists.
+    Symbols with a fresh single-symbol entry in the shared HTTP cache are
+    served from it; the rest are fetched batch_size at a time, and every
+    item of a batch answer is stored under its single-symbol URL. Later
+    single-symbol requests (the dashboard's profile lookups, for one) are
+    then cache hits that spend no quota.
+    
+    Args:
+        api_key: FMP API key (defaults to FMP_API_KEY)
+        rate_limiter: Token buckets the batch requests wait on
+        http_cache: Cache the batches are fetched through and fanned out to
+        base_url: FMP API root (defaults to FMP_BASE_URL)
+        quota_planner: Daily budget each batch request is charged to
+        circuit_breaker: Optional breaker the batch requests are made through
+        batch_size: Symbols per comma-separated request (defaults to settings.fmp_batch_size)
+    """
+    
+    def __init__(self, api_key: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None,
+                 http_cache: Optional[HTTPCache] = None, base_url: Optional[str] = None,
+                 quota_planner: Optional[QuotaPlanner] = None, circuit_breaker: Any = None,
+                 batch_size: Optional[int] = None):
+        self.api_key = api_key or os.getenv("FMP_API_KEY")
+        self.base_url = (base_url or get_base_url("fmp")).rstrip("/")
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.http_cache = http_cache or get_http_cache()
+        self.quota_planner = quota_planner or get_quota_planner()
+        self.circuit_breaker = circuit_breaker
+        self.batch_size = max(1, batch_size or settings.fmp_batch_size)
+    
+    def get_profiles(self, symbols: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get raw company profiles
+        
+        Args:
+            symbols: Ticker symbols
+        
+        Returns:
+            Profile per requested symbol; None where FMP has none or the request failed
+        """
+        return self._get_many("profile", symbols)
+    
+    def get_quotes(self, symbols: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get raw real-time quotes (price, change, changesPercentage, volume, ...)
+        
+        Args:
+            symbols: Ticker symbols
+        
+        Returns:
+            Quote per requested symbol; None where FMP has none or the request failed
+        """
+        return self._get_many("quote", symbols)
+    
+    def get_company_info_batch(self, tickers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Company info in our format for every ticker FMP has a profile for"""
+        return {
+            ticker: self._format_profile(ticker, profile)
+            for ticker, profile in self.get_profiles(tickers).items() if profile
+        }
+    
+    def symbol_url(self, endpoint: str, symbol: str) -> str:
+        """Single-symbol URL a batch item is cached under"""
+        return f"{self.base_url}/{endpoint}/{symbol}"
+    
+    def _get_many(self, endpoint: str, symbols: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        symbols = list(dict.fromkeys(symbol for symbol in symbols if symbol))
+        results: Dict[str, Optional[Dict[str, Any]]] = {symbol: None for symbol in symbols}
+        if not symbols:
+            return results
+        if not self.api_key:
+            logger.warning("No FMP API key provided")
+            return results
+        
+        missing = []
+        for symbol in symbols:
+            cached = self.http_cache.peek(self.symbol_url(endpoint, symbol))
+            if cached is None:
+                missing.append(symbol)
+            else:
+                results[symbol] = self._first_item(cached)
+        
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            items = self._fetch_batch(endpoint, chunk)
+            if items is None:
+                continue
+            
+            by_symbol = {str(item.get("symbol", "")).upper(): item for item in items if isinstance(item, dict)}
+            for symbol in chunk:
+                item = by_symbol.get(symbol.upper())
+                results[symbol] = item
+                # An empty list is what the single-symbol endpoint answers for unknown symbols
+                body = json.dumps([item] if item else []).encode("utf-8")
+                self.http_cache.put(self.symbol_url(endpoint, symbol), None, body)
+        
+        return results
+    
+    def _fetch_batch(self, endpoint: str, symbols: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """GET one comma-separated batch; None when it failed or was deferred"""
+        joined = ",".join(symbols)
+        url = self.symbol_url(endpoint, joined)
+        quota_hook = self.quota_planner.before_fetch("fmp", joined, ENDPOINT_DATA_TYPES[endpoint], self.rate_limiter)
+        try:
+            response = self._call(
+                self.http_cache.get, url, params={"apikey": self.api_key}, timeout=10, before_fetch=quota_hook
+            )
+        except QuotaExceededError as e:
+            logger.info(str(e))
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching FMP {endpoint} for {joined}: {e}")
+            return None
+        self.quota_planner.observe("fmp", quota_hook, response)
+        
+        if response.status_code != 200:
+            logger.warning(f"FMP {endpoint} request failed: {response.status_code}")
+            return None
+        try:
+            data = response.json()
+        except ValueError:
+            logger.warning(f"FMP {endpoint} response for {joined} is not JSON")
+            return None
+        if not isinstance(data, list):
+            # Errors come back as {"Error Message": ...}
+            logger.warning(f"FMP {endpoint} error for {joined}: {data}")
+            return None
+        return data
+    
+    def _call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        if self.circuit_breaker is None:
+            return func(*args, **kwargs)
+        return self.circuit_breaker.call(func, *args, **kwargs)
+    
+    def _first_item(self, response: Any) -> Optional[Dict[str, Any]]:
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            return data[0]
+        return None
+    
+    def _format_profile(self, ticker: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a profile into our company format"""
+        employees = str(profile.get("fullTimeEmployees") or "")
+        return {
+            "ticker": ticker,
+            "name": profile.get("companyName") or ticker,
+            "sector": profile.get("sector") or "Unknown",
+            "industry": profile.get("industry") or "Unknown",
+            "market_cap": profile.get("mktCap") or 0,
+            "country": profile.get("country") or "Unknown",
+            "website": profile.get("website") or "",
+            "employees": int(employees) if employees.isdigit() else 0,
+            "description": profile.get("description") or "",
+            "data_source": "fmp"
+        }
+
@@ -0,0 +1,242 @@
+"""
+Hedged Requests
+Races fallback sources: the next source starts once the current one is slower than its usual p95
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Samples needed before a source's own latency drives its hedge delay and ranking
+MIN_SAMPLES = 5
+
+
+def _has_data(value: Any) -> bool:
+    """Default validity check: not None and not an empty frame or collection"""
+    if value is None:
+        return False
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return not empty
+    try:
+        return len(value) > 0
+    except TypeError:
+        return True
+
+
+class _SourceStats:
+    """Rolling outcome of one source in one chain"""
+    
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)  # seconds to a valid result
+        self.attempts = 0
+        self.valid = 0
+        self.wins = 0
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Hedger:
+    """
+    Runs fallback chains as hedged races
+    
+    The first source starts at once. If it has not returned a valid result
+    within its p95 latency (or default_delay until enough samples exist), the
+    next source starts alongside it, and so on. A source that fails or
+    returns nothing hands over to the next one immediately. The first valid
+    result wins; sources not yet started are cancelled and results still in
+    flight are discarded (their outcome still feeds the stats and the
+    provider's circuit breaker).
+    
+    Args:
+        enabled: False runs chains strictly in sequence
+        default_delay: Hedge delay in seconds for sources without enough samples
+        min_delay: Lower bound for the hedge delay
+        max_delay: Upper bound for the hedge delay
+        window: Latency samples kept per source
+        log_every: Log a stats summary every this many races of a chain
+    """
+    
+    def __init__(self, enabled: bool = True, default_delay: float = 2.0, min_delay: float = 0.25,
+                 max_delay: float = 10.0, window: int = 100, log_every: int = 50):
+        self.enabled = enabled
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.log_every = log_every
+        self._stats: Dict[str, Dict[str, _SourceStats]] = {}
+        self._races: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def _source_stats(self, chain: str, source: str) -> _SourceStats:
+        # Caller holds self._lock
+        sources = self._stats.setdefault(chain, {})
+        if source not in sources:
+            sources[source] = _SourceStats(self.window)
+        return sources[source]
+    
+    def hedge_delay(self, chain: str, source: str) -> float:
+        """Seconds to give a source before starting the next one"""
+        with self._lock:
+            stats = self._source_stats(chain, source)
+            p95 = stats.percentile(0.95) if len(stats.latencies) >= MIN_SAMPLES else None
+        delay = p95 if p95 is not None else self.default_delay
+        return min(self.max_delay, max(self.min_delay, delay))
+    
+    def rank(self, chain: str, sources: List[str]) -> List[str]:
+        """
+        Order sources by expected time to a valid result
+        
+        The expected time is the source's median latency divided by its
+        valid-result rate. The given order is kept until every source has
+        been tried enough times.
+        """
+        with self._lock:
+            stats = [self._source_stats(chain, source) for source in sources]
+            if any(source_stats.attempts < MIN_SAMPLES for source_stats in stats):
+                return list(sources)
+            expected = {
+                source: source_stats.percentile(0.5) / (source_stats.valid / source_stats.attempts)
+                if source_stats.valid else float("inf")
+                for source, source_stats in zip(sources, stats)
+            }
+        return sorted(sources, key=lambda source: expected[source])
+    
+    def race(self, chain: str, sources: Dict[str, Callable[[], Any]],
+             is_valid: Callable[[Any], bool] = _has_data) -> Optional[Tuple[str, Any]]:
+        """
+        Run a fallback chain and return the first valid result
+        
+        Args:
+            chain: Name the stats are kept under (e.g. "stock_data")
+            sources: Zero-argument callables by source name, in fallback order
+            is_valid: Whether a result is usable
+        
+        Returns:
+            (source, result) of the winner, or None if no source produced a valid result
+        """
+        order = self.rank(chain, list(sources))
+        if not order:
+            return None
+        
+        executor = ThreadPoolExecutor(max_workers=len(order), thread_name_prefix=f"hedge-{chain}")
+        pending: Dict[Future, str] = {}
+        started = 0
+        last_start = 0.0
+        
+        def launch():
+            nonlocal started, last_start
+            source = order[started]
+            started += 1
+            last_start = time.monotonic()
+            future = executor.submit(sources[source])
+            future.add_done_callback(lambda done, source=source, start=last_start: self._observe(
+                chain, source, done, time.monotonic() - start, is_valid
+            ))
+            pending[future] = source
+        
+        try:
+            launch()
+            while pending:
+                timeout = None
+                if self.enabled and started < len(order):
+                    delay = self.hedge_delay(chain, order[started - 1])
+                    timeout = max(0.0, last_start + delay - time.monotonic())
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.debug(f"{chain}: {order[started - 1]} is slow, hedging with {order[started]}")
+                    launch()
+                    continue
+                for future in done:
+                    source = pending.pop(future)
+                    if future.exception() is None and is_valid(future.result()):
+                        self._record_win(chain, source)
+                        return source, future.result()
+                if started < len(order):
+                    # A failed source hands over straight away
+                    launch()
+            self._record_win(chain, None)
+            return None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _observe(self, chain: str, source: str, future: Future, latency: float, is_valid: Callable[[Any], bool]):
+        if future.cancelled():
+            return
+        try:
+            valid = future.exception() is None and is_valid(future.result())
+        except Exception:
+            valid = False
+        with self._lock:
+            stats = self._source_stats(chain, source)
+            stats.attempts += 1
+            if valid:
+                stats.valid += 1
+                stats.latencies.append(latency)
+    
+    def _record_win(self, chain: str, source: Optional[str]):
+        with self._lock:
+            if source is not None:
+                self._source_stats(chain, source).wins += 1
+            self._races[chain] = self._races.get(chain, 0) + 1
+            races = self._races[chain]
+        if source is None:
+            logger.debug(f"{chain}: no source returned data")
+        if races % self.log_every == 0:
+            summary = ", ".join(
+                f"{row['source']} won {row['wins']}, valid {row['valid']}/{row['attempts']}, "
+                f"p50 {row['p50_latency'] or 0:.2f}s, p95 {row['p95_latency'] or 0:.2f}s"
+                for row in self.snapshot(chain)
+            )
+            logger.info(f"{chain} after {races} races: {summary}")
+    
+    def snapshot(self, chain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Win and latency stats per source, for one chain or all of them"""
+        with self._lock:
+            rows = []
+            for chain_name, sources in self._stats.items():
+                if chain is not None and chain_name != chain:
+                    continue
+                for source, stats in sources.items():
+                    rows.append({
+                        "chain": chain_name,
+                        "source": source,
+                        "races": self._races.get(chain_name, 0),
+                        "wins": stats.wins,
+                        "attempts": stats.attempts,
+                        "valid": stats.valid,
+                        "p50_latency": stats.percentile(0.5),
+                        "p95_latency": stats.percentile(0.95)
+                    })
+            return rows
+
+
+# Global hedger instance
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Get the global hedger, configured by the hedged_requests and hedge_* settings."""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger(
+                enabled=settings.hedged_requests,
+                default_delay=settings.hedge_default_delay,
+                min_delay=settings.hedge_min_delay,
+                max_delay=settings.hedge_max_delay
+            )
+        return _hedger
@@ -0,0 +1,380 @@
+"""
+HTTP Response Cache
+Persistent, content-addressed disk cache for provider API responses
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import inspect
+import tempfile
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from src.config import settings
+from .endpoints import SECRET_PARAMS, split_provider_url
+from .fixtures import FixtureRecorder
+from .http_client import get_http_session, json_loads
+
+logger = logging.getLogger(__name__)
+
+# Time to live in seconds for each endpoint class
+ENDPOINT_TTLS: Dict[str, int] = {
+    "prices": 5 * 60,
+    "weather": 10 * 60,
+    "news": 60 * 60,
+    "fundamentals": 24 * 60 * 60,
+    "calendar": 20 * 60 * 60,
+    "reference": 7 * 24 * 60 * 60,
+    "default": 15 * 60
+}
+
+# Alpha Vantage answers throttled calls with HTTP 200 and one of these keys
+_THROTTLE_MARKERS = (b'"Note"', b'"Information"')
+
+
+def classify_endpoint(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Map a provider URL to the endpoint class that decides its TTL"""
+    parts = urlsplit(url)
+    query = {**dict(parse_qsl(parts.query)), **(params or {})}
+    provider, path = split_provider_url(f"{parts.scheme}://{parts.netloc}{parts.path}")
+    path = path.lower()
+    
+    if provider == "alpha_vantage":
+        function = str(query.get("function", "")).upper()
+        if function.startswith("TIME_SERIES") or function == "GLOBAL_QUOTE":
+            return "prices"
+        if function == "NEWS_SENTIMENT":
+            return "news"
+        if function == "EARNINGS_CALENDAR":
+            # The whole-market calendar is re-downloaded daily; single symbols change rarely
+            return "reference" if query.get("symbol") else "calendar"
+        return "fundamentals"
+    if provider == "fmp":
+        if "/profile" in path:
+            return "fundamentals"
+        return "prices"
+    if provider == "news_api" or "finnhub" in parts.netloc.lower():
+        return "news"
+    if provider == "openweather":
+        return "weather"
+    if provider == "epa":
+        return "reference"
+    return "default"
+
+
+def cache_key(method: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key for a request, ignoring parameter order and credentials"""
+    parts = urlsplit(url)
+    query = {**dict(parse_qsl(parts.query)), **{k: str(v) for k, v in (params or {}).items()}}
+    query = sorted((k, v) for k, v in query.items() if k not in SECRET_PARAMS)
+    normalized = f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}?{urlencode(query)}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    """Minimal requests.Response look-alike served from (or stored to) the cache"""
+    
+    def __init__(self, url: str, status_code: int, content: bytes,
+                 headers: Optional[Dict[str, str]] = None, from_cache: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+    
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+    
+    def json(self) -> Any:
+        return json_loads(self.content)
+
+
+class HTTPCache:
+    """
+    Disk-backed HTTP cache shared by collectors and dashboards
+    
+    Response bodies are zlib-compressed and stored once per content hash; a
+    SQLite index maps request keys to bodies with their expiry, validators
+    (ETag / Last-Modified) and last access time. Expired entries are
+    revalidated with conditional requests, and the least recently used
+    entries are evicted once the store grows past max_bytes.
+    
+    With a recorder attached, every successful response served (from disk or
+    the network) is also written out as a replayable fixture.
+    """
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024,
+                 ttls: Optional[Dict[str, int]] = None,
+                 recorder: Optional[FixtureRecorder] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = {**ENDPOINT_TTLS, **(ttls or {})}
+        self.recorder = recorder
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        
+        os.makedirs(os.path.join(self.cache_dir, "bodies"), exist_ok=True)
+        self._init_index()
+    
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+            endpoint_class: Optional[str] = None, session: Any = None,
+            before_fetch: Optional[Callable[[], Any]] = None) -> CachedResponse:
+        """
+        GET a URL through the cache
+        
+        Args:
+            url: Request URL
+            params: Query parameters
+            headers: Extra request headers
+            timeout: Request timeout in seconds; defaults to REQUEST_TIMEOUT
+            endpoint_class: TTL class; derived from the URL when omitted
+            session: Object with a requests-style get(); defaults to the shared pooled session
+            before_fetch: Called right before any network request (e.g. rate limiting)
+        
+        Returns:
+            CachedResponse with status_code, headers, text and json()
+        """
+        key = cache_key("GET", url, params)
+        entry = self._lookup(key)
+        if entry and entry["expires_at"] > time.time():
+            cached = self._load(entry)
+            if cached is not None:
+                self.hits += 1
+                return self._record(url, params, cached)
+        
+        self.misses += 1
+        request_headers = {**(headers or {}), **self._validators(entry)}
+        if before_fetch:
+            before_fetch()
+        response = (session or get_http_session()).get(url, params=params, headers=request_headers, timeout=timeout)
+        
+        return self._record(url, params, self._handle_response(
+            key, url, params, entry, endpoint_class,
+            response.status_code, response.content, dict(response.headers)
+        ))
+    
+    async def get_async(self, session: Any, url: str, params: Optional[Dict[str, Any]] = None,
+                        headers: Optional[Dict[str, str]] = None,
+                        endpoint_class: Optional[str] = None,
+                        before_fetch: Optional[Callable[[], Any]] = None) -> CachedResponse:
+        """Async variant of get for an aiohttp.ClientSession"""
+        key = cache_key("GET", url, params)
+        entry = self._lookup(key)
+        if entry and entry["expires_at"] > time.time():
+            cached = self._load(entry)
+            if cached is not None:
+                self.hits += 1
+                return self._record(url, params, cached)
+        
+        self.misses += 1
+        request_headers = {**(headers or {}), **self._validators(entry)}
+        if before_fetch:
+            result = before_fetch()
+            if inspect.isawaitable(result):
+                await result
+        async with session.get(url, params=params, headers=request_headers) as response:
+            content = await response.read()
+            return self._record(url, params, self._handle_response(
+                key, url, params, entry, endpoint_class,
+                response.status, content, dict(response.headers)
+            ))
+    
+    def peek(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[CachedResponse]:
+        """Return the fresh cached response for a URL, or None; never touches the network"""
+        entry = self._lookup(cache_key("GET", url, params))
+        if entry and entry["expires_at"] > time.time():
+            cached = self._load(entry)
+            if cached is not None:
+                self.hits += 1
+                return self._record(url, params, cached)
+        return None
+    
+    def put(self, url: str, params: Optional[Dict[str, Any]], content: bytes,
+            headers: Optional[Dict[str, str]] = None, endpoint_class: Optional[str] = None):
+        """Store a body as if it had been fetched from url (used to fan out batched responses)"""
+        self._store(cache_key("GET", url, params), url, params, endpoint_class, 200, content, headers or {})
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and current store size"""
+        row = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": row[0], "bytes": row[1]}
+    
+    def _handle_response(self, key: str, url: str, params: Optional[Dict[str, Any]],
+                         entry: Optional[Dict[str, Any]], endpoint_class: Optional[str],
+                         status_code: int, content: bytes, headers: Dict[str, str]) -> CachedResponse:
+        if status_code == 304 and entry:
+            cached = self._load(entry)
+            if cached is not None:
+                self._refresh(key, url, params, endpoint_class)
+                return cached
+        
+        if status_code == 200 and not self._is_throttled(content):
+            self._store(key, url, params, endpoint_class, status_code, content, headers)
+        
+        return CachedResponse(url, status_code, content, headers)
+    
+    def _record(self, url: str, params: Optional[Dict[str, Any]], response: CachedResponse) -> CachedResponse:
+        """Write a successful response out as a fixture when recording is enabled"""
+        if self.recorder and response.status_code == 200 and not self._is_throttled(response.content):
+            self.recorder.record(url, params, response.status_code, response.content, response.headers)
+        return response
+    
+    def _is_throttled(self, content: bytes) -> bool:
+        head = content.lstrip()[:200]
+        return head.startswith(b"{") and any(marker in head for marker in _THROTTLE_MARKERS)
+    
+    def _ttl(self, url: str, params: Optional[Dict[str, Any]], endpoint_class: Optional[str]) -> int:
+        endpoint_class = endpoint_class or classify_endpoint(url, params)
+        return self.ttls.get(endpoint_class, self.ttls["default"])
+    
+    def _validators(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale entry"""
+        if not entry:
+            return {}
+        validators = {}
+        if entry["etag"]:
+            validators["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            validators["If-Modified-Since"] = entry["last_modified"]
+        return validators
+    
+    # Storage
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One SQLite connection per thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(os.path.join(self.cache_dir, "index.db"), timeout=30)
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+    
+    def _init_index(self):
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    endpoint_class TEXT,
+                    status INTEGER NOT NULL,
+                    headers TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body_hash TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_body_hash ON entries(body_hash)")
+    
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.cache_dir, "bodies", body_hash[:2], f"{body_hash}.zz")
+    
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM entries WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+    
+    def _load(self, entry: Dict[str, Any]) -> Optional[CachedResponse]:
+        try:
+            with open(self._body_path(entry["body_hash"]), "rb") as body_file:
+                content = zlib.decompress(body_file.read())
+        except (OSError, zlib.error):
+            return None
+        
+        with self._connection() as connection:
+            connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), entry["key"]))
+        return CachedResponse(entry["url"], entry["status"], content, json.loads(entry["headers"] or "{}"), True)
+    
+    def _refresh(self, key: str, url: str, params: Optional[Dict[str, Any]], endpoint_class: Optional[str]):
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                "UPDATE entries SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + self._ttl(url, params, endpoint_class), now, key)
+            )
+    
+    def _store(self, key: str, url: str, params: Optional[Dict[str, Any]], endpoint_class: Optional[str],
+               status_code: int, content: bytes, headers: Dict[str, str]):
+        body_hash = hashlib.sha256(content).hexdigest()
+        path = self._body_path(body_hash)
+        compressed = zlib.compress(content, 6)
+        
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, "wb") as body_file:
+                    body_file.write(compressed)
+                os.replace(tmp_path, path)
+            
+            lower_headers = {k.lower(): v for k, v in headers.items()}
+            now = time.time()
+            with self._connection() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, url, endpoint_class, status, headers, etag, last_modified,"
+                    " body_hash, size, stored_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, endpoint_class or classify_endpoint(url, params), status_code,
+                     json.dumps({"content-type": lower_headers.get("content-type", "")}),
+                     lower_headers.get("etag"), lower_headers.get("last-modified"),
+                     body_hash, len(compressed), now, now + self._ttl(url, params, endpoint_class), now)
+                )
+            self._evict()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not cache response for {url}: {e}")
+    
+    def _evict(self):
+        """Drop least recently used entries until the store is under 90% of max_bytes"""
+        connection = self._connection()
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        target = int(self.max_bytes * 0.9)
+        rows = connection.execute("SELECT key, body_hash, size FROM entries ORDER BY last_access").fetchall()
+        with connection:
+            for row in rows:
+                if total <= target:
+                    break
+                connection.execute("DELETE FROM entries WHERE key = ?", (row["key"],))
+                total -= row["size"]
+                still_used = connection.execute(
+                    "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (row["body_hash"],)
+                ).fetchone()
+                if not still_used:
+                    try:
+                        os.remove(self._body_path(row["body_hash"]))
+                    except OSError:
+                        pass
+
+
+# Global HTTP cache instance
+_http_cache: Optional[HTTPCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Get the process-wide HTTP cache backed by the shared cache directory."""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            recorder = FixtureRecorder(settings.http_record_dir) if settings.http_record_dir else None
+            _http_cache = HTTPCache(
+                settings.http_cache_dir, max_bytes=settings.http_cache_max_mb * 1024 * 1024, recorder=recorder
+            )
+        return _http_cache
@@ -0,0 +1,114 @@
+"""
+HTTP Client
+Shared keep-alive HTTP sessions with per-host connection pools for collectors and dashboards
+"""
+
+import json
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "ESG-Data-Tracker/1.0 (Educational Project)",
+    "Accept-Encoding": "gzip, deflate"
+}
+
+
+@dataclass(frozen=True)
+class HTTPClientConfig:
+    """Settings shared by the sync and async clients (see get_http_config)."""
+    timeout: float  # seconds, applied when a call does not pass its own
+    pool_connections: int  # hosts with a pool of their own
+    pool_maxsize: int  # keep-alive connections per host
+    headers: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_HEADERS))
+
+
+def json_loads(content: Any) -> Any:
+    """Decode a JSON body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session with per-host keep-alive pools and a default timeout
+    
+    One instance is shared by every thread: urllib3's connection pools are
+    thread-safe, and none of the providers rely on cookies.
+    """
+    
+    def __init__(self, config: HTTPClientConfig):
+        super().__init__()
+        self.config = config
+        self.headers.update(config.headers)
+        adapter = HTTPAdapter(pool_connections=config.pool_connections, pool_maxsize=config.pool_maxsize)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+    
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.config.timeout
+        return super().request(method, url, **kwargs)
+
+
+def create_async_session(**session_options) -> aiohttp.ClientSession:
+    """
+    Create an aiohttp session configured like the shared sync session
+    
+    Same headers, timeout and per-host connection limit; a `timeout=` or
+    `headers=` passed in replaces the shared one. Use it as an async
+    context manager so its connections are closed at the end.
+    """
+    config = get_http_config()
+    connector = aiohttp.TCPConnector(
+        limit=config.pool_connections * config.pool_maxsize,
+        limit_per_host=config.pool_maxsize,
+        ttl_dns_cache=300
+    )
+    session_options.setdefault("timeout", aiohttp.ClientTimeout(total=config.timeout))
+    session_options.setdefault("headers", config.headers)
+    return aiohttp.ClientSession(connector=connector, **session_options)
+
+
+# Global HTTP client configuration and session
+_http_config: Optional[HTTPClientConfig] = None
+_http_session: Optional[PooledSession] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_config() -> HTTPClientConfig:
+    """Get the HTTP client settings (settings.request_timeout, http_pool_connections, http_pool_maxsize)."""
+    global _http_config
+    with _http_client_lock:
+        if _http_config is None:
+            _http_config = HTTPClientConfig(
+                timeout=float(settings.request_timeout),
+                pool_connections=settings.http_pool_connections,
+                pool_maxsize=settings.http_pool_maxsize
+            )
+        return _http_config
+
+
+def get_http_session() -> PooledSession:
+    """Get the process-wide pooled HTTP session."""
+    global _http_session
+    config = get_http_config()
+    with _http_client_lock:
+        if _http_session is None:
+            _http_session = PooledSession(config)
+        return _http_session
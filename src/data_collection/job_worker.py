@@ -0,0 +1,204 @@
+"""
+Collection Job Worker
+Shards a large ticker universe into leased database jobs that any number of workers can process
+
+Each (feed, ticker) pair is one row in the collection_jobs table. Workers
+lease a small batch of due jobs, collect them and mark them done, or failed
+with an exponential retry delay. A lease that is not renewed expires, so
+jobs held by a crashed worker or machine are picked up again by the others.
+Workers share nothing but the database, so adding workers adds throughput.
+
+Usage:
+    python -m src.data_collection.job_worker enqueue --universe tickers.csv --feeds prices news esg
+    python -m src.data_collection.job_worker work --batch-size 10
+    python -m src.data_collection.job_worker status
+"""
+
+import os
+import socket
+import signal
+import argparse
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .data_orchestrator import DataOrchestrator, FEED_ESG, FEED_NEWS, FEED_PRICES, SAMPLE_TICKERS
+from .universe import resolve_universe
+from ..database import get_db_manager
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+ALL_FEEDS = [FEED_PRICES, FEED_NEWS, FEED_ESG]
+
+
+def default_worker_id() -> str:
+    """Identify this worker process across machines"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_universe(tickers: List[str], feeds: Optional[List[str]] = None, days_back: int = 30) -> int:
+    """
+    Split a ticker universe into one collection job per feed and ticker
+    
+    Jobs that already exist are reset to pending (unless currently leased),
+    so re-running this schedules the next collection round.
+    
+    Returns:
+        Number of jobs enqueued
+    """
+    feeds = feeds or ALL_FEEDS
+    count = get_db_manager().enqueue_collection_jobs(tickers, feeds, days_back)
+    logger.info(f"Enqueued {count} jobs for {len(tickers)} tickers ({', '.join(feeds)})")
+    return count
+
+
+class JobWorker:
+    """
+    Leases collection jobs from the database and runs them
+    
+    Args:
+        orchestrator: Runs the collection; built on first use if omitted
+        worker_id: Name recorded on leased jobs
+        batch_size: Jobs leased at a time (one feed's tickers are collected together)
+        lease_seconds: Lease length; renewed in the background while a batch runs
+        max_attempts: Attempts before a job is marked failed
+        retry_delay: Seconds before the first retry, doubling on each attempt
+        poll_interval: Seconds to wait when no job is due
+    """
+    
+    def __init__(self, orchestrator: Optional[DataOrchestrator] = None, worker_id: Optional[str] = None,
+                 batch_size: Optional[int] = None, lease_seconds: Optional[int] = None,
+                 max_attempts: Optional[int] = None, retry_delay: Optional[int] = None,
+                 poll_interval: float = 5.0):
+        self._orchestrator = orchestrator
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size or settings.job_batch_size
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.max_attempts = max_attempts or settings.job_max_attempts
+        self.retry_delay = retry_delay or settings.job_retry_delay_seconds
+        self.poll_interval = poll_interval
+        self.db_manager = get_db_manager()
+        self.stats = {"batches": 0, "done": 0, "failed": 0}
+        self._stop = threading.Event()
+    
+    @property
+    def orchestrator(self) -> DataOrchestrator:
+        if self._orchestrator is None:
+            self._orchestrator = DataOrchestrator()
+        return self._orchestrator
+    
+    def run(self, drain: bool = False):
+        """
+        Process jobs until stop() is called
+        
+        Args:
+            drain: Return as soon as no job is due instead of polling
+        """
+        logger.info(f"Worker {self.worker_id} starting (batch size {self.batch_size})")
+        while not self._stop.is_set():
+            jobs = self.db_manager.lease_collection_jobs(
+                self.worker_id, self.batch_size, self.lease_seconds, self.max_attempts
+            )
+            if not jobs:
+                if drain:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+            self.process_batch(jobs)
+        logger.info(f"Worker {self.worker_id} stopped: {self.stats}")
+    
+    def stop(self):
+        """Ask the run loop to exit after the current batch"""
+        self._stop.set()
+    
+    def process_batch(self, jobs: List[Dict[str, Any]]):
+        """Collect a leased batch, renewing its lease until every job is settled"""
+        self.stats["batches"] += 1
+        lease_tokens = {job["lease_token"] for job in jobs}
+        finished = threading.Event()
+        
+        def renew_leases():
+            while not finished.wait(self.lease_seconds / 3):
+                for lease_token in lease_tokens:
+                    self.db_manager.renew_collection_job_leases(lease_token, self.lease_seconds)
+        
+        heartbeat = threading.Thread(target=renew_leases, daemon=True)
+        heartbeat.start()
+        try:
+            for (feed, days_back), group in self._group_jobs(jobs).items():
+                self._run_group(feed, days_back, group)
+        finally:
+            finished.set()
+            heartbeat.join()
+    
+    def _run_group(self, feed: str, days_back: int, jobs: List[Dict[str, Any]]):
+        tickers = [job["ticker"] for job in jobs]
+        try:
+            results = self.orchestrator.collect_feed(feed, tickers, days_back)
+        except Exception as e:
+            logger.error(f"{feed} for {','.join(tickers)} crashed: {e}")
+            for job in jobs:
+                self._fail(job, str(e))
+            return
+        
+        for job in jobs:
+            ticker = job["ticker"]
+            if results["companies"].get(ticker) == "success":
+                self.db_manager.complete_collection_job(job)
+                self.stats["done"] += 1
+            else:
+                errors = [error for error in results["errors"] if error.endswith(f" {ticker}") or f" {ticker}:" in error]
+                self._fail(job, "; ".join(errors) or f"{feed} collection failed for {ticker}")
+    
+    def _fail(self, job: Dict[str, Any], error: str):
+        self.db_manager.fail_collection_job(job, error, self.max_attempts, self.retry_delay)
+        self.stats["failed"] += 1
+    
+    def _group_jobs(self, jobs: List[Dict[str, Any]]) -> Dict[Tuple[str, int], List[Dict[str, Any]]]:
+        groups: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        for job in jobs:
+            groups.setdefault((job["feed"], job["days_back"] or 30), []).append(job)
+        return groups
+
+
+def main():
+    """Enqueue a universe, run a worker or show queue status from the command line"""
+    parser = argparse.ArgumentParser(description="Distributed collection over a leased job queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    enqueue = commands.add_parser("enqueue", help="Split a ticker universe into jobs")
+    enqueue.add_argument("--universe", default=None, help="Ticker file (.txt or .csv); default ESG_UNIVERSE_FILE")
+    enqueue.add_argument("--tickers", nargs="+", default=None, help="Explicit tickers instead of a file")
+    enqueue.add_argument("--feeds", nargs="+", default=ALL_FEEDS, choices=ALL_FEEDS)
+    enqueue.add_argument("--days-back", type=int, default=30)
+    
+    work = commands.add_parser("work", help="Lease and run jobs")
+    work.add_argument("--batch-size", type=int, default=None, help="Jobs leased at a time")
+    work.add_argument("--drain", action="store_true", help="Exit once no job is due")
+    
+    commands.add_parser("status", help="Show job counts per state")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    if args.command == "enqueue":
+        tickers = resolve_universe(args.tickers, args.universe, default=SAMPLE_TICKERS)
+        enqueue_universe(tickers, args.feeds, args.days_back)
+    elif args.command == "work":
+        worker = JobWorker(batch_size=args.batch_size)
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        try:
+            worker.run(drain=args.drain)
+        except KeyboardInterrupt:
+            worker.stop()
+    else:
+        for status, count in sorted(get_db_manager().get_collection_job_counts().items()):
+            print(f"{status}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,104 @@ News API Collector
 Collects ESG-related news from various news APIs
 """
 
-import requests
+import asyncio
+import re
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
 
+import aiohttp
+
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .http_cache import HTTPCache, get_http_cache
+from .endpoints import get_base_url
+
 logger = logging.getLogger(__name__)
 
+# ESG-related keywords
+ESG_KEYWORDS = [
+    "ESG", "environmental", "sustainability", "carbon", "renewable",
+    "social responsibility", "governance", "diversity", "inclusion",
+    "climate change", "green energy", "corporate responsibility"
+]
+
+# NewsAPI rejects `q` values longer than 500 characters
+MAX_QUERY_LENGTH = 500
+
+# Largest page size /everything accepts
+PAGE_SIZE = 100
+
+
+def _quote_term(term: str) -> str:
+    """Quote multi-word terms so NewsAPI matches them as phrases"""
+    return f'"{term}"' if " " in term else term
+
+
+def plan_queries(company_name: str, keywords: List[str],
+                 max_length: int = MAX_QUERY_LENGTH) -> List[List[str]]:
+    """
+    Pack keywords into as few OR-combined queries as the length limit allows
+    
+    Each query has the form `"<company>" AND (kw1 OR kw2 OR ...)`.
+    
+    Args:
+        company_name: Company name every query is anchored on
+        keywords: Keywords to cover
+        max_length: Maximum length of a single `q` value
+    
+    Returns:
+        List of keyword groups, one per query, covering every keyword in order
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    
+    for keyword in keywords:
+        if len(build_query(company_name, [keyword])) > max_length:
+            # Checked before packing, so an oversized keyword never splits the current group
+            logger.warning(f"Keyword '{keyword}' does not fit in a NewsAPI query, skipping")
+            continue
+        if current and len(build_query(company_name, current + [keyword])) > max_length:
+            groups.append(current)
+            current = []
+        current.append(keyword)
+    
+    if current:
+        groups.append(current)
+    return groups
+
+
+def build_query(company_name: str, keywords: List[str]) -> str:
+    """Build the boolean NewsAPI query for one keyword group"""
+    terms = " OR ".join(_quote_term(keyword) for keyword in keywords)
+    return f'{_quote_term(company_name)} AND ({terms})'
+
 
 class NewsAPICollector:
     """Collects ESG news from NewsAPI.org"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, rate_limiter: Optional[RateLimiter] = None,
+                 max_pages: int = 3, http_cache: Optional[HTTPCache] = None,
+                 base_url: Optional[str] = None):
         self.api_key = api_key or os.getenv("NEWS_API_KEY")
-        self.base_url = "https://newsapi.org/v2"
+        self.base_url = (base_url or get_base_url("news_api")).rstrip("/")
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.http_cache = http_cache or get_http_cache()
+        self.max_pages = max_pages
+        self._keyword_patterns = {
+            keyword: re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
+            for keyword in ESG_KEYWORDS
+        }
     
-    def get_esg_news(self, company_name: str, days_back: int = 30) -> List[Dict[str, Any]]:
-        """Get ESG-related news for a company"""
+    def get_esg_news(self, company_name: str, days_back: int = 30,
+                     since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get ESG-related news for a company
+        
+        Keywords are packed into as few boolean queries as fit NewsAPI's query
+        length limit, and each query is paged until its results run out. When
+        `since` is given only articles published after it are requested.
+        """
         if not self.api_key:
             logger.warning("No News API key provided")
             return []
@@ -28,60 +108,159 @@ class NewsAPICollector:
         try:
             # Calculate date range
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
-            
-            # ESG-related keywords
-            esg_keywords = [
-                "ESG", "environmental", "sustainability", "carbon", "renewable",
-                "social responsibility", "governance", "diversity", "inclusion",
-                "climate change", "green energy", "corporate responsibility"
-            ]
+            start_date = self._start_date(end_date, days_back, since)
             
             all_news = []
             
-            for keyword in esg_keywords:
-                query = f"{company_name} {keyword}"
-                
-                params = {
-                    "q": query,
-                    "from": start_date.strftime("%Y-%m-%d"),
-                    "to": end_date.strftime("%Y-%m-%d"),
-                    "sortBy": "publishedAt",
-                    "apiKey": self.api_key,
-                    "language": "en"
-                }
+            for keywords in plan_queries(company_name, ESG_KEYWORDS):
+                query = build_query(company_name, keywords)
                 
-                response = requests.get(f"{self.base_url}/everything", params=params)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    articles = data.get("articles", [])
+                for page in range(1, self.max_pages + 1):
+                    params = self._build_params(query, start_date, page)
                     
-                    for article in articles:
-                        all_news.append({
-                            "date": article.get("publishedAt", ""),
-                            "headline": article.get("title", ""),
-                            "content": article.get("description", ""),
-                            "source": article.get("source", {}).get("name", ""),
-                            "url": article.get("url", ""),
-                            "sentiment_score": 0.0,
-                            "sentiment_label": "neutral",
-                            "data_source": "news_api",
-                            "keyword": keyword
-                        })
-                else:
-                    logger.warning(f"News API request failed: {response.status_code}")
+                    response = self.http_cache.get(
+                        f"{self.base_url}/everything", params=params,
+                        before_fetch=lambda: self.rate_limiter.acquire("news_api")
+                    )
+                    
+                    if response.status_code != 200:
+                        logger.warning(f"News API request failed: {response.status_code}")
+                        break
+                    
+                    data = response.json()
+                    all_news.extend(self._parse_articles(data, keywords))
+                    if not self._has_more_pages(data, page):
+                        break
             
-            # Remove duplicates based on URL
-            seen_urls = set()
-            unique_news = []
-            for article in all_news:
-                if article["url"] not in seen_urls:
-                    seen_urls.add(article["url"])
-                    unique_news.append(article)
+            return self._dedupe_by_url(all_news)
+        
+        except Exception as e:
+            logger.error(f"Error getting news for {company_name}: {e}")
+            return []
+    
+    async def get_esg_news_async(self, session: aiohttp.ClientSession, company_name: str,
+                                 days_back: int = 30,
+                                 semaphore: Optional[asyncio.Semaphore] = None,
+                                 since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get ESG-related news for a company using a shared aiohttp session
+        
+        Args:
+            session: Open aiohttp session
+            company_name: Company name to search for
+            days_back: Number of days of historical data
+            semaphore: Optional per-provider concurrency limit
+            since: Only request articles published after this timestamp
+        
+        Returns:
+            List of news dictionaries, same shape as get_esg_news
+        """
+        if not self.api_key:
+            logger.warning("No News API key provided")
+            return []
+        
+        end_date = datetime.now()
+        start_date = self._start_date(end_date, days_back, since)
+        semaphore = semaphore or asyncio.Semaphore(1)
+        
+        async def fetch(keywords: List[str]) -> List[Dict[str, Any]]:
+            query = build_query(company_name, keywords)
+            articles = []
             
-            return unique_news
+            for page in range(1, self.max_pages + 1):
+                params = self._build_params(query, start_date, page)
+                async with semaphore:
+                    response = await self.http_cache.get_async(
+                        session, f"{self.base_url}/everything", params=params,
+                        before_fetch=lambda: self.rate_limiter.acquire_async("news_api")
+                    )
+                if response.status_code != 200:
+                    logger.warning(f"News API request failed: {response.status_code}")
+                    break
+                
+                data = response.json()
+                articles.extend(self._parse_articles(data, keywords))
+                if not self._has_more_pages(data, page):
+                    break
             
+            return articles
+        
+        try:
+            results = await asyncio.gather(*(fetch(keywords) for keywords in plan_queries(company_name, ESG_KEYWORDS)))
+            return self._dedupe_by_url([article for articles in results for article in articles])
         except Exception as e:
             logger.error(f"Error getting news for {company_name}: {e}")
             return []
+    
+    def _start_date(self, end_date: datetime, days_back: int, since: Optional[datetime]) -> datetime:
+        """
+        Start of the request window: days_back ago, or just after the watermark if newer
+        
+        The default window starts at midnight so repeated runs on the same day
+        produce identical requests and can be served from the HTTP cache.
+        """
+        start_date = (end_date - timedelta(days=days_back)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if since is not None and since + timedelta(seconds=1) > start_date:
+            start_date = since + timedelta(seconds=1)
+        return start_date
+    
+    def _build_params(self, query: str, start_date: datetime, page: int = 1) -> Dict[str, Any]:
+        """Build /everything query parameters for one page of one query"""
+        return {
+            "q": query,
+            "from": start_date.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sortBy": "publishedAt",
+            "apiKey": self.api_key,
+            "language": "en",
+            "pageSize": PAGE_SIZE,
+            "page": page
+        }
+    
+    def _has_more_pages(self, data: Dict[str, Any], page: int) -> bool:
+        """Check whether another page of results exists"""
+        return page * PAGE_SIZE < data.get("totalResults", 0) and len(data.get("articles", [])) == PAGE_SIZE
+    
+    def _match_keywords(self, text: str) -> List[str]:
+        """Return the ESG keywords that occur in the text"""
+        return [keyword for keyword, pattern in self._keyword_patterns.items() if pattern.search(text)]
+    
+    def _parse_articles(self, data: Dict[str, Any], keywords: List[str]) -> List[Dict[str, Any]]:
+        """
+        Convert a NewsAPI response into our news format
+        
+        Articles are tagged with the keywords found in their title and
+        description; if none match locally (NewsAPI also searches the full
+        body), the first keyword of the query that returned them is used.
+        """
+        news = []
+        for article in data.get("articles", []):
+            headline = article.get("title") or ""
+            content = article.get("description") or ""
+            matched = self._match_keywords(f"{headline} {content}")
+            
+            news.append({
+                "date": article.get("publishedAt", ""),
+                "headline": headline,
+                "content": content,
+                "source": (article.get("source") or {}).get("name", ""),
+                "url": article.get("url", ""),
+                "sentiment_score": 0.0,
+                "sentiment_label": "neutral",
+                "data_source": "news_api",
+                "keyword": matched[0] if matched else keywords[0],
+                "matched_keywords": matched
+            })
+        return news
+    
+    def _dedupe_by_url(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Remove duplicates based on URL, merging the keywords they matched"""
+        unique_news: Dict[str, Dict[str, Any]] = {}
+        for article in articles:
+            existing = unique_news.get(article["url"])
+            if existing is None:
+                unique_news[article["url"]] = article
+            else:
+                for keyword in article["matched_keywords"]:
+                    if keyword not in existing["matched_keywords"]:
+                        existing["matched_keywords"].append(keyword)
+        return list(unique_news.values())
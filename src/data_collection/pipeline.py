@@ -0,0 +1,413 @@
+"""
+Streaming Collection Pipeline
+Streams records from the collectors through sentiment scoring into batched database writes
+
+Records flow through four stages connected by bounded queues:
+
+    fetch -> normalize -> sentiment -> write
+
+Each stage runs in its own thread, so a slow stage (usually the sentiment
+model or the database) makes the faster ones block instead of buffering. At
+any time only a ticker's worth of fetched data, the queues and one write
+batch are held in memory, however large the universe or backfill window.
+
+Usage:
+    python -m src.data_collection.pipeline --tickers AAPL MSFT --days-back 365
+"""
+
+import queue
+import argparse
+import threading
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from ..data_processing.dedup import NearDuplicateIndex, article_text, simhash
+from .universe import resolve_universe
+from .yahoo_finance_collector import TickerContext
+from .data_orchestrator import (
+    DataOrchestrator, SAMPLE_TICKERS, WATERMARK_NEWS_API, WATERMARK_YAHOO_NEWS, WATERMARK_YAHOO_PRICES,
+    _parse_timestamp
+)
+
+logger = logging.getLogger(__name__)
+
+# Record kinds
+RECORD_COMPANY = "company"
+RECORD_ESG_SCORE = "esg_score"
+RECORD_NEWS = "news"
+RECORD_DUPLICATE = "duplicate"  # syndicated copy of an earlier article; not scored or stored
+RECORD_PRICES = "prices"  # a ticker's daily price rows
+RECORD_END = "end"  # all records of a ticker have been sent
+
+# News data_source -> watermark it advances
+NEWS_WATERMARKS = {
+    "yahoo_finance": WATERMARK_YAHOO_NEWS,
+    "news_api": WATERMARK_NEWS_API
+}
+
+# Marks the end of a stage's output
+_END_OF_STREAM = object()
+
+
+@dataclass
+class PipelineRecord:
+    """One item flowing through the pipeline."""
+    kind: str
+    ticker: str
+    data: Any = None
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _TickerState:
+    """What the writer tracks for a ticker until its rows are committed."""
+    company_id: Optional[int] = None
+    watermarks: Dict[str, datetime] = field(default_factory=dict)
+    failed: bool = False
+    ended: bool = False
+
+
+class CollectionPipeline:
+    """
+    Streaming alternative to DataOrchestrator.collect_all_companies
+    
+    Args:
+        orchestrator: Provides the collectors, sentiment analyzer and database
+        queue_size: Capacity of each queue between stages
+        batch_size: Rows per database insert
+        sentiment_batch_size: Articles scored together (the analyzer splits them into length-sorted model batches)
+        price_chunk_size: Tickers per batched price download
+    """
+    
+    def __init__(self, orchestrator: Optional[DataOrchestrator] = None, queue_size: int = 100,
+                 batch_size: int = 200, sentiment_batch_size: int = 64, price_chunk_size: int = 50):
+        self.orchestrator = orchestrator or DataOrchestrator()
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.sentiment_batch_size = sentiment_batch_size
+        self.price_chunk_size = price_chunk_size
+        self._stop = threading.Event()
+    
+    def run(self, tickers: List[str], days_back: int = 30) -> Dict[str, Any]:
+        """
+        Collect, score and save data for all tickers
+        
+        Returns:
+            Results dictionary in the same shape as collect_all_companies, plus
+            the number of prices, ESG scores and news articles saved
+        """
+        self._stop.clear()
+        results = self.orchestrator._empty_results(tickers)
+        results.update({"prices_saved": 0, "esg_scores_saved": 0, "news_saved": 0})
+        sentiment_cache_before = self.orchestrator.sentiment_analyzer.cache_stats()
+        self.orchestrator.warm_sentiment_model()
+        
+        fetched = self._start_stage(lambda: self.fetch(tickers, days_back), "fetch", results)
+        normalized = self._start_stage(lambda: self.normalize(fetched), "normalize", results)
+        scored = self._start_stage(lambda: self.score(normalized), "sentiment", results)
+        
+        try:
+            self.write(scored, results)
+        finally:
+            self._stop.set()
+            for stage in (fetched, normalized, scored):
+                stage.thread.join(timeout=5)
+        
+        self.orchestrator.report_sentiment_cache(results, sentiment_cache_before)
+        logger.info(
+            f"Pipeline completed: {results['successful']} successful, {results['failed']} failed, "
+            f"{results['prices_saved']} prices, {results['esg_scores_saved']} ESG scores and "
+            f"{results['news_saved']} articles saved"
+        )
+        return results
+    
+    # Stages
+    
+    def fetch(self, tickers: List[str], days_back: int) -> Iterator[PipelineRecord]:
+        """Fetch each ticker's data and emit it record by record"""
+        orchestrator = self.orchestrator
+        for start in range(0, len(tickers), self.price_chunk_size):
+            chunk = tickers[start:start + self.price_chunk_size]
+            contexts = {ticker: orchestrator.yahoo_collector.ticker_context(ticker) for ticker in chunk}
+            financial_metrics = orchestrator.yahoo_collector.get_batch_financial_metrics(
+                chunk, days_back, since=orchestrator._price_watermarks(chunk), contexts=contexts
+            )
+            planned_overviews = {
+                ticker for ticker, _ in orchestrator.quota_planner.plan("alpha_vantage", chunk, ["overview"])
+            }
+            
+            for ticker in chunk:
+                errors = []
+                try:
+                    yield from self._fetch_ticker(
+                        ticker, days_back, ticker in planned_overviews, errors, contexts.pop(ticker)
+                    )
+                    prices = financial_metrics.pop(ticker, [])
+                    if prices:
+                        yield PipelineRecord(RECORD_PRICES, ticker, prices)
+                except Exception as e:
+                    error_msg = f"Error collecting data for {ticker}: {e}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                yield PipelineRecord(RECORD_END, ticker, errors=errors)
+    
+    def _fetch_ticker(self, ticker: str, days_back: int, fetch_overview: bool,
+                      errors: List[str], context: TickerContext) -> Iterator[PipelineRecord]:
+        orchestrator = self.orchestrator
+        watermarks = orchestrator._get_watermarks(ticker)
+        
+        company_info = orchestrator.yahoo_collector.get_company_info(ticker, context=context)
+        if not company_info:
+            errors.append("Failed to get company info from Yahoo Finance")
+        alpha_overview = orchestrator.alpha_collector.get_company_overview(ticker) if fetch_overview else None
+        if alpha_overview:
+            company_info = {**(company_info or {}), **alpha_overview}
+        yield PipelineRecord(RECORD_COMPANY, ticker, company_info)
+        
+        for score in orchestrator.yahoo_collector.get_esg_scores(ticker, days_back, context=context):
+            yield PipelineRecord(RECORD_ESG_SCORE, ticker, score)
+        
+        yahoo_news = orchestrator.yahoo_collector.get_news(
+            ticker, days_back, since=watermarks[WATERMARK_YAHOO_NEWS], context=context
+        )
+        for article in yahoo_news:
+            yield PipelineRecord(RECORD_NEWS, ticker, article)
+        if company_info and company_info.get("name"):
+            for article in orchestrator.news_collector.get_esg_news(
+                company_info["name"], days_back, since=watermarks[WATERMARK_NEWS_API]
+            ):
+                yield PipelineRecord(RECORD_NEWS, ticker, article)
+    
+    def normalize(self, records: Iterable[PipelineRecord]) -> Iterator[PipelineRecord]:
+        """Parse dates, drop rows the database would reject and mark near-duplicate news"""
+        stories = NearDuplicateIndex()
+        for record in records:
+            if record.kind in (RECORD_ESG_SCORE, RECORD_NEWS):
+                date = _parse_timestamp(record.data.get("date"))
+                if date is None or (record.kind == RECORD_NEWS and not record.data.get("headline")):
+                    logger.debug(f"Dropping incomplete {record.kind} record for {record.ticker}")
+                    continue
+                record.data["date"] = date
+            elif record.kind == RECORD_PRICES:
+                rows = [
+                    {**row, "ticker": record.ticker, "date": _parse_timestamp(row.get("date"))}
+                    for row in record.data
+                ]
+                record.data = [row for row in rows if row["date"]]
+            
+            if record.kind == RECORD_NEWS:
+                # Syndicated copies of a story this ticker already has skip scoring and storage
+                fingerprint = simhash(article_text(record.data))
+                if stories.find(fingerprint) is None:
+                    stories.add(fingerprint)
+                else:
+                    record.kind = RECORD_DUPLICATE
+            elif record.kind == RECORD_END:
+                stories = NearDuplicateIndex()
+            yield record
+    
+    def score(self, records: Iterable[PipelineRecord]) -> Iterator[PipelineRecord]:
+        """Add sentiment to news in small batches, keeping every ticker's records in order"""
+        pending: List[PipelineRecord] = []
+        
+        def flush() -> Iterator[PipelineRecord]:
+            articles = self.orchestrator.sentiment_analyzer.analyze_news_batch([record.data for record in pending])
+            for record, article in zip(pending, articles):
+                record.data = article
+                yield record
+            pending.clear()
+        
+        for record in records:
+            if record.kind == RECORD_NEWS:
+                pending.append(record)
+                if len(pending) >= self.sentiment_batch_size:
+                    yield from flush()
+                continue
+            if pending:
+                yield from flush()
+            yield record
+        if pending:
+            yield from flush()
+    
+    def write(self, records: Iterable[PipelineRecord], results: Dict[str, Any]):
+        """
+        Insert rows in batches
+        
+        A ticker's watermarks advance and its result is recorded only after
+        the batch holding its last rows has been committed.
+        """
+        db_manager = self.orchestrator.db_manager
+        tickers: Dict[str, _TickerState] = {}
+        batches = {RECORD_PRICES: [], RECORD_ESG_SCORE: [], RECORD_NEWS: []}
+        batch_tickers = set()
+        
+        def flush():
+            for kind, insert, counter in (
+                (RECORD_PRICES, db_manager.upsert_stock_prices_batch, "prices_saved"),
+                (RECORD_ESG_SCORE, db_manager.insert_esg_scores_batch, "esg_scores_saved"),
+                (RECORD_NEWS, db_manager.insert_news_batch, "news_saved")
+            ):
+                try:
+                    results[counter] += insert(batches[kind])
+                except Exception as e:
+                    results["errors"].append(f"Failed to save {kind} batch: {e}")
+                    for ticker in {row["ticker"] for row in batches[kind]}:
+                        tickers[ticker].failed = True
+                batches[kind].clear()
+            batch_tickers.clear()
+            
+            for ticker, state in [(ticker, state) for ticker, state in tickers.items() if state.ended]:
+                self._finish_ticker(ticker, state, results)
+                del tickers[ticker]
+        
+        for record in records:
+            state = tickers.setdefault(record.ticker, _TickerState())
+            
+            if record.kind == RECORD_COMPANY:
+                state.company_id = self._resolve_company(record.ticker, record.data)
+            elif record.kind == RECORD_PRICES:
+                # Keyed by ticker, so prices do not wait for the company row
+                if record.data:
+                    batches[RECORD_PRICES].extend(record.data)
+                    batch_tickers.add(record.ticker)
+                    state.watermarks[WATERMARK_YAHOO_PRICES] = max(row["date"] for row in record.data)
+            elif record.kind == RECORD_DUPLICATE:
+                self._advance_news_watermark(state, record.data)
+            elif record.kind == RECORD_END:
+                state.ended = True
+                results["errors"].extend(record.errors)
+                if record.ticker not in batch_tickers:
+                    self._finish_ticker(record.ticker, state, results)
+                    del tickers[record.ticker]
+            elif state.company_id is not None:
+                row = {**record.data, "company_id": state.company_id, "ticker": record.ticker}
+                batches[record.kind].append(row)
+                batch_tickers.add(record.ticker)
+                if record.kind == RECORD_NEWS:
+                    self._advance_news_watermark(state, row)
+            
+            if sum(len(batch) for batch in batches.values()) >= self.batch_size:
+                flush()
+        
+        flush()
+        # Tickers cut off by a failed stage never saw their end record
+        for ticker, state in tickers.items():
+            state.failed = True
+            self._finish_ticker(ticker, state, results)
+    
+    # Helpers
+    
+    def _resolve_company(self, ticker: str, company_info: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Existing company id for a ticker, inserting the company if it is new"""
+        db_manager = self.orchestrator.db_manager
+        try:
+            existing_company = db_manager.get_company_by_ticker(ticker)
+            if existing_company:
+                return existing_company["id"]
+            if company_info:
+                company_id = db_manager.insert_company(company_info)
+                logger.info(f"Saved company info for {ticker} (ID: {company_id})")
+                return company_id
+            logger.warning(f"No company info to save for {ticker}")
+        except Exception as e:
+            logger.error(f"Error saving company info for {ticker}: {e}")
+        return None
+    
+    def _advance_news_watermark(self, state: _TickerState, article: Dict[str, Any]):
+        source = NEWS_WATERMARKS.get(article.get("data_source"))
+        if source and article["date"] > state.watermarks.get(source, datetime.min):
+            state.watermarks[source] = article["date"]
+    
+    def _finish_ticker(self, ticker: str, state: _TickerState, results: Dict[str, Any]):
+        saved = state.company_id is not None and not state.failed
+        if saved:
+            for source, timestamp in state.watermarks.items():
+                try:
+                    self.orchestrator.db_manager.set_watermark(ticker, source, timestamp)
+                except Exception:
+                    saved = False
+        self.orchestrator._record_result(results, ticker, saved)
+    
+    def _start_stage(self, make_records: Callable[[], Iterable[PipelineRecord]], name: str,
+                     results: Dict[str, Any]) -> "_QueueReader":
+        """Run a stage in a thread, feeding its output into a bounded queue"""
+        output = queue.Queue(maxsize=self.queue_size)
+        
+        def put(item):
+            # Block while the queue is full (backpressure), but give up once the run stops
+            while not self._stop.is_set():
+                try:
+                    output.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def pump():
+            try:
+                for record in make_records():
+                    if not put(record):
+                        return
+            except Exception as e:
+                error_msg = f"Pipeline stage {name} failed: {e}"
+                logger.error(error_msg)
+                results["errors"].append(error_msg)
+            put(_END_OF_STREAM)
+        
+        thread = threading.Thread(target=pump, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        return _QueueReader(output, thread)
+
+
+class _QueueReader:
+    """Iterates a stage's output queue until the stage ends"""
+    
+    def __init__(self, source: queue.Queue, thread: threading.Thread):
+        self.source = source
+        self.thread = thread
+    
+    def __iter__(self) -> Iterator[PipelineRecord]:
+        while True:
+            item = self.source.get()
+            if item is _END_OF_STREAM:
+                return
+            yield item
+
+
+def main():
+    """Run the streaming pipeline from the command line"""
+    parser = argparse.ArgumentParser(description="Stream ESG data for many companies into the database")
+    parser.add_argument("--tickers", nargs="+", default=None, help="Companies to collect (default: sample universe)")
+    parser.add_argument("--universe", default=None, help="Ticker file (.txt or .csv); default ESG_UNIVERSE_FILE")
+    parser.add_argument("--days-back", type=int, default=30, help="Days of history to backfill")
+    parser.add_argument("--queue-size", type=int, default=100, help="Capacity of each queue between stages")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per database insert")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    tickers = resolve_universe(args.tickers, args.universe, default=SAMPLE_TICKERS)
+    pipeline = CollectionPipeline(queue_size=args.queue_size, batch_size=args.batch_size)
+    results = pipeline.run(tickers, args.days_back)
+    
+    print("\nData Collection Results:")
+    print(f"Total companies: {results['total_companies']}")
+    print(f"Successful: {results['successful']}")
+    print(f"Failed: {results['failed']}")
+    print(f"Prices saved: {results['prices_saved']}")
+    print(f"ESG scores saved: {results['esg_scores_saved']}")
+    print(f"News articles saved: {results['news_saved']}")
+    
+    if results["errors"]:
+        print("\nErrors:")
+        for error in results["errors"]:
+            print(f"  - {error}")
+
+
+if __name__ == "__main__":
+    main()
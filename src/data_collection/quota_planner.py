@@ -0,0 +1,356 @@
+"""
+Quota Planner
+Persistent call ledger and daily budget planner for quota-limited providers
+"""
+
+import math
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def configured_budgets() -> Dict[str, int]:
+    """Calls per UTC day for each quota-limited provider, from settings"""
+    return {
+        "alpha_vantage": settings.alpha_vantage_daily_budget,
+        "fmp": settings.fmp_daily_budget
+    }
+
+
+# Priority per data type (0 is most important) and how long its data stays fresh in seconds
+DATA_TYPES: Dict[str, Tuple[int, int]] = {
+    "prices": (0, 4 * 60 * 60),
+    "overview": (1, 7 * 24 * 60 * 60),
+    "profile": (1, 7 * 24 * 60 * 60),
+    "news_sentiment": (2, 24 * 60 * 60),
+    "earnings": (3, 7 * 24 * 60 * 60)
+}
+
+# Share of the daily budget each priority level is planned to get
+PRIORITY_WEIGHTS = {0: 4, 1: 2, 2: 1, 3: 1}
+
+# Alpha Vantage function -> planner data type
+ALPHA_VANTAGE_DATA_TYPES = {
+    "OVERVIEW": "overview",
+    "NEWS_SENTIMENT": "news_sentiment",
+    "EARNINGS_CALENDAR": "earnings",
+    "GLOBAL_QUOTE": "prices"
+}
+
+STATUS_PENDING = 0
+
+
+class QuotaExceededError(Exception):
+    """Raised instead of making a call the provider's daily budget cannot afford."""
+    
+    # The provider was never contacted, so circuit breakers must not count this
+    provider_failure = False
+    
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider} call deferred: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+def alpha_vantage_data_type(params: Dict[str, Any]) -> str:
+    """Planner data type for an Alpha Vantage query"""
+    function = str(params.get("function", "")).upper()
+    if function.startswith("TIME_SERIES"):
+        return "prices"
+    return ALPHA_VANTAGE_DATA_TYPES.get(function, "overview")
+
+
+def _utc_day(timestamp: Optional[float] = None) -> str:
+    return datetime.fromtimestamp(timestamp or time.time(), timezone.utc).strftime("%Y-%m-%d")
+
+
+def _day_fraction(timestamp: Optional[float] = None) -> float:
+    """Fraction of the current UTC day that has elapsed"""
+    now = datetime.fromtimestamp(timestamp or time.time(), timezone.utc)
+    return (now.hour * 3600 + now.minute * 60 + now.second) / 86400
+
+
+class QuotaLedger:
+    """SQLite ledger of every call spent against a provider's daily quota"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS api_calls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    provider TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    ticker TEXT,
+                    data_type TEXT,
+                    called_at REAL NOT NULL,
+                    status INTEGER NOT NULL
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_api_calls_day ON api_calls(provider, day)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_api_calls_key ON api_calls(provider, ticker, data_type, called_at)"
+            )
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS quota_blocks (
+                    provider TEXT PRIMARY KEY,
+                    blocked_until REAL NOT NULL,
+                    reason TEXT
+                )
+            """)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One SQLite connection per thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            self._local.connection = connection
+        return connection
+    
+    def reserve(self, provider: str, ticker: Optional[str], data_type: Optional[str],
+                budget: int, admit: Callable[[int], Optional[str]]) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Atomically count today's calls, ask `admit` whether one more is allowed and record it
+        
+        Returns:
+            (call id, None) if recorded, (None, reason) if admit refused
+        """
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            used = connection.execute(
+                "SELECT COUNT(*) FROM api_calls WHERE provider = ? AND day = ?", (provider, _utc_day(now))
+            ).fetchone()[0]
+            reason = "daily budget exhausted" if used >= budget else admit(used)
+            if reason:
+                return None, reason
+            cursor = connection.execute(
+                "INSERT INTO api_calls (provider, day, ticker, data_type, called_at, status) VALUES (?, ?, ?, ?, ?, ?)",
+                (provider, _utc_day(now), ticker, data_type, now, STATUS_PENDING)
+            )
+            return cursor.lastrowid, None
+    
+    def complete(self, call_id: int, status: int):
+        with self._connection() as connection:
+            connection.execute("UPDATE api_calls SET status = ? WHERE id = ?", (status, call_id))
+    
+    def used_today(self, provider: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM api_calls WHERE provider = ? AND day = ?", (provider, _utc_day())
+        ).fetchone()[0]
+    
+    def last_success(self, provider: str, ticker: Optional[str], data_type: str) -> Optional[float]:
+        """When data of this type was last fetched successfully for a ticker"""
+        row = self._connection().execute(
+            "SELECT MAX(called_at) FROM api_calls WHERE provider = ? AND ticker IS ? AND data_type = ?"
+            " AND status = 200", (provider, ticker, data_type)
+        ).fetchone()
+        return row[0]
+    
+    def block(self, provider: str, until: float, reason: str):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO quota_blocks (provider, blocked_until, reason) VALUES (?, ?, ?)",
+                (provider, until, reason)
+            )
+    
+    def blocked_until(self, provider: str) -> float:
+        row = self._connection().execute(
+            "SELECT blocked_until FROM quota_blocks WHERE provider = ?", (provider,)
+        ).fetchone()
+        return row[0] if row else 0.0
+
+
+class QuotaPlanner:
+    """
+    Splits each provider's daily budget across tickers and data types
+    
+    Calls are paced to spread evenly over the UTC day: once a provider is
+    ahead of that schedule, only stale top-priority data may still be
+    fetched. Low-priority data types never touch the last reserve_fraction
+    of the budget, and a provider that answers with a quota error is not
+    called again until its block expires.
+    """
+    
+    def __init__(self, ledger: QuotaLedger, budgets: Optional[Dict[str, int]] = None,
+                 reserve_fraction: float = 0.1):
+        self.ledger = ledger
+        self.budgets = {**configured_budgets(), **(budgets or {})}
+        self.reserve_fraction = reserve_fraction
+    
+    def remaining(self, provider: str) -> int:
+        """Calls left in today's budget"""
+        return max(0, self.budgets[provider] - self.ledger.used_today(provider))
+    
+    def paced_allowance(self, provider: str) -> int:
+        """Calls the even schedule allows so far today, plus a small burst"""
+        budget = self.budgets[provider]
+        burst = max(5, int(budget * 0.05))
+        return min(budget, math.ceil(budget * _day_fraction()) + burst)
+    
+    def seconds_until_next_slot(self, provider: str) -> float:
+        """Wait until the even schedule admits another call (0 if it already does)"""
+        budget = self.budgets[provider]
+        used = self.ledger.used_today(provider)
+        if used >= budget:
+            return 86400 * (1 - _day_fraction())
+        burst = max(5, int(budget * 0.05))
+        needed_fraction = (used - burst + 1) / budget
+        return max(0.0, (needed_fraction - _day_fraction()) * 86400)
+    
+    def try_acquire(self, provider: str, ticker: Optional[str], data_type: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Decide whether to spend one call now and record it if so
+        
+        Returns:
+            (call id, None) when the call may go ahead; pass the id to record_result.
+            (None, reason) when the call should be refused or deferred.
+        """
+        if provider not in self.budgets:
+            return -1, None
+        
+        blocked_until = self.ledger.blocked_until(provider)
+        if blocked_until > time.time():
+            return None, f"provider quota blocked for {blocked_until - time.time():.0f}s"
+        
+        priority, max_age = DATA_TYPES.get(data_type, (1, 24 * 60 * 60))
+        budget = self.budgets[provider]
+        
+        def admit(used: int) -> Optional[str]:
+            if priority >= 2 and used >= budget * (1 - self.reserve_fraction):
+                return "remaining budget is reserved for higher-priority data"
+            if used >= self.paced_allowance(provider):
+                last_success = self.ledger.last_success(provider, ticker, data_type)
+                stale = last_success is None or time.time() - last_success > max_age
+                if priority > 0 or not stale:
+                    return "ahead of today's even schedule"
+            return None
+        
+        return self.ledger.reserve(provider, ticker, data_type, budget, admit)
+    
+    def record_result(self, provider: str, call_id: Optional[int], status: int, quota_message: Optional[str] = None):
+        """
+        Record how a call went; quota errors block the provider
+        
+        Args:
+            provider: Provider name
+            call_id: Id returned by try_acquire
+            status: HTTP status (use 429 for Alpha Vantage throttle notes)
+            quota_message: Provider's throttle message, if any
+        """
+        if call_id is not None and call_id >= 0:
+            self.ledger.complete(call_id, status)
+        if status != 429:
+            return
+        
+        message = (quota_message or "").lower()
+        if "per day" in message or "daily" in message:
+            # Daily quota gone: block until the next UTC day
+            until = time.time() + 86400 * (1 - _day_fraction())
+        else:
+            until = time.time() + 60
+        self.ledger.block(provider, until, quota_message or "HTTP 429")
+        logger.warning(f"{provider} quota hit, pausing calls for {until - time.time():.0f}s")
+    
+    def before_fetch(self, provider: str, ticker: Optional[str], data_type: str,
+                     rate_limiter: Any = None) -> Callable[[], Optional[int]]:
+        """
+        Build an HTTP cache before_fetch hook that spends quota only on real requests
+        
+        The hook raises QuotaExceededError when the call is refused; the call id
+        it reserved is kept on the hook as `call_id` for record_result.
+        """
+        def hook():
+            call_id, reason = self.try_acquire(provider, ticker, data_type)
+            if reason:
+                raise QuotaExceededError(provider, reason)
+            hook.call_id = call_id
+            if rate_limiter is not None:
+                rate_limiter.acquire(provider)
+            return call_id
+        
+        hook.call_id = None
+        return hook
+    
+    def observe(self, provider: str, hook: Callable, response: Any):
+        """Record the outcome of a response fetched with a before_fetch hook"""
+        call_id = getattr(hook, "call_id", None)
+        if call_id is None or getattr(response, "from_cache", False):
+            return
+        status = response.status_code
+        quota_message = None
+        if status == 200 and provider == "alpha_vantage":
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            if isinstance(body, dict) and ("Note" in body or "Information" in body):
+                status, quota_message = 429, body.get("Note") or body.get("Information")
+        self.record_result(provider, call_id, status, quota_message)
+    
+    def plan(self, provider: str, tickers: List[str], data_types: List[str],
+             skip: Optional[Set[Tuple[str, str]]] = None) -> List[Tuple[str, str]]:
+        """
+        Pick which (ticker, data type) calls to make today
+        
+        Fresh data is skipped, as are the (ticker, data type) pairs in skip
+        (data already obtained another way). Each priority level gets a share
+        of the remaining budget according to PRIORITY_WEIGHTS (unused shares
+        roll down to lower priorities), and within a level the stalest data
+        goes first.
+        
+        Returns:
+            Planned calls, most important first
+        """
+        remaining = self.remaining(provider)
+        now = time.time()
+        by_priority: Dict[int, List[Tuple[float, str, str]]] = {}
+        
+        for data_type in data_types:
+            priority, max_age = DATA_TYPES.get(data_type, (1, 24 * 60 * 60))
+            for ticker in tickers:
+                if skip and (ticker, data_type) in skip:
+                    continue
+                last_success = self.ledger.last_success(provider, ticker, data_type)
+                if last_success is not None and now - last_success < max_age:
+                    continue
+                by_priority.setdefault(priority, []).append((last_success or 0.0, ticker, data_type))
+        
+        planned: List[Tuple[str, str]] = []
+        leftovers: List[Tuple[str, str]] = []
+        levels = sorted(by_priority)
+        total_weight = sum(PRIORITY_WEIGHTS.get(level, 1) for level in levels)
+        carry = 0
+        for level in levels:
+            share = int(remaining * PRIORITY_WEIGHTS.get(level, 1) / total_weight) + carry
+            candidates = [(ticker, data_type) for _, ticker, data_type in sorted(by_priority[level])]
+            planned.extend(candidates[:share])
+            leftovers.extend(candidates[share:])
+            carry = max(0, share - len(candidates))
+        
+        # Shares are rounded down; spend what is left on the most important leftovers
+        planned.extend(leftovers[:max(0, remaining - len(planned))])
+        return planned[:remaining]
+
+
+# Global quota planner instance
+_quota_planner: Optional[QuotaPlanner] = None
+_quota_planner_lock = threading.Lock()
+
+
+def get_quota_planner() -> QuotaPlanner:
+    """Get the process-wide quota planner backed by the shared ledger file."""
+    global _quota_planner
+    with _quota_planner_lock:
+        if _quota_planner is None:
+            _quota_planner = QuotaPlanner(QuotaLedger(settings.quota_ledger_path))
+        return _quota_planner
@@ -0,0 +1,189 @@
+"""
+Provider Rate Limiter
+Token-bucket rate limiting per API provider, shared across threads and processes
+"""
+
+import time
+import sqlite3
+import asyncio
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (refill rate in tokens per second, burst capacity) for each provider
+PROVIDER_LIMITS: Dict[str, Tuple[float, int]] = {
+    "alpha_vantage": (5 / 60, 5),    # 5 calls/minute on the free tier
+    "fmp": (2.0, 5),
+    "news_api": (1.0, 5),
+    "openweather": (1.0, 10),        # 60 calls/minute on the free tier
+    "epa": (2.0, 5),
+    "yahoo_finance": (2.0, 5),
+    "default": (1.0, 5)
+}
+
+
+class TokenBucket:
+    """
+    In-memory token bucket
+    
+    Tokens refill continuously at `rate` per second up to `capacity`. Callers
+    reserve tokens up front and are told how long to wait, so concurrent
+    callers queue up fairly instead of spinning.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.time()
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens: int = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve tokens and return the number of seconds to wait before using them
+        
+        Returns None (and reserves nothing) if the wait would exceed max_wait.
+        """
+        with self._lock:
+            self.tokens, self.updated_at, wait = _reserve(
+                self.tokens, self.updated_at, self.rate, self.capacity, tokens, max_wait
+            )
+            return wait
+
+
+def _reserve(current: float, updated_at: float, rate: float, capacity: int,
+             tokens: int, max_wait: Optional[float]) -> Tuple[float, float, Optional[float]]:
+    """Refill a bucket and try to take tokens from it; returns (tokens, updated_at, wait)"""
+    now = time.time()
+    current = min(float(capacity), current + (now - updated_at) * rate)
+    remaining = current - tokens
+    wait = max(0.0, -remaining / rate) if rate > 0 else float("inf")
+    
+    if max_wait is not None and wait > max_wait:
+        return current, now, None
+    return remaining, now, wait
+
+
+class RateLimiter:
+    """
+    Per-provider token buckets
+    
+    With a state_path the buckets live in a small SQLite file, so every thread
+    and process on the host draws from the same budget. Without one they are
+    kept in memory and shared by threads only.
+    """
+    
+    def __init__(self, state_path: Optional[str] = None,
+                 limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.state_path = state_path
+        self.limits = {**PROVIDER_LIMITS, **(limits or {})}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._local = threading.local()
+        
+        if self.state_path:
+            self._init_state()
+    
+    def acquire(self, provider: str, tokens: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Block until `tokens` are available for a provider
+        
+        Args:
+            provider: Provider name, e.g. "alpha_vantage"
+            tokens: Number of tokens (API calls) to take
+            timeout: Maximum seconds to wait; None waits as long as needed
+        
+        Returns:
+            True if the tokens were acquired, False if the wait would exceed timeout
+        """
+        wait = self._reserve(provider, tokens, timeout)
+        if wait is None:
+            logger.warning(f"Rate limit for {provider} would exceed {timeout}s wait")
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+    
+    async def acquire_async(self, provider: str, tokens: int = 1, timeout: Optional[float] = None) -> bool:
+        """Async variant of acquire that sleeps without blocking the event loop"""
+        wait = self._reserve(provider, tokens, timeout)
+        if wait is None:
+            logger.warning(f"Rate limit for {provider} would exceed {timeout}s wait")
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+    
+    def _limits_for(self, provider: str) -> Tuple[float, int]:
+        return self.limits.get(provider, self.limits["default"])
+    
+    def _reserve(self, provider: str, tokens: int, max_wait: Optional[float]) -> Optional[float]:
+        if self.state_path:
+            return self._reserve_shared(provider, tokens, max_wait)
+        
+        with self._buckets_lock:
+            bucket = self._buckets.get(provider)
+            if bucket is None:
+                bucket = TokenBucket(*self._limits_for(provider))
+                self._buckets[provider] = bucket
+        return bucket.reserve(tokens, max_wait)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One SQLite connection per thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+    
+    def _init_state(self):
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+    
+    def _reserve_shared(self, provider: str, tokens: int, max_wait: Optional[float]) -> Optional[float]:
+        rate, capacity = self._limits_for(provider)
+        connection = self._connection()
+        
+        # BEGIN IMMEDIATE takes the write lock, serializing all processes on this bucket
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE provider = ?", (provider,)
+            ).fetchone()
+            current, updated_at = row if row else (float(capacity), time.time())
+            
+            current, updated_at, wait = _reserve(current, updated_at, rate, capacity, tokens, max_wait)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                (provider, current, updated_at)
+            )
+            connection.execute("COMMIT")
+            return wait
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+
+# Global rate limiter instance
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter backed by the shared state file."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            # An empty RATE_LIMIT_STATE_PATH keeps the buckets in this process only
+            _rate_limiter = RateLimiter(state_path=settings.rate_limit_state_path or None)
+        return _rate_limiter
@@ -0,0 +1,218 @@
+"""
+Collection Scheduler
+Resident daemon that refreshes each feed on its own interval using a process pool
+
+Usage:
+    python -m src.data_collection.scheduler --tickers AAPL MSFT --workers 4
+"""
+
+import heapq
+import signal
+import argparse
+import itertools
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from .data_orchestrator import DataOrchestrator, FEED_EARNINGS, FEED_ESG, FEED_NEWS, FEED_PRICES, SAMPLE_TICKERS
+from .universe import resolve_universe
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobSpec:
+    """A feed refreshed on a fixed interval."""
+    feed: str
+    interval: timedelta
+    priority: int  # lower runs first when work queues up
+    days_back: int = 30
+    batch_size: int = 1  # tickers per work unit; 0 puts the whole universe in one unit
+
+
+@dataclass
+class WorkUnit:
+    """One job run for a batch of tickers, executed in a worker process."""
+    job: JobSpec
+    tickers: Tuple[str, ...]
+    
+    @property
+    def key(self) -> Tuple[str, Tuple[str, ...]]:
+        return self.job.feed, self.tickers
+
+
+def default_jobs() -> List[JobSpec]:
+    """Intraday prices, hourly news, daily ESG scores and the daily earnings calendar, with intervals from settings"""
+    return [
+        JobSpec(FEED_PRICES, timedelta(minutes=settings.price_refresh_minutes), priority=0, days_back=5, batch_size=0),
+        JobSpec(FEED_NEWS, timedelta(minutes=settings.news_refresh_minutes), priority=1, days_back=7),
+        JobSpec(FEED_ESG, timedelta(hours=settings.data_collection_interval_hours), priority=2, days_back=30),
+        # One whole-market download serves every ticker
+        JobSpec(FEED_EARNINGS, timedelta(hours=24), priority=3, days_back=0, batch_size=0)
+    ]
+
+
+# Each worker process builds its orchestrator (collectors, model, DB connection) once
+_worker_orchestrator: Optional[DataOrchestrator] = None
+
+
+def _init_worker():
+    global _worker_orchestrator
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles shutdown
+    _worker_orchestrator = DataOrchestrator()
+
+
+def _run_work_unit(feed: str, tickers: Tuple[str, ...], days_back: int) -> Dict[str, Any]:
+    """Entry point executed in a worker process"""
+    orchestrator = _worker_orchestrator or DataOrchestrator()
+    return orchestrator.collect_feed(feed, list(tickers), days_back)
+
+
+class CollectionScheduler:
+    """
+    Dispatches feed refreshes to a process pool
+    
+    Due work units wait in a bounded priority queue; at most max_workers run at
+    once, so the pool's own queue never grows. A unit that is still queued or
+    running when it comes due again is skipped for that interval instead of
+    piling up behind itself.
+    """
+    
+    def __init__(self, tickers: List[str], jobs: Optional[List[JobSpec]] = None,
+                 max_workers: Optional[int] = None, max_queue_size: Optional[int] = None):
+        self.tickers = tickers
+        self.jobs = jobs or default_jobs()
+        self.max_workers = max_workers or settings.scheduler_workers
+        self.max_queue_size = max_queue_size or settings.scheduler_queue_size
+        self.units = self._build_units()
+        self.stats: Dict[str, Dict[str, Any]] = {
+            job.feed: {"runs": 0, "failures": 0, "skipped": 0, "last_duration": None}
+            for job in self.jobs
+        }
+        
+        self._queue: List[Tuple[int, int, WorkUnit]] = []
+        self._queued_keys = set()
+        self._running: Dict[Future, Tuple[WorkUnit, float]] = {}
+        self._next_due = {unit.key: 0.0 for unit in self.units}
+        self._sequence = itertools.count()
+        self._stop = threading.Event()
+    
+    def run(self, once: bool = False):
+        """
+        Run until stop() is called
+        
+        Args:
+            once: Run every work unit a single time and return (cron-style)
+        """
+        logger.info(f"Scheduler starting: {len(self.units)} work units, {self.max_workers} workers")
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as executor:
+            while not self._stop.is_set():
+                if not once or any(due == 0.0 for due in self._next_due.values()):
+                    self._schedule_due(time.time())
+                self._dispatch(executor)
+                
+                if once and not self._queue and not self._running:
+                    break
+                
+                if self._running:
+                    wait(list(self._running), timeout=1.0, return_when=FIRST_COMPLETED)
+                else:
+                    self._stop.wait(1.0)
+                self._reap()
+            
+            for future in list(self._running):
+                future.cancel()
+        logger.info(f"Scheduler stopped: {self.stats}")
+    
+    def stop(self):
+        """Ask the run loop to exit after the current tick"""
+        self._stop.set()
+    
+    def _build_units(self) -> List[WorkUnit]:
+        units = []
+        for job in self.jobs:
+            size = job.batch_size or len(self.tickers)
+            for start in range(0, len(self.tickers), size):
+                units.append(WorkUnit(job, tuple(self.tickers[start:start + size])))
+        return units
+    
+    def _schedule_due(self, now: float):
+        """Move due units into the queue, most urgent job first"""
+        due = [unit for unit in self.units if self._next_due[unit.key] <= now]
+        for unit in sorted(due, key=lambda unit: unit.job.priority):
+            if unit.key in self._queued_keys or unit.key in self._running_keys():
+                self.stats[unit.job.feed]["skipped"] += 1
+                logger.warning(f"{unit.job.feed} for {','.join(unit.tickers)} still pending, skipping this run")
+                self._next_due[unit.key] = now + unit.job.interval.total_seconds()
+                continue
+            if len(self._queue) >= self.max_queue_size:
+                # Leave the unit due; it is enqueued as soon as the queue drains
+                logger.debug(f"Queue full, deferring {unit.job.feed} for {','.join(unit.tickers)}")
+                continue
+            
+            heapq.heappush(self._queue, (unit.job.priority, next(self._sequence), unit))
+            self._queued_keys.add(unit.key)
+            self._next_due[unit.key] = now + unit.job.interval.total_seconds()
+    
+    def _dispatch(self, executor: ProcessPoolExecutor):
+        """Submit queued units while workers are free"""
+        while self._queue and len(self._running) < self.max_workers:
+            _, _, unit = heapq.heappop(self._queue)
+            self._queued_keys.discard(unit.key)
+            future = executor.submit(_run_work_unit, unit.job.feed, unit.tickers, unit.job.days_back)
+            self._running[future] = (unit, time.time())
+    
+    def _reap(self):
+        """Record the outcome of finished units"""
+        for future in [future for future in self._running if future.done()]:
+            unit, started_at = self._running.pop(future)
+            stats = self.stats[unit.job.feed]
+            stats["runs"] += 1
+            stats["last_duration"] = round(time.time() - started_at, 2)
+            
+            try:
+                results = future.result()
+                stats["failures"] += results["failed"]
+                logger.info(
+                    f"{unit.job.feed} for {','.join(unit.tickers)}: {results['successful']} saved, "
+                    f"{results['failed']} failed in {stats['last_duration']}s"
+                )
+            except Exception as e:
+                stats["failures"] += len(unit.tickers)
+                logger.error(f"{unit.job.feed} for {','.join(unit.tickers)} crashed: {e}")
+    
+    def _running_keys(self):
+        return {unit.key for unit, _ in self._running.values()}
+
+
+def main():
+    """Run the scheduler daemon from the command line"""
+    parser = argparse.ArgumentParser(description="Continuously refresh prices, news and ESG scores")
+    parser.add_argument("--tickers", nargs="+", default=None, help="Companies to track (default: sample universe)")
+    parser.add_argument("--universe", default=None, help="Ticker file (.txt or .csv); default ESG_UNIVERSE_FILE")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--once", action="store_true", help="Run every job once and exit")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    tickers = resolve_universe(args.tickers, args.universe, default=SAMPLE_TICKERS)
+    scheduler = CollectionScheduler(tickers, max_workers=args.workers)
+    
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+    try:
+        scheduler.run(once=args.once)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Stage DAG
+Runs a small graph of collection stages, each as soon as the stages it depends on are done
+"""
+
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """One unit of work; called with the results of its dependencies as keyword arguments."""
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class DAGRun:
+    """Outcome of running a StageDAG."""
+    results: Dict[str, Any] = field(default_factory=dict)  # None for stages that failed
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage
+    elapsed: float = 0.0
+
+
+class StageDAG:
+    """
+    Dependency-aware stage executor
+    
+    Stages are added after the stages they depend on, so the graph can never
+    contain a cycle. Independent stages run concurrently on worker threads; a
+    stage starts the moment its last dependency finishes. A stage that raises
+    records its error and hands None to its dependents, which still run (the
+    collectors already treat missing inputs as "nothing to fetch").
+    
+    Args:
+        name: Label used in log messages (e.g. the ticker)
+        max_workers: Concurrent stages (defaults to one thread per stage)
+    """
+    
+    def __init__(self, name: str = "dag", max_workers: Optional[int] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+    
+    def add(self, name: str, func: Callable[..., Any], depends_on: Tuple[str, ...] = ()) -> "StageDAG":
+        """
+        Add a stage
+        
+        Args:
+            name: Unique stage name; also the keyword its result is passed under
+            func: Called with one keyword argument per dependency
+            depends_on: Names of stages already added
+        
+        Returns:
+            The DAG, so stages can be chained
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        missing = [dependency for dependency in depends_on if dependency not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(missing)}")
+        self.stages[name] = Stage(name, func, tuple(depends_on))
+        return self
+    
+    def run(self) -> DAGRun:
+        """Run every stage and return their results, errors and timings"""
+        run = DAGRun()
+        if not self.stages:
+            return run
+        
+        started_at = time.monotonic()
+        waiting = dict(self.stages)
+        running: Dict[Future, str] = {}
+        
+        def timed(stage: Stage, inputs: Dict[str, Any]):
+            start = time.monotonic()
+            try:
+                return stage.func(**inputs)
+            finally:
+                run.timings[stage.name] = time.monotonic() - start
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(self.stages),
+                                thread_name_prefix=f"stage-{self.name}") as executor:
+            while waiting or running:
+                ready = [stage for stage in waiting.values()
+                         if all(dependency in run.results for dependency in stage.depends_on)]
+                for stage in ready:
+                    del waiting[stage.name]
+                    inputs = {dependency: run.results[dependency] for dependency in stage.depends_on}
+                    running[executor.submit(timed, stage, inputs)] = stage.name
+                
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        run.results[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"{self.name}: stage {name} failed: {e}")
+                        run.errors[name] = e
+                        run.results[name] = None
+        
+        run.elapsed = time.monotonic() - started_at
+        logger.debug(f"{self.name}: stages finished in {run.elapsed:.2f}s " +
+                     ", ".join(f"{name} {seconds:.2f}s" for name, seconds in run.timings.items()))
+        return run
@@ -0,0 +1,233 @@
+"""
+Provider Stub Server
+Local HTTP server that replays recorded provider fixtures for offline benchmarking
+
+Each provider is served under its own path prefix, e.g.
+http://127.0.0.1:8765/alpha_vantage/query?function=OVERVIEW&symbol=AAPL.
+Point the *_BASE_URL settings at those prefixes to run the collectors and
+dashboards against it.
+
+Usage:
+    python -m src.data_collection.stub_server --fixtures fixtures/ --latency-ms 80 --error-rate 0.02
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, parse_qsl
+
+from .endpoints import PROVIDERS, SECRET_PARAMS, base_url_setting
+from .fixtures import fixture_body, load_fixtures
+
+logger = logging.getLogger(__name__)
+
+# Body Alpha Vantage sends (with HTTP 200) when a key is over its rate limit
+_ALPHA_VANTAGE_THROTTLE_NOTE = {
+    "Note": "Thank you for using Alpha Vantage! Our standard API rate limit is 5 requests per minute."
+}
+
+
+class FixtureStore:
+    """Indexes fixtures by provider and path and finds the best match for a request"""
+    
+    def __init__(self, fixtures: List[Dict[str, Any]]):
+        self._index: Dict[tuple, List[Dict[str, Any]]] = {}
+        for fixture in fixtures:
+            self._index.setdefault((fixture["provider"], fixture["path"]), []).append(fixture)
+    
+    def __len__(self) -> int:
+        return sum(len(fixtures) for fixtures in self._index.values())
+    
+    def match(self, provider: str, path: str, query: Dict[str, str],
+              strict: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Find the fixture for a request
+        
+        An exact query match wins. Otherwise, unless strict, the fixture for the
+        same path sharing the most query parameters is used, so requests for
+        symbols that were never recorded still get a realistic payload.
+        """
+        candidates = self._index.get((provider, path), [])
+        for fixture in candidates:
+            if fixture["query"] == query:
+                return fixture
+        if strict or not candidates:
+            return None
+        return max(candidates, key=lambda fixture: sum(
+            1 for key, value in query.items() if fixture["query"].get(key) == value
+        ))
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server replaying fixtures with configurable latency and faults
+    
+    Args:
+        address: (host, port) to bind; port 0 picks a free port
+        store: Fixtures to serve
+        latency_ms: Base latency added to every response
+        jitter_ms: Uniform random latency added on top of latency_ms
+        error_rate: Fraction of requests answered with error_status
+        error_status: HTTP status used for injected errors
+        throttle_rate: Fraction of requests answered as rate limited
+        strict: Return 404 unless a fixture matches the query exactly
+        seed: Random seed for reproducible fault injection
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, address, store: FixtureStore, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 throttle_rate: float = 0.0, strict: bool = False, seed: Optional[int] = None):
+        super().__init__(address, StubRequestHandler)
+        self.store = store
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle_rate = throttle_rate
+        self.strict = strict
+        self._random = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "served": 0, "errors": 0, "throttled": 0, "misses": 0}
+    
+    def base_urls(self) -> Dict[str, str]:
+        """Base URL of every provider on this server, keyed by settings environment variable"""
+        host, port = self.server_address[:2]
+        return {base_url_setting(provider).upper(): f"http://{host}:{port}/{provider}" for provider in PROVIDERS}
+    
+    def next_fault(self) -> Optional[str]:
+        """Decide whether the next request gets an injected fault"""
+        with self._stats_lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return "error"
+        if roll < self.error_rate + self.throttle_rate:
+            return "throttled"
+        return None
+    
+    def next_delay(self) -> float:
+        """Seconds to wait before answering the next request"""
+        with self._stats_lock:
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000
+    
+    def count(self, outcome: str):
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats[outcome] += 1
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Serves GET /<provider>/<path>?<query> from the server's fixture store"""
+    
+    server: StubServer
+    
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        provider, _, path = parts.path.lstrip("/").partition("/")
+        query = {k: v for k, v in parse_qsl(parts.query) if k not in SECRET_PARAMS}
+        
+        delay = self.server.next_delay()
+        if delay:
+            time.sleep(delay)
+        
+        fault = self.server.next_fault()
+        if fault == "error":
+            self.server.count("errors")
+            self._send(self.server.error_status, b'{"error": "injected fault"}')
+            return
+        if fault == "throttled":
+            self.server.count("throttled")
+            if provider == "alpha_vantage":
+                self._send(200, json.dumps(_ALPHA_VANTAGE_THROTTLE_NOTE).encode("utf-8"))
+            else:
+                self._send(429, b'{"error": "rate limited"}', {"Retry-After": "1"})
+            return
+        
+        fixture = self.server.store.match(provider, f"/{path}", query, self.server.strict)
+        if fixture is None:
+            self.server.count("misses")
+            self._send(404, json.dumps({"error": f"no fixture for {self.path}"}).encode("utf-8"))
+            return
+        
+        self.server.count("served")
+        self._send(fixture["status"], fixture_body(fixture),
+                   {"Content-Type": fixture.get("content_type") or "application/json"})
+    
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_stub_server(fixture_dir: str, host: str = "127.0.0.1", port: int = 0, **options) -> StubServer:
+    """
+    Start a stub server in a background thread
+    
+    Args:
+        fixture_dir: Directory of recorded fixtures
+        host: Interface to bind
+        port: Port to bind; 0 picks a free port
+        **options: Latency and fault injection options passed to StubServer
+    
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    server = StubServer((host, port), FixtureStore(load_fixtures(fixture_dir)), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Run the stub server from the command line"""
+    parser = argparse.ArgumentParser(description="Replay recorded provider fixtures over HTTP")
+    parser.add_argument("--fixtures", required=True, help="Directory written with HTTP_RECORD_DIR")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base latency per response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for injected failures")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests rate limited")
+    parser.add_argument("--strict", action="store_true", help="Only serve exact query matches")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible fault injection")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    store = FixtureStore(load_fixtures(args.fixtures))
+    server = StubServer(
+        (args.host, args.port), store, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_status=args.error_status,
+        throttle_rate=args.throttle_rate, strict=args.strict, seed=args.seed
+    )
+    
+    print(f"Serving {len(store)} fixtures on http://{args.host}:{server.server_address[1]}")
+    print("Point the collectors and dashboards at it with:")
+    for env_name, url in server.base_urls().items():
+        print(f"  export {env_name}={url}")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Stats: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
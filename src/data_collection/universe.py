@@ -0,0 +1,79 @@
+"""
+Ticker Universe
+Loads the list of companies to track from a file, the settings or a default
+"""
+
+import csv
+import logging
+from typing import Iterable, List, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# CSV columns recognised as holding the ticker, in order of preference
+TICKER_COLUMNS = ("ticker", "symbol")
+
+
+def normalize_tickers(tickers: Iterable[str]) -> List[str]:
+    """Upper-case, strip and de-duplicate tickers, keeping their order"""
+    seen = set()
+    result = []
+    for ticker in tickers:
+        ticker = ticker.strip().upper()
+        if ticker and ticker not in seen:
+            seen.add(ticker)
+            result.append(ticker)
+    return result
+
+
+def load_universe(path: str) -> List[str]:
+    """
+    Load tickers from a file
+    
+    A .csv file is read from its "ticker" or "symbol" column (or its first
+    column when neither exists). Any other file is read as one ticker per
+    line, ignoring blank lines and # comments.
+    
+    Args:
+        path: Universe file
+    
+    Returns:
+        Normalized, de-duplicated tickers in file order
+    """
+    with open(path, newline="", encoding="utf-8") as universe_file:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.reader(universe_file))
+            if not rows:
+                return []
+            header = [name.strip().lower() for name in rows[0]]
+            column = next((header.index(name) for name in TICKER_COLUMNS if name in header), None)
+            if column is None:
+                column, data_rows = 0, rows
+            else:
+                data_rows = rows[1:]
+            tickers = [row[column] for row in data_rows if len(row) > column]
+        else:
+            tickers = [line.split("#", 1)[0] for line in universe_file]
+    
+    tickers = normalize_tickers(tickers)
+    logger.info(f"Loaded {len(tickers)} tickers from {path}")
+    return tickers
+
+
+def resolve_universe(tickers: Optional[List[str]] = None, universe_file: Optional[str] = None,
+                     default: Optional[List[str]] = None) -> List[str]:
+    """
+    Pick the tickers to collect
+    
+    Explicit tickers win, then universe_file (or settings.esg_universe_file),
+    then the comma-separated settings.esg_tickers, then default.
+    """
+    if tickers:
+        return normalize_tickers(tickers)
+    universe_file = universe_file or settings.esg_universe_file
+    if universe_file:
+        return load_universe(universe_file)
+    if settings.esg_tickers:
+        return normalize_tickers(settings.esg_tickers.split(","))
+    return normalize_tickers(default or [])
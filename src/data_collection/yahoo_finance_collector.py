@@ -5,64 +5,130 @@ Collects real financial and ESG data from Yahoo Finance API
 
 import yfinance as yf
 import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import logging
 
+from .rate_limiter import RateLimiter, get_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 
+class TickerContext:
+    """
+    Memoized Yahoo Finance data for one ticker during one collection run
+    
+    The yf.Ticker object and each of its `info`, `sustainability`, `news`
+    and `history` lookups are fetched at most once, however many collector
+    methods (or concurrent stages) ask for them. Failed fetches are not
+    cached, so a later caller may retry. Create a new context for each run;
+    it never expires.
+    
+    Args:
+        ticker: Company ticker symbol
+        rate_limiter: Limiter charged once per actual Yahoo Finance request
+    """
+    
+    def __init__(self, ticker: str, rate_limiter: Optional[RateLimiter] = None):
+        self.ticker = ticker
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.fetches = 0  # Yahoo Finance requests actually made
+        self._stock = None
+        self._values: Dict[Tuple, Any] = {}
+        self._locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def stock(self) -> yf.Ticker:
+        with self._lock:
+            if self._stock is None:
+                self._stock = yf.Ticker(self.ticker)
+            return self._stock
+    
+    def info(self) -> Dict[str, Any]:
+        """Raw `info` dictionary"""
+        return self._memo(("info",), lambda: self.stock.info)
+    
+    def sustainability(self) -> Optional[pd.DataFrame]:
+        """Raw sustainability (ESG) frame"""
+        return self._memo(("sustainability",), lambda: self.stock.sustainability)
+    
+    def news(self) -> List[Dict[str, Any]]:
+        """Raw news list"""
+        return self._memo(("news",), lambda: self.stock.news)
+    
+    def history(self, **kwargs) -> pd.DataFrame:
+        """Price history; each distinct set of arguments is fetched once"""
+        return self._memo(("history",) + tuple(sorted(kwargs.items())), lambda: self.stock.history(**kwargs))
+    
+    def _memo(self, key: Tuple, fetch: Callable[[], Any]) -> Any:
+        # One lock per value: different values load concurrently, the same value only once
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            with self._lock:
+                if key in self._values:
+                    return self._values[key]
+            self.rate_limiter.acquire("yahoo_finance")
+            value = fetch()
+            with self._lock:
+                self.fetches += 1
+                self._values[key] = value
+            return value
+
+
 class YahooFinanceCollector:
     """Collects real data from Yahoo Finance API"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
         self.session = None
+        self.rate_limiter = rate_limiter or get_rate_limiter()
     
-    def get_company_info(self, ticker: str) -> Optional[Dict[str, Any]]:
+    def ticker_context(self, ticker: str) -> TickerContext:
+        """Create a memoized fetch context to share across calls for one ticker"""
+        return TickerContext(ticker, self.rate_limiter)
+    
+    def get_company_info(self, ticker: str, context: Optional[TickerContext] = None) -> Optional[Dict[str, Any]]:
         """
         Get basic company information from Yahoo Finance
         
         Args:
             ticker: Company ticker symbol
-            
+            context: Shared fetch context for the ticker (a fresh one if omitted)
+        
         Returns:
             Dictionary with company information
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            return {
-                "ticker": ticker,
-                "name": info.get("longName", info.get("shortName", ticker)),
-                "sector": info.get("sector", "Unknown"),
-                "industry": info.get("industry", "Unknown"),
-                "market_cap": info.get("marketCap", 0),
-                "country": info.get("country", "Unknown"),
-                "website": info.get("website", ""),
-                "employees": info.get("fullTimeEmployees", 0),
-                "description": info.get("longBusinessSummary", "")
-            }
+            context = context or self.ticker_context(ticker)
+            return self._format_company_info(ticker, context.info())
         except Exception as e:
             logger.error(f"Error getting company info for {ticker}: {e}")
             return None
     
-    def get_esg_scores(self, ticker: str, days_back: int = 30) -> List[Dict[str, Any]]:
+    def get_esg_scores(self, ticker: str, days_back: int = 30,
+                       context: Optional[TickerContext] = None) -> List[Dict[str, Any]]:
         """
         Get ESG scores from Yahoo Finance (if available)
         
         Args:
             ticker: Company ticker symbol
             days_back: Number of days of historical data
-            
+            context: Shared fetch context for the ticker (a fresh one if omitted)
+        
         Returns:
             List of ESG score dictionaries
         """
         try:
-            stock = yf.Ticker(ticker)
+            context = context or self.ticker_context(ticker)
             
             # Get sustainability data
-            sustainability = stock.sustainability
+            sustainability = context.sustainability()
             
             if sustainability is None or sustainability.empty:
                 logger.warning(f"No sustainability data available for {ticker}")
@@ -81,61 +147,63 @@ class YahooFinanceCollector:
                 })
             
             return scores
-            
+        
         except Exception as e:
             logger.error(f"Error getting ESG scores for {ticker}: {e}")
             return []
     
-    def get_financial_metrics(self, ticker: str, days_back: int = 30) -> List[Dict[str, Any]]:
+    def get_financial_metrics(self, ticker: str, days_back: int = 30,
+                              since: Optional[datetime] = None,
+                              context: Optional[TickerContext] = None) -> List[Dict[str, Any]]:
         """
         Get financial metrics that might correlate with ESG performance
         
         Args:
             ticker: Company ticker symbol
             days_back: Number of days of historical data
-            
+            since: Only return rows dated after this timestamp (watermark)
+            context: Shared fetch context for the ticker (a fresh one if omitted)
+        
         Returns:
             List of financial metrics
         """
         try:
-            stock = yf.Ticker(ticker)
+            context = context or self.ticker_context(ticker)
             
             # Get historical data
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
-            
-            hist = stock.history(start=start_date, end=end_date)
+            start_date = self._start_date(end_date, days_back, since)
             
-            metrics = []
-            for date, row in hist.iterrows():
-                metrics.append({
-                    "date": date.isoformat(),
-                    "stock_price": float(row["Close"]),
-                    "volume": int(row["Volume"]),
-                    "market_cap": float(row["Close"] * stock.info.get("sharesOutstanding", 0)),
-                    "data_source": "yahoo_finance"
-                })
+            hist = self._after(context.history(start=start_date, end=end_date), since)
+            if hist.empty:
+                return []
             
-            return metrics
+            shares_outstanding = context.info().get("sharesOutstanding", 0)
             
+            return self._metrics_from_history(hist, shares_outstanding)
+        
         except Exception as e:
             logger.error(f"Error getting financial metrics for {ticker}: {e}")
             return []
     
-    def get_news(self, ticker: str, days_back: int = 30) -> List[Dict[str, Any]]:
+    def get_news(self, ticker: str, days_back: int = 30,
+                 since: Optional[datetime] = None,
+                 context: Optional[TickerContext] = None) -> List[Dict[str, Any]]:
         """
         Get news articles from Yahoo Finance
         
         Args:
             ticker: Company ticker symbol
             days_back: Number of days of historical data
-            
+            since: Only return articles published after this timestamp (watermark)
+            context: Shared fetch context for the ticker (a fresh one if omitted)
+        
         Returns:
             List of news dictionaries
         """
         try:
-            stock = yf.Ticker(ticker)
-            news = stock.news
+            context = context or self.ticker_context(ticker)
+            news = context.news()
             
             if not news:
                 return []
@@ -147,7 +215,7 @@ class YahooFinanceCollector:
             for article in news:
                 pub_time = datetime.fromtimestamp(article.get("providerPublishTime", 0))
                 
-                if pub_time >= cutoff_date:
+                if pub_time >= cutoff_date and (since is None or pub_time > since):
                     filtered_news.append({
                         "date": pub_time.isoformat(),
                         "headline": article.get("title", ""),
@@ -160,11 +228,153 @@ class YahooFinanceCollector:
                     })
             
             return filtered_news
-            
+        
         except Exception as e:
             logger.error(f"Error getting news for {ticker}: {e}")
             return []
     
+    def get_batch_company_info(self, tickers: List[str], max_workers: int = 8,
+                               contexts: Optional[Dict[str, TickerContext]] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get company information for many tickers, fetching `info` once per ticker
+        
+        Args:
+            tickers: Company ticker symbols
+            max_workers: Number of concurrent `info` requests
+            contexts: Optional shared fetch contexts keyed by ticker
+        
+        Returns:
+            Dictionary mapping ticker to company information (None on failure)
+        """
+        infos = self._fetch_infos(tickers, max_workers, contexts)
+        return {
+            ticker: self._format_company_info(ticker, info) if info is not None else None
+            for ticker, info in infos.items()
+        }
+    
+    def get_batch_financial_metrics(self, tickers: List[str], days_back: int = 30,
+                                    infos: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+                                    max_workers: int = 8,
+                                    since: Optional[Dict[str, Optional[datetime]]] = None,
+                                    contexts: Optional[Dict[str, TickerContext]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get financial metrics for many tickers with one multi-symbol download
+        
+        Price history for every ticker comes from a single yf.download call;
+        `info` (for shares outstanding) is fetched once per ticker unless already
+        supplied, and market cap is computed as a vectorized column.
+        
+        Args:
+            tickers: Company ticker symbols
+            days_back: Number of days of historical data
+            infos: Optional pre-fetched raw `info` dictionaries keyed by ticker
+            max_workers: Number of concurrent `info` requests
+            since: Optional per-ticker watermarks; only newer rows are returned
+            contexts: Optional shared fetch contexts keyed by ticker (used for `info`)
+        
+        Returns:
+            Dictionary mapping ticker to its list of financial metrics
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {ticker: [] for ticker in tickers}
+        if not tickers:
+            return results
+        
+        since = since or {}
+        
+        try:
+            # The download window starts at the oldest watermark in the batch
+            end_date = datetime.now()
+            start_date = min(self._start_date(end_date, days_back, since.get(ticker)) for ticker in tickers)
+            
+            self.rate_limiter.acquire("yahoo_finance")
+            history = yf.download(
+                tickers, start=start_date, end=end_date, group_by="ticker",
+                threads=True, progress=False, auto_adjust=False
+            )
+        except Exception as e:
+            logger.error(f"Error downloading batch history for {len(tickers)} tickers: {e}")
+            return results
+        
+        if history is None or history.empty:
+            logger.warning(f"No batch history returned for {len(tickers)} tickers")
+            return results
+        
+        if infos is None:
+            infos = self._fetch_infos(tickers, max_workers, contexts)
+        
+        for ticker in tickers:
+            try:
+                if isinstance(history.columns, pd.MultiIndex):
+                    if ticker not in history.columns.get_level_values(0):
+                        logger.warning(f"No batch history returned for {ticker}")
+                        continue
+                    hist = history[ticker]
+                else:
+                    hist = history
+                
+                hist = self._after(hist.dropna(subset=["Close"]), since.get(ticker))
+                shares_outstanding = (infos.get(ticker) or {}).get("sharesOutstanding", 0)
+                results[ticker] = self._metrics_from_history(hist, shares_outstanding)
+            except Exception as e:
+                logger.error(f"Error getting financial metrics for {ticker}: {e}")
+        
+        return results
+    
+    def _start_date(self, end_date: datetime, days_back: int, since: Optional[datetime]) -> datetime:
+        """Start of the request window: days_back ago, or the watermark if newer"""
+        start_date = end_date - timedelta(days=days_back)
+        return max(start_date, since) if since is not None else start_date
+    
+    def _after(self, hist: pd.DataFrame, since: Optional[datetime]) -> pd.DataFrame:
+        """Drop history rows at or before the watermark"""
+        if since is None or hist.empty:
+            return hist
+        index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        return hist[index > pd.Timestamp(since)]
+    
+    def _fetch_infos(self, tickers: List[str], max_workers: int = 8,
+                     contexts: Optional[Dict[str, TickerContext]] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch raw `info` once per ticker, concurrently (through the tickers' contexts if given)"""
+        contexts = contexts or {}
+        
+        def fetch(ticker: str) -> Optional[Dict[str, Any]]:
+            try:
+                return (contexts.get(ticker) or self.ticker_context(ticker)).info()
+            except Exception as e:
+                logger.error(f"Error getting info for {ticker}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            return dict(zip(tickers, executor.map(fetch, tickers)))
+    
+    def _format_company_info(self, ticker: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a raw `info` dictionary into our company format"""
+        return {
+            "ticker": ticker,
+            "name": info.get("longName", info.get("shortName", ticker)),
+            "sector": info.get("sector", "Unknown"),
+            "industry": info.get("industry", "Unknown"),
+            "market_cap": info.get("marketCap", 0),
+            "country": info.get("country", "Unknown"),
+            "website": info.get("website", ""),
+            "employees": info.get("fullTimeEmployees", 0),
+            "description": info.get("longBusinessSummary", "")
+        }
+    
+    def _metrics_from_history(self, hist: pd.DataFrame, shares_outstanding: float) -> List[Dict[str, Any]]:
+        """Build metric records from a price history frame using vectorized columns"""
+        if hist.empty:
+            return []
+        
+        metrics = pd.DataFrame({
+            "date": hist.index.map(lambda date: date.isoformat()),
+            "stock_price": hist["Close"].astype(float).to_numpy(),
+            "volume": hist["Volume"].fillna(0).astype("int64").to_numpy(),
+            "market_cap": (hist["Close"] * (shares_outstanding or 0)).astype(float).to_numpy(),
+            "data_source": "yahoo_finance"
+        })
+        return metrics.to_dict("records")
+    
     def _extract_score(self, row: pd.Series, column: str) -> float:
         """Extract and normalize score from Yahoo Finance data"""
         try:
@@ -179,16 +389,19 @@ class YahooFinanceCollector:
         """
         Get all available data for a company
         
+        The four lookups share one TickerContext, so `info` is fetched once.
+        
         Args:
             ticker: Company ticker symbol
             days_back: Number of days of historical data
-            
+        
         Returns:
             Dictionary with all collected data
         """
+        context = self.ticker_context(ticker)
         return {
-            "company_info": self.get_company_info(ticker),
-            "esg_scores": self.get_esg_scores(ticker, days_back),
-            "financial_metrics": self.get_financial_metrics(ticker, days_back),
-            "news": self.get_news(ticker, days_back)
+            "company_info": self.get_company_info(ticker, context=context),
+            "esg_scores": self.get_esg_scores(ticker, days_back, context=context),
+            "financial_metrics": self.get_financial_metrics(ticker, days_back, context=context),
+            "news": self.get_news(ticker, days_back, context=context)
         }
@@ -0,0 +1,156 @@
+"""
+Near-Duplicate News Detection
+Clusters syndicated copies of the same story using SimHash fingerprints
+"""
+
+import re
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# Fingerprints at most this many bits apart are the same story. Short news texts
+# drift several bits per added or edited sentence, while unrelated texts sit
+# around 32 bits apart (fewer than 1 in a million pairs fall within 10).
+DEFAULT_MAX_DISTANCE = 10
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    """Text a news article is fingerprinted on (headline plus content)"""
+    return f"{article.get('headline') or ''} {article.get('content') or ''}"
+
+
+def _shingles(text: str, size: int = 3) -> List[str]:
+    """Overlapping word n-grams of normalized text"""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of a text
+    
+    Texts sharing most of their word 3-grams get fingerprints that differ
+    in only a few bits, so light edits (bylines, trailing sentences,
+    punctuation) between syndicated copies do not hide the match.
+    """
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in Counter(_shingles(text)).items():
+        digest = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if digest >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    Finds earlier fingerprints within max_distance bits of a new one
+    
+    Fingerprints are split into max_distance + 1 bands. Two fingerprints
+    that differ in at most max_distance bits must agree on at least one
+    whole band, so only fingerprints sharing a band are compared.
+    """
+    
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self._bands)
+        self._buckets: Dict[tuple, List[int]] = {}
+        self._fingerprints: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+    
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Position of the first indexed fingerprint near this one, if any"""
+        mask = (1 << self._band_bits) - 1
+        candidates = set()
+        for band in range(self._bands):
+            key = (band, fingerprint >> (band * self._band_bits) & mask)
+            candidates.update(self._buckets.get(key, ()))
+        for position in sorted(candidates):
+            if hamming_distance(fingerprint, self._fingerprints[position]) <= self.max_distance:
+                return position
+        return None
+    
+    def add(self, fingerprint: int) -> int:
+        """Index a fingerprint and return its position"""
+        position = len(self._fingerprints)
+        self._fingerprints.append(fingerprint)
+        mask = (1 << self._band_bits) - 1
+        for band in range(self._bands):
+            key = (band, fingerprint >> (band * self._band_bits) & mask)
+            self._buckets.setdefault(key, []).append(position)
+        return position
+
+
+def cluster_near_duplicates(texts: List[str], max_distance: int = DEFAULT_MAX_DISTANCE) -> List[List[int]]:
+    """
+    Group texts telling the same story
+    
+    Each text joins the cluster of the first earlier text within
+    max_distance bits, otherwise it starts a new cluster.
+    
+    Returns:
+        Clusters as lists of indices into texts, in order of first appearance
+    """
+    index = NearDuplicateIndex(max_distance)
+    clusters: List[List[int]] = []
+    cluster_of: List[int] = []  # index position -> cluster
+    for position, text in enumerate(texts):
+        if not _shingles(text):
+            clusters.append([position])  # nothing to compare on
+            continue
+        fingerprint = simhash(text)
+        match = index.find(fingerprint)
+        if match is None:
+            index.add(fingerprint)
+            cluster_of.append(len(clusters))
+            clusters.append([position])
+        else:
+            clusters[cluster_of[match]].append(position)
+    return clusters
+
+
+def dedupe_news(articles: List[Dict[str, Any]], max_distance: int = DEFAULT_MAX_DISTANCE) -> List[Dict[str, Any]]:
+    """
+    Keep one article per story
+    
+    The first article of each cluster is kept; the URL, source and date of
+    each copy are listed under "duplicates" so no coverage information is lost.
+    Articles that were already deduped keep their earlier duplicates, so new
+    articles can be merged into a deduped list by running it again.
+    
+    Args:
+        articles: News articles with headline and content
+        max_distance: Largest SimHash distance treated as the same story
+    
+    Returns:
+        One article per story, in input order
+    """
+    clusters = cluster_near_duplicates([article_text(article) for article in articles], max_distance)
+    unique_news = []
+    for cluster in clusters:
+        article = articles[cluster[0]]
+        duplicates = list(article.get("duplicates", []))
+        for i in cluster[1:]:
+            duplicates.append({key: articles[i].get(key) for key in ("url", "source", "date", "data_source")})
+            duplicates.extend(articles[i].get("duplicates", []))
+        article["duplicates"] = duplicates
+        unique_news.append(article)
+    
+    if len(unique_news) < len(articles):
+        logger.info(f"Collapsed {len(articles)} articles into {len(unique_news)} stories")
+    return unique_news
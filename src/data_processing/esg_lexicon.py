@@ -0,0 +1,196 @@
+"""
+ESG Lexicon
+Matches weighted, pillar-tagged ESG terms in one pass per text with an Aho-Corasick automaton
+"""
+
+import os
+import re
+import json
+import threading
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Environmental, social and governance
+PILLARS = ("E", "S", "G")
+
+# Term file shipped next to this module
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "esg_lexicon.json")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    """Lower-case with single spaces, so multi-word terms match across line breaks"""
+    return _WHITESPACE.sub(" ", (text or "").lower())
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+@dataclass
+class LexiconTerm:
+    """One lexicon entry; any of its forms counts it once"""
+    term: str
+    weight: float
+    pillar: str
+    variants: Tuple[str, ...] = ()
+
+
+@dataclass
+class LexiconScore:
+    """ESG terms found in a text and the sentiment bonus they add up to"""
+    bonus: float = 0.0
+    pillars: Dict[str, float] = field(default_factory=lambda: {pillar: 0.0 for pillar in PILLARS})
+    terms: List[str] = field(default_factory=list)  # matched terms, in order of first appearance
+
+
+class ESGLexicon:
+    """
+    Compiled ESG term matcher
+    
+    Every form of every term is compiled into one Aho-Corasick automaton, so
+    a text is scanned once however many terms the lexicon holds. Matches
+    must sit on word boundaries ("green" does not match "Greenberg"), and a
+    term counts once per text no matter how often, or in which form, it
+    occurs.
+    
+    Args:
+        terms: Lexicon entries
+        version: Version of the term file the entries came from
+    """
+    
+    def __init__(self, terms: List[LexiconTerm], version: int = 1):
+        self.terms = terms
+        self.version = version
+        # Automaton nodes: transitions, failure link and (term index, form length) outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, int]]] = [[]]
+        self._build()
+    
+    @classmethod
+    def from_file(cls, path: str) -> "ESGLexicon":
+        """
+        Load a versioned term file
+        
+        The file is a JSON object with a "version" and a list of "terms",
+        each with "term", "weight", "pillar" (E, S or G) and optional
+        "variants".
+        
+        Raises:
+            ValueError: If the file has no version or an entry is malformed
+        """
+        with open(path, encoding="utf-8") as lexicon_file:
+            data = json.load(lexicon_file)
+        if "version" not in data:
+            raise ValueError(f"ESG lexicon {path} has no version")
+        
+        terms = []
+        for entry in data.get("terms", []):
+            pillar = str(entry.get("pillar", "")).upper()
+            if pillar not in PILLARS or not entry.get("term"):
+                raise ValueError(f"Invalid ESG lexicon entry in {path}: {entry}")
+            terms.append(LexiconTerm(
+                term=entry["term"],
+                weight=float(entry["weight"]),
+                pillar=pillar,
+                variants=tuple(entry.get("variants", ()))
+            ))
+        return cls(terms, version=int(data["version"]))
+    
+    def score(self, text: str) -> LexiconScore:
+        """
+        Find the lexicon terms in a text
+        
+        Args:
+            text: Text to scan
+        
+        Returns:
+            LexiconScore with the total bonus, the bonus per pillar and the matched terms
+        """
+        text = _normalize(text)
+        found: Dict[int, None] = {}
+        state = 0
+        
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            
+            for term_index, length in self._outputs[state]:
+                if term_index in found:
+                    continue
+                start, end = position - length + 1, position + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]):
+                    continue
+                found[term_index] = None
+        
+        result = LexiconScore()
+        for term_index in found:
+            term = self.terms[term_index]
+            result.bonus += term.weight
+            result.pillars[term.pillar] += term.weight
+            result.terms.append(term.term)
+        return result
+    
+    def score_batch(self, texts: List[str]) -> List[LexiconScore]:
+        """Score many texts with the shared automaton; identical texts are scanned once"""
+        scores: Dict[str, LexiconScore] = {}
+        results = []
+        for text in texts:
+            if text not in scores:
+                scores[text] = self.score(text)
+            results.append(scores[text])
+        return results
+    
+    def _build(self):
+        for term_index, term in enumerate(self.terms):
+            for form in dict.fromkeys((term.term,) + term.variants):
+                form = _normalize(form).strip()
+                state = 0
+                for char in form:
+                    if char not in self._goto[state]:
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._outputs.append([])
+                        self._goto[state][char] = len(self._goto) - 1
+                    state = self._goto[state][char]
+                self._outputs[state].append((term_index, len(form)))
+        
+        # Breadth-first from the first-level nodes (which fail to the root), so
+        # every failure link points at a shallower, already finished node
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+
+# Global lexicon instance
+_esg_lexicon: Optional[ESGLexicon] = None
+_esg_lexicon_lock = threading.Lock()
+
+
+def get_esg_lexicon() -> ESGLexicon:
+    """Get the process-wide ESG lexicon, compiled once from settings.esg_lexicon_path (default: the bundled term file)."""
+    global _esg_lexicon
+    with _esg_lexicon_lock:
+        if _esg_lexicon is None:
+            path = settings.esg_lexicon_path or DEFAULT_LEXICON_PATH
+            _esg_lexicon = ESGLexicon.from_file(path)
+            logger.debug(f"Loaded ESG lexicon v{_esg_lexicon.version} with {len(_esg_lexicon.terms)} terms from {path}")
+        return _esg_lexicon
@@ -0,0 +1,236 @@
+"""
+ONNX Runtime Sentiment Backend
+Runs the sentiment model as a dynamically int8-quantized ONNX graph on CPU
+
+The model is exported from PyTorch and quantized once into a model
+directory; later runs only load the quantized graph. ONNXSentimentModel is
+called like the Hugging Face pipeline it replaces, so SentimentAnalyzer
+treats both backends the same.
+
+Usage:
+    python -m src.data_processing.onnx_backend --texts headlines.txt
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# File names inside the model directory
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model.int8.onnx"
+
+# ONNX opset used for the export
+OPSET_VERSION = 14
+
+# Texts scored when no --texts file is given to the drift report
+SAMPLE_TEXTS = [
+    "Company announces plan to reach net zero emissions by 2030",
+    "Regulators fine the manufacturer over repeated pollution violations",
+    "Board adds two independent directors after governance review",
+    "Quarterly results in line with expectations",
+    "Investigation into discrimination claims widens at the retailer",
+    "New solar farm doubles the utility's renewable capacity",
+    "Shareholders reject proposal on climate risk disclosure",
+    "The firm published its annual sustainability report on Tuesday",
+    "Workers strike over unsafe conditions at the mining site",
+    "Green bond issuance oversubscribed as investors seek ESG exposure"
+]
+
+
+def default_model_dir(model_name: str) -> str:
+    """Model directory used when SENTIMENT_ONNX_DIR is not set"""
+    return os.path.join(tempfile.gettempdir(), "esg_tracker_onnx", model_name.replace("/", "--"))
+
+
+def export_quantized_model(model_name: str, model_dir: str) -> str:
+    """
+    Export a Hugging Face sequence classifier to ONNX and quantize it to int8
+    
+    Weights of the linear layers are quantized ahead of time; activations
+    are quantized dynamically per batch, so no calibration data is needed.
+    The tokenizer and config are saved next to the graph.
+    
+    Args:
+        model_name: Hugging Face model id
+        model_dir: Directory the files are written to
+    
+    Returns:
+        Path of the quantized model
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    
+    fp32_path = os.path.join(model_dir, FP32_MODEL_FILE)
+    int8_path = os.path.join(model_dir, INT8_MODEL_FILE)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    
+    logger.info(f"Exporting {model_name} to ONNX in {model_dir}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in input_names), fp32_path,
+            input_names=input_names, output_names=["logits"],
+            dynamic_axes=dynamic_axes, opset_version=OPSET_VERSION
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    
+    tokenizer.save_pretrained(model_dir)
+    model.config.save_pretrained(model_dir)
+    return int8_path
+
+
+class ONNXSentimentModel:
+    """
+    Quantized sentiment classifier on ONNX Runtime
+    
+    Called like a Hugging Face text-classification pipeline built with
+    return_all_scores=True: one list of {"label", "score"} dictionaries per
+    text, scores being softmax probabilities over every label.
+    
+    Args:
+        model_name: Hugging Face model id, exported on first use
+        model_dir: Directory holding (or receiving) the quantized model
+        num_threads: Intra-op threads per session run (defaults to the CPU count)
+    """
+    
+    def __init__(self, model_name: str, model_dir: Optional[str] = None, num_threads: Optional[int] = None):
+        if not ONNX_AVAILABLE:
+            raise ImportError("onnxruntime and numpy are required for the ONNX sentiment backend")
+        from transformers import AutoConfig, AutoTokenizer
+        
+        self.model_name = model_name
+        self.model_dir = model_dir or default_model_dir(model_name)
+        model_path = os.path.join(self.model_dir, INT8_MODEL_FILE)
+        if not os.path.exists(model_path):
+            model_path = export_quantized_model(model_name, self.model_dir)
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        config = AutoConfig.from_pretrained(self.model_dir)
+        self.labels = [config.id2label[index].lower() for index in range(len(config.id2label))]
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        # One graph runs at a time; parallelism comes from the intra-op threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+    
+    def __call__(self, texts: Union[str, List[str]], batch_size: int = 1, truncation: bool = True,
+                 max_length: int = 512) -> List[List[Dict[str, Any]]]:
+        if isinstance(texts, str):
+            texts = [texts]
+        
+        outputs = []
+        for start in range(0, len(texts), max(1, batch_size)):
+            # Padded to the longest text of this batch only
+            encoded = self.tokenizer(
+                texts[start:start + batch_size], padding=True, truncation=truncation,
+                max_length=max_length, return_tensors="np"
+            )
+            feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            logits = self.session.run(None, feed)[0]
+            probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            outputs.extend(
+                [{"label": label, "score": float(score)} for label, score in zip(self.labels, row)]
+                for row in probabilities
+            )
+        return outputs
+
+
+def drift_report(reference: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compare two backends' results for the same texts
+    
+    Args:
+        reference: Results of the PyTorch backend (analyze_huggingface_* format)
+        candidate: Results of the backend under test, in the same order
+    
+    Returns:
+        texts, label_agreement (fraction of equal labels), mean and max
+        absolute sentiment_score difference, and the disagreeing pairs as
+        {"index", "reference", "candidate"} with their labels
+    """
+    if len(reference) != len(candidate):
+        raise ValueError(f"Got {len(reference)} reference and {len(candidate)} candidate results")
+    
+    differences = [abs(ref["sentiment_score"] - cand["sentiment_score"]) for ref, cand in zip(reference, candidate)]
+    disagreements = [
+        {"index": index, "reference": ref["sentiment_label"], "candidate": cand["sentiment_label"]}
+        for index, (ref, cand) in enumerate(zip(reference, candidate))
+        if ref["sentiment_label"] != cand["sentiment_label"]
+    ]
+    count = len(reference)
+    return {
+        "texts": count,
+        "label_agreement": (count - len(disagreements)) / count if count else 1.0,
+        "mean_score_diff": sum(differences) / count if count else 0.0,
+        "max_score_diff": max(differences, default=0.0),
+        "disagreements": disagreements
+    }
+
+
+def main():
+    """Score texts with both backends and print the accuracy drift and throughput"""
+    parser = argparse.ArgumentParser(description="Accuracy drift of the quantized ONNX backend against PyTorch")
+    parser.add_argument("--texts", default=None, help="File with one text per line (default: built-in samples)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    from src.config import settings
+    from .sentiment_analyzer import SentimentAnalyzer
+    
+    # No result cache, so both backends really score every text
+    settings.sentiment_cache = False
+    
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as texts_file:
+            texts = [line.strip() for line in texts_file if line.strip()]
+    else:
+        texts = SAMPLE_TEXTS
+    
+    results = {}
+    for backend in ("pytorch", "onnx"):
+        analyzer = SentimentAnalyzer(batch_size=args.batch_size, backend=backend).warmup()
+        if analyzer.backend != backend:
+            print(f"The {backend} backend is not available")
+            return
+        start = time.perf_counter()
+        results[backend] = analyzer.analyze_huggingface_batch(texts)
+        elapsed = time.perf_counter() - start
+        print(f"{backend}: {len(texts)} texts in {elapsed:.2f}s ({len(texts) / elapsed:.1f} texts/s)")
+    
+    report = drift_report(results["pytorch"], results["onnx"])
+    print(f"Label agreement: {report['label_agreement']:.1%} over {report['texts']} texts")
+    print(f"Sentiment score difference: mean {report['mean_score_diff']:.4f}, max {report['max_score_diff']:.4f}")
+    for disagreement in report["disagreements"]:
+        print(f"  {disagreement['reference']} -> {disagreement['candidate']}: {texts[disagreement['index']][:80]}")
+
+
+if __name__ == "__main__":
+    main()
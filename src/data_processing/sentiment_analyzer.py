@@ -3,37 +3,188 @@ Sentiment Analysis Module
 Analyzes sentiment of ESG-related news articles
 """
 
-from transformers import pipeline
-from textblob import TextBlob
-import nltk
-from typing import Dict, List, Any
+import time
+import threading
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 import logging
 
+from src.config import settings
+from .esg_lexicon import ESGLexicon, LexiconScore, get_esg_lexicon
+from .sentiment_cache import SentimentCache, get_sentiment_cache, normalize_text
+
 logger = logging.getLogger(__name__)
 
+# Hugging Face model used when it can be loaded (TextBlob otherwise)
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment-latest"
 
-class SentimentAnalyzer:
-    """Analyzes sentiment of ESG news articles"""
-    
-    def __init__(self):
+# Model runtimes; "onnx" runs the int8-quantized export on ONNX Runtime (see onnx_backend)
+BACKEND_PYTORCH = "pytorch"
+BACKEND_ONNX = "onnx"
+
+# Bump when the scoring logic changes, so cached results of the old logic are not served
+SCORING_VERSION = 1
+
+# Characters of each article passed to the model
+MAX_TEXT_CHARS = 500
+
+# Token limit of the RoBERTa model
+MAX_TOKENS = 512
+
+
+# NLTK resources, checked locally before anything is downloaded
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "vader_lexicon": "sentiment/vader_lexicon.zip"
+}
+
+_nltk_ready = False
+_nltk_lock = threading.Lock()
+
+
+def _ensure_nltk_data():
+    """Download missing NLTK data once per process; nothing is fetched when it is already installed"""
+    global _nltk_ready
+    with _nltk_lock:
+        if _nltk_ready:
+            return
         try:
-            # Download required NLTK data
-            nltk.download('punkt', quiet=True)
-            nltk.download('vader_lexicon', quiet=True)
+            import nltk
             
-            # Initialize Hugging Face sentiment pipeline
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis",
-                model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-                return_all_scores=True
-            )
+            for resource, path in NLTK_RESOURCES.items():
+                try:
+                    nltk.data.find(path)
+                except LookupError:
+                    nltk.download(resource, quiet=True)
         except Exception as e:
-            logger.warning(f"Could not initialize sentiment pipeline: {e}")
-            self.sentiment_pipeline = None
+            logger.warning(f"Could not prepare NLTK data: {e}")
+        _nltk_ready = True
+
+
+class SentimentAnalyzer:
+    """
+    Analyzes sentiment of ESG news articles
+    
+    Nothing heavy happens on construction: NLTK data and the model are
+    loaded on first use (or by warmup()), so importing the collectors costs
+    nothing for runs that never score text. Texts already in the result
+    cache are served without loading the model at all.
+    
+    Args:
+        batch_size: Articles per forward pass (defaults to settings.sentiment_batch_size)
+        num_threads: Intra-op threads of torch or ONNX Runtime (defaults to settings.sentiment_threads; 0 keeps the runtime's default)
+        cache: Result cache (defaults to the process-wide cache for this model; see sentiment_cache)
+        backend: BACKEND_PYTORCH or BACKEND_ONNX (defaults to settings.sentiment_backend); falls back to PyTorch
+        model_dir: Local copy of the model (save_pretrained output) for offline use (defaults to settings.sentiment_model_dir)
+        lexicon: ESG terms adjusting the scores (defaults to the process-wide lexicon; see esg_lexicon)
+    """
+    
+    def __init__(self, batch_size: Optional[int] = None, num_threads: Optional[int] = None,
+                 cache: Optional[SentimentCache] = None, backend: Optional[str] = None,
+                 model_dir: Optional[str] = None, lexicon: Optional[ESGLexicon] = None):
+        self.batch_size = max(1, batch_size or settings.sentiment_batch_size)
+        self.num_threads = num_threads if num_threads is not None else settings.sentiment_threads
+        self.backend = (backend or settings.sentiment_backend).lower()
+        self.model_dir = model_dir or settings.sentiment_model_dir or None
+        self.lexicon = lexicon or get_esg_lexicon()
+        self._given_cache = cache
+        self._pipeline = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        
+        # Until the model is loaded, assume it will load; cached results of this model stay valid either way
+        self._set_model_version(model_available=True)
+    
+    @property
+    def sentiment_pipeline(self) -> Any:
+        """The loaded model (pipeline or ONNXSentimentModel), loading it on first access; None if unavailable"""
+        if not self._loaded:
+            self._load()
+        return self._pipeline
+    
+    @property
+    def loaded(self) -> bool:
+        """Whether the model has been loaded (or found unavailable)"""
+        return self._loaded
+    
+    def warmup(self) -> "SentimentAnalyzer":
+        """
+        Load the model now and run one text through it
+        
+        Call this where the start-up time is cheap to hide (e.g. while the
+        first network fetches run) instead of paying it on the first article.
+        
+        Returns:
+            The analyzer, so calls can be chained
+        """
+        model = self.sentiment_pipeline
+        if model is not None:
+            try:
+                model(["warmup"], batch_size=1, truncation=True, max_length=MAX_TOKENS)
+            except Exception as e:
+                logger.warning(f"Sentiment model warmup run failed: {e}")
+        return self
+    
+    def _load(self):
+        with self._load_lock:
+            if self._loaded:
+                return
+            started_at = time.monotonic()
+            _ensure_nltk_data()
+            if self.num_threads > 0 and self.backend != BACKEND_ONNX:
+                try:
+                    import torch
+                    # Process-wide; one thread pool per forward pass
+                    torch.set_num_threads(self.num_threads)
+                except ImportError:
+                    logger.warning("torch is not installed; SENTIMENT_THREADS is ignored")
+            
+            model_source = self.model_dir or MODEL_NAME
+            if self.backend == BACKEND_ONNX:
+                try:
+                    from .onnx_backend import ONNXSentimentModel
+                    # Same call and output contract as the pipeline below
+                    self._pipeline = ONNXSentimentModel(
+                        model_source, settings.sentiment_onnx_dir, num_threads=self.num_threads or None
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not initialize ONNX sentiment model, using PyTorch: {e}")
+                    self.backend = BACKEND_PYTORCH
+            
+            if self._pipeline is None:
+                try:
+                    from transformers import pipeline
+                    
+                    # Initialize Hugging Face sentiment pipeline
+                    self._pipeline = pipeline(
+                        "sentiment-analysis",
+                        model=model_source,
+                        return_all_scores=True
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not initialize sentiment pipeline: {e}")
+                    self._pipeline = None
+            
+            self._set_model_version(model_available=self._pipeline is not None)
+            self._loaded = True
+            logger.info(f"Sentiment model ready ({self.model_version}) in {time.monotonic() - started_at:.1f}s")
+    
+    def _set_model_version(self, model_available: bool):
+        # Only results of the method this analyzer normally uses are cached, never error fallbacks.
+        # Quantized scores differ slightly from PyTorch ones, so each backend has its own entries.
+        self.method = "huggingface" if model_available else "textblob"
+        if not model_available:
+            self.model_version = f"textblob@{SCORING_VERSION}"
+        elif self.backend == BACKEND_ONNX:
+            self.model_version = f"{MODEL_NAME}:onnx-int8@{SCORING_VERSION}"
+        else:
+            self.model_version = f"{MODEL_NAME}@{SCORING_VERSION}"
+        self.cache = self._given_cache if self._given_cache is not None else get_sentiment_cache(self.model_version)
     
     def analyze_textblob_sentiment(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment using TextBlob"""
         try:
+            from textblob import TextBlob
+            
             blob = TextBlob(text)
             
             # Get polarity (-1 to 1) and subjectivity (0 to 1)
@@ -64,75 +215,150 @@ class SentimentAnalyzer:
             }
     
     def analyze_huggingface_sentiment(self, text: str) -> Dict[str, Any]:
-        """Analyze sentiment using Hugging Face transformers"""
+        """Analyze sentiment using Hugging Face transformers, served from the cache for text seen before"""
+        cached = self.cache.get(text) if self.cache else None
+        if cached is not None:
+            return cached
+        
+        result = self._score(text)
+        self._remember([(text, result)])
+        return result
+    
+    def _score(self, text: str) -> Dict[str, Any]:
+        """Run the model (or TextBlob) on one text"""
         if not self.sentiment_pipeline:
             return self.analyze_textblob_sentiment(text)
         
         try:
             # Truncate text if too long
-            if len(text) > 500:
-                text = text[:500]
+            if len(text) > MAX_TEXT_CHARS:
+                text = text[:MAX_TEXT_CHARS]
             
             results = self.sentiment_pipeline(text)
-            
-            # Extract scores
-            scores = results[0]
-            positive_score = next((score['score'] for score in scores if score['label'] == 'positive'), 0)
-            negative_score = next((score['score'] for score in scores if score['label'] == 'negative'), 0)
-            neutral_score = next((score['score'] for score in scores if score['label'] == 'neutral'), 0)
-            
-            # Calculate overall sentiment
-            sentiment_score = positive_score - negative_score
-            
-            # Determine label
-            if positive_score > negative_score and positive_score > neutral_score:
-                sentiment_label = "positive"
-            elif negative_score > positive_score and negative_score > neutral_score:
-                sentiment_label = "negative"
-            else:
-                sentiment_label = "neutral"
-            
-            return {
-                "sentiment_score": sentiment_score,
-                "sentiment_label": sentiment_label,
-                "positive_score": positive_score,
-                "negative_score": negative_score,
-                "neutral_score": neutral_score,
-                "method": "huggingface"
-            }
+            return self._scores_to_sentiment(results[0])
         except Exception as e:
             logger.error(f"Error in Hugging Face sentiment analysis: {e}")
             return self.analyze_textblob_sentiment(text)
     
+    def analyze_huggingface_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze many texts with batched transformer inference
+        
+        Cached texts are served from the cache and each distinct remaining
+        text is scored once. Those are sorted by token length and run
+        batch_size at a time, so each batch is padded only to its own
+        longest text instead of every text being run (and padded) on its own.
+        
+        Args:
+            texts: Texts to analyze
+        
+        Returns:
+            One sentiment result per text, in input order
+        """
+        results = self.cache.get_many(texts) if self.cache else [None] * len(texts)
+        
+        pending: Dict[str, List[int]] = {}
+        for index, result in enumerate(results):
+            if result is None:
+                pending.setdefault(normalize_text(texts[index]), []).append(index)
+        unique_texts = [texts[indexes[0]] for indexes in pending.values()]
+        
+        scored = self._score_batch(unique_texts)
+        for indexes, result in zip(pending.values(), scored):
+            for index in indexes:
+                results[index] = dict(result)
+        self._remember(zip(unique_texts, scored))
+        return results
+    
+    def cache_stats(self, since: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Result cache hit/miss counts and hit rate (see SentimentCache.stats); None without a cache"""
+        return self.cache.stats(since) if self.cache else None
+    
+    def _remember(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        if self.cache:
+            self.cache.put_many((text, result) for text, result in items if result.get("method") == self.method)
+    
+    def _score_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Run the model on many texts in length-sorted batches"""
+        if not texts:
+            return []
+        if not self.sentiment_pipeline:
+            return [self.analyze_textblob_sentiment(text) for text in texts]
+        
+        texts = [text[:MAX_TEXT_CHARS] for text in texts]
+        try:
+            order = sorted(range(len(texts)), key=self._token_lengths(texts).__getitem__)
+            outputs = self.sentiment_pipeline(
+                [texts[index] for index in order],
+                batch_size=self.batch_size, truncation=True, max_length=MAX_TOKENS
+            )
+            results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+            for index, scores in zip(order, outputs):
+                results[index] = self._scores_to_sentiment(scores)
+            return results
+        except Exception as e:
+            logger.error(f"Error in batched Hugging Face sentiment analysis, scoring one at a time: {e}")
+            return [self._score(text) for text in texts]
+    
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count per text, falling back to characters without a tokenizer"""
+        tokenizer = getattr(self.sentiment_pipeline, "tokenizer", None)
+        if tokenizer is None:
+            return [len(text) for text in texts]
+        encoded = tokenizer(texts, truncation=True, max_length=MAX_TOKENS)
+        return [len(input_ids) for input_ids in encoded["input_ids"]]
+    
+    def _scores_to_sentiment(self, scores: Any) -> Dict[str, Any]:
+        """Convert the model's per-label scores into our sentiment format"""
+        if isinstance(scores, dict):
+            scores = [scores]
+        
+        positive_score = next((score['score'] for score in scores if score['label'] == 'positive'), 0)
+        negative_score = next((score['score'] for score in scores if score['label'] == 'negative'), 0)
+        neutral_score = next((score['score'] for score in scores if score['label'] == 'neutral'), 0)
+        
+        # Calculate overall sentiment
+        sentiment_score = positive_score - negative_score
+        
+        # Determine label
+        if positive_score > negative_score and positive_score > neutral_score:
+            sentiment_label = "positive"
+        elif negative_score > positive_score and negative_score > neutral_score:
+            sentiment_label = "negative"
+        else:
+            sentiment_label = "neutral"
+        
+        return {
+            "sentiment_score": sentiment_score,
+            "sentiment_label": sentiment_label,
+            "positive_score": positive_score,
+            "negative_score": negative_score,
+            "neutral_score": neutral_score,
+            "method": "huggingface"
+        }
+    
     def analyze_esg_sentiment(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment with ESG-specific considerations"""
         # First get general sentiment
-        sentiment = self.analyze_huggingface_sentiment(text)
-        
-        # Add ESG-specific analysis
-        esg_keywords = {
-            "positive": [
-                "sustainability", "renewable", "green", "carbon neutral", "diversity",
-                "inclusion", "transparency", "governance", "ethical", "responsible"
-            ],
-            "negative": [
-                "pollution", "emissions", "controversy", "scandal", "violation",
-                "fined", "investigation", "corruption", "discrimination"
-            ]
-        }
-        
-        text_lower = text.lower()
-        esg_bonus = 0.0
+        return self._adjust_for_esg(text, self.analyze_huggingface_sentiment(text))
+    
+    def _adjust_for_esg(self, text: str, sentiment: Dict[str, Any],
+                        lexicon_score: Optional[LexiconScore] = None) -> Dict[str, Any]:
+        """
+        Shift a general sentiment result by the ESG lexicon terms found in the text
         
-        # Check for positive ESG keywords
-        for keyword in esg_keywords["positive"]:
-            if keyword in text_lower:
-                esg_bonus += 0.1
+        Args:
+            text: The scored text
+            sentiment: General sentiment result for the text
+            lexicon_score: Precomputed lexicon match of the text (scored here if omitted)
         
-        # Check for negative ESG keywords
-        for keyword in esg_keywords["negative"]:
-            if keyword in text_lower:
-                esg_bonus -= 0.1
+        Returns:
+            The adjusted result with the total esg_bonus, its E/S/G breakdown
+            (esg_pillar_bonus) and the matched esg_terms
+        """
+        if lexicon_score is None:
+            lexicon_score = self.lexicon.score(text)
+        esg_bonus = lexicon_score.bonus
         
         # Adjust sentiment score
         adjusted_score = max(-1.0, min(1.0, sentiment["sentiment_score"] + esg_bonus))
@@ -150,20 +376,24 @@ class SentimentAnalyzer:
             "sentiment_score": adjusted_score,
             "sentiment_label": adjusted_label,
             "esg_bonus": esg_bonus,
+            "esg_pillar_bonus": dict(lexicon_score.pillars),
+            "esg_terms": list(lexicon_score.terms),
             "method": "esg_enhanced"
         }
     
     def analyze_news_batch(self, news_articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Analyze sentiment for a batch of news articles"""
+        """Analyze sentiment for a batch of news articles with batched model inference"""
         analyzed_news = []
         
-        for article in news_articles:
+        # Combine headline and content for analysis
+        texts = [f"{article.get('headline', '')} {article.get('content', '')}" for article in news_articles]
+        sentiments = self.analyze_huggingface_batch(texts)
+        lexicon_scores = self.lexicon.score_batch(texts)
+        
+        for article, text, sentiment, lexicon_score in zip(news_articles, texts, sentiments, lexicon_scores):
             try:
-                # Combine headline and content for analysis
-                text = f"{article.get('headline', '')} {article.get('content', '')}"
-                
                 # Analyze sentiment
-                sentiment_result = self.analyze_esg_sentiment(text)
+                sentiment_result = self._adjust_for_esg(text, sentiment, lexicon_score)
                 
                 # Update article with sentiment data
                 article.update({
@@ -173,7 +403,7 @@ class SentimentAnalyzer:
                 })
                 
                 analyzed_news.append(article)
-                
+            
             except Exception as e:
                 logger.error(f"Error analyzing sentiment for article: {e}")
                 # Keep article with neutral sentiment
@@ -185,3 +415,17 @@ class SentimentAnalyzer:
                 analyzed_news.append(article)
         
         return analyzed_news
+
+
+# Global sentiment analyzer instance
+_sentiment_analyzer: Optional[SentimentAnalyzer] = None
+_sentiment_analyzer_lock = threading.Lock()
+
+
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    """Get the process-wide sentiment analyzer, so every orchestrator shares one loaded model."""
+    global _sentiment_analyzer
+    with _sentiment_analyzer_lock:
+        if _sentiment_analyzer is None:
+            _sentiment_analyzer = SentimentAnalyzer()
+        return _sentiment_analyzer
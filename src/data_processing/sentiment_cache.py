@@ -0,0 +1,208 @@
+"""
+Sentiment Cache
+Remembers sentiment results by normalized text, in memory and in a SQLite file shared across runs
+"""
+
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keys per SELECT ... IN (...) when looking up a batch on disk
+LOOKUP_CHUNK_SIZE = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a text for cache lookups
+    
+    Unicode compatibility forms are folded and runs of whitespace collapsed.
+    Case is kept: the transformer model is case-sensitive, so differently
+    cased texts can score differently.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def text_key(text: str, model_version: str) -> str:
+    """Cache key of a text scored by one model version"""
+    return hashlib.sha256(f"{model_version}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Two-level cache of sentiment results
+    
+    Lookups go to an in-process LRU first and to the SQLite file second;
+    disk hits are promoted into the LRU. Keys hash the normalized text
+    together with the model version, so results of another model (or of
+    older scoring logic) are never served.
+    
+    Args:
+        path: SQLite file, shared by every process using the same model
+        model_version: Identifies the model and scoring logic producing the results
+        memory_size: Results kept in the in-process LRU
+    """
+    
+    def __init__(self, path: str, model_version: str, memory_size: int = 10000):
+        self.path = path
+        self.model_version = model_version
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS sentiment_results (
+                    key TEXT PRIMARY KEY,
+                    model_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One SQLite connection per thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+    
+    def key(self, text: str) -> str:
+        """Cache key of a text for this model version"""
+        return text_key(text, self.model_version)
+    
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """Cached result for a text, or None"""
+        return self.get_many([text])[0]
+    
+    def get_many(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up many texts at once
+        
+        Args:
+            texts: Texts to look up
+        
+        Returns:
+            Cached result or None per text, in input order
+        """
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        
+        with self._lock:
+            for index, key in enumerate(keys):
+                result = self._memory.get(key)
+                if result is None:
+                    missing.setdefault(key, []).append(index)
+                else:
+                    self._memory.move_to_end(key)
+                    results[index] = dict(result)
+                    self._counters["memory_hits"] += 1
+        
+        found = self._load(list(missing)) if missing else {}
+        with self._lock:
+            for key, indexes in missing.items():
+                result = found.get(key)
+                if result is None:
+                    self._counters["misses"] += len(indexes)
+                    continue
+                self._remember(key, result)
+                self._counters["disk_hits"] += len(indexes)
+                for index in indexes:
+                    results[index] = dict(result)
+        return results
+    
+    def put(self, text: str, result: Dict[str, Any]):
+        """Store the result for a text"""
+        self.put_many([(text, result)])
+    
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Store many (text, result) pairs in one transaction"""
+        rows = {self.key(text): dict(result) for text, result in items}
+        if not rows:
+            return
+        
+        with self._lock:
+            for key, result in rows.items():
+                self._remember(key, result)
+        now = time.time()
+        try:
+            with self._connection() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO sentiment_results (key, model_version, result, created_at) VALUES (?, ?, ?, ?)",
+                    [(key, self.model_version, json.dumps(result), now) for key, result in rows.items()]
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist {len(rows)} sentiment results: {e}")
+    
+    def stats(self, since: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Hit and miss counts with the hit rate
+        
+        Args:
+            since: An earlier stats() result; counts are then for the period after it
+        
+        Returns:
+            memory_hits, disk_hits, misses, lookups and hit_rate (0.0 to 1.0)
+        """
+        with self._lock:
+            counts = dict(self._counters)
+        if since:
+            counts = {name: count - since.get(name, 0) for name, count in counts.items()}
+        lookups = sum(counts.values())
+        hits = counts["memory_hits"] + counts["disk_hits"]
+        return {**counts, "lookups": lookups, "hit_rate": hits / lookups if lookups else 0.0}
+    
+    def _remember(self, key: str, result: Dict[str, Any]):
+        # Caller holds self._lock
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def _load(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        try:
+            connection = self._connection()
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+                rows = connection.execute(
+                    f"SELECT key, result FROM sentiment_results WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, json.loads(result)) for key, result in rows)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Could not read cached sentiment results: {e}")
+        return found
+
+
+# Global sentiment caches, one per model version
+_sentiment_caches: Dict[str, SentimentCache] = {}
+_sentiment_caches_lock = threading.Lock()
+
+
+def get_sentiment_cache(model_version: str) -> Optional[SentimentCache]:
+    """Get the process-wide cache for a model version (None when settings.sentiment_cache is off)."""
+    if not settings.sentiment_cache:
+        return None
+    with _sentiment_caches_lock:
+        if model_version not in _sentiment_caches:
+            _sentiment_caches[model_version] = SentimentCache(
+                settings.sentiment_cache_path, model_version, memory_size=settings.sentiment_cache_size
+            )
+        return _sentiment_caches[model_version]
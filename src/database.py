@@ -3,10 +3,16 @@ Database utilities for the ESG Data Tracker.
 Handles Supabase connection and SQLAlchemy models.
 """
 
+import uuid
 import logging
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterable, List, Optional, Dict, Any, Set
+from sqlalchemy import (
+    create_engine, inspect, text, Column, Integer, BigInteger, String, Float, Date, DateTime, Text, Boolean, Index,
+    UniqueConstraint, and_, func, or_
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from supabase import create_client, Client
@@ -53,6 +59,7 @@ class ESGScores(Base):
 class News(Base):
     """ESG-related news table."""
     __tablename__ = "news"
+    __table_args__ = (Index("idx_news_company_url", "company_id", "url"),)
     
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, nullable=False)
@@ -63,6 +70,7 @@ class News(Base):
     url = Column(String(500))
     sentiment_score = Column(Float)
     sentiment_label = Column(String(20))
+    relevance_score = Column(Float)  # how central the company is to the article (Alpha Vantage feed)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -82,6 +90,87 @@ class Metrics(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class StockPrice(Base):
+    """Daily price history, keyed by ticker so prices can be stored before the company row exists."""
+    __tablename__ = "stock_prices"
+    __table_args__ = (UniqueConstraint("ticker", "date", name="uq_stock_prices_ticker_date"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String(10), nullable=False, index=True)
+    date = Column(DateTime, nullable=False)
+    stock_price = Column(Float)
+    volume = Column(BigInteger)
+    market_cap = Column(Float)
+    data_source = Column(String(50))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IngestionWatermark(Base):
+    """Last successfully ingested timestamp per ticker and source."""
+    __tablename__ = "ingestion_watermarks"
+    __table_args__ = (UniqueConstraint("ticker", "source", name="uq_watermark_ticker_source"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String(10), nullable=False, index=True)
+    source = Column(String(50), nullable=False)
+    last_ingested_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Collection job states
+JOB_PENDING = "pending"
+JOB_LEASED = "leased"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class CollectionJob(Base):
+    """Collection work queue: one feed for one ticker, leased by collector workers."""
+    __tablename__ = "collection_jobs"
+    __table_args__ = (UniqueConstraint("feed", "ticker", name="uq_collection_job_feed_ticker"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    feed = Column(String(20), nullable=False)
+    ticker = Column(String(10), nullable=False, index=True)
+    days_back = Column(Integer, default=30)
+    status = Column(String(20), nullable=False, default=JOB_PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_owner = Column(String(100))
+    lease_token = Column(String(36), index=True)
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EarningsCalendar(Base):
+    """Upcoming earnings reports for the whole market, replaced by each daily bulk download."""
+    __tablename__ = "earnings_calendar"
+    __table_args__ = (UniqueConstraint("symbol", "report_date", name="uq_earnings_symbol_report_date"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    name = Column(String(255))
+    report_date = Column(Date, nullable=False)
+    fiscal_date_ending = Column(Date)
+    estimate = Column(Float)
+    currency = Column(String(10))
+    ingested_at = Column(DateTime, nullable=False, index=True)
+
+
+# Rows written per statement when replacing the earnings calendar
+EARNINGS_CHUNK_SIZE = 1000
+
+# URLs looked up per query when checking which articles are already stored
+URL_LOOKUP_CHUNK_SIZE = 200
+
+# Columns added after a table was first created; create_all does not add them to existing SQLite files
+ADDED_COLUMNS = {
+    "news": {"relevance_score": "FLOAT"}
+}
+
+
 class DatabaseManager:
     """Database manager for handling Supabase and SQLAlchemy operations."""
     
@@ -99,17 +188,29 @@ class DatabaseManager:
                 # Use SQLite for local development
                 self.engine = create_engine("sqlite:///./esg_data.db")
                 Base.metadata.create_all(bind=self.engine)
+                self._add_missing_columns()
                 self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
                 logger.info("SQLAlchemy engine initialized for local development")
             else:
                 # Initialize Supabase client for production
                 self.supabase = create_client(settings.supabase_url, settings.supabase_key)
                 logger.info("Supabase client initialized successfully")
-            
+        
         except Exception as e:
             logger.error(f"Failed to initialize database connections: {e}")
             raise
     
+    def _add_missing_columns(self):
+        """Add columns introduced since an existing development database was created."""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {column["name"] for column in inspector.get_columns(table)}
+                for name, column_type in columns.items():
+                    if name not in existing:
+                        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+                        logger.info(f"Added column {table}.{name}")
+    
     def get_session(self) -> Session:
         """Get a database session."""
         if not self.SessionLocal:
@@ -169,6 +270,95 @@ class DatabaseManager:
             logger.error(f"Failed to insert news: {e}")
             raise
     
+    def get_news_urls(self, company_id: int, urls: List[str]) -> Set[str]:
+        """Return which of these article URLs are already stored for a company."""
+        urls = list({url for url in urls if url})
+        stored: Set[str] = set()
+        try:
+            for start in range(0, len(urls), URL_LOOKUP_CHUNK_SIZE):
+                chunk = urls[start:start + URL_LOOKUP_CHUNK_SIZE]
+                if settings.environment == "development":
+                    with self.get_session() as session:
+                        rows = session.query(News.url).filter(
+                            News.company_id == company_id, News.url.in_(chunk)
+                        ).all()
+                        stored.update(row.url for row in rows)
+                else:
+                    result = self.supabase.table("news").select("url").eq(
+                        "company_id", company_id
+                    ).in_("url", chunk).execute()
+                    stored.update(row["url"] for row in result.data)
+            return stored
+        except Exception as e:
+            logger.error(f"Failed to look up stored news URLs: {e}")
+            return set()
+    
+    def insert_esg_scores_batch(self, scores_data: List[Dict[str, Any]]) -> int:
+        """Insert many ESG score rows in one transaction; returns the number inserted."""
+        return self._insert_batch(ESGScores, scores_data)
+    
+    def insert_news_batch(self, news_data: List[Dict[str, Any]]) -> int:
+        """Insert many news articles in one transaction; returns the number inserted."""
+        return self._insert_batch(News, news_data)
+    
+    def upsert_stock_prices_batch(self, prices_data: List[Dict[str, Any]]) -> int:
+        """Insert or update daily prices keyed by (ticker, date) in one transaction; returns the number written."""
+        return self._upsert_batch(StockPrice, prices_data, ["ticker", "date"])
+    
+    def _insert_batch(self, model, rows: List[Dict[str, Any]]) -> int:
+        """Insert rows into a model's table, dropping keys that are not columns."""
+        if not rows:
+            return 0
+        columns = {column.name for column in model.__table__.columns}
+        rows = [{key: value for key, value in row.items() if key in columns} for row in rows]
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    session.bulk_insert_mappings(model, rows)
+                    session.commit()
+            else:
+                rows = [
+                    {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+                    for row in rows
+                ]
+                self.supabase.table(model.__tablename__).insert(rows).execute()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to insert {len(rows)} rows into {model.__tablename__}: {e}")
+            raise
+    
+    def _upsert_batch(self, model, rows: List[Dict[str, Any]], key_columns: List[str]) -> int:
+        """Insert rows, updating those whose key columns match a stored row (the last duplicate in rows wins)."""
+        columns = {column.name for column in model.__table__.columns}
+        # Postgres rejects an upsert that touches the same row twice, so duplicates are collapsed first
+        rows = list({
+            tuple(row[key] for key in key_columns): {key: value for key, value in row.items() if key in columns}
+            for row in rows
+        }.values())
+        if not rows:
+            return 0
+        try:
+            if settings.environment == "development":
+                statement = sqlite_insert(model).values(rows)
+                updates = {name: statement.excluded[name] for name in rows[0] if name not in key_columns}
+                if updates:
+                    statement = statement.on_conflict_do_update(index_elements=key_columns, set_=updates)
+                else:
+                    statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+                with self.get_session() as session:
+                    session.execute(statement)
+                    session.commit()
+            else:
+                rows = [
+                    {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+                    for row in rows
+                ]
+                self.supabase.table(model.__tablename__).upsert(rows, on_conflict=",".join(key_columns)).execute()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to upsert {len(rows)} rows into {model.__tablename__}: {e}")
+            raise
+    
     def get_company_by_ticker(self, ticker: str) -> Optional[Dict[str, Any]]:
         """Get company information by ticker symbol."""
         try:
@@ -183,6 +373,307 @@ class DatabaseManager:
             logger.error(f"Failed to get company by ticker: {e}")
             return None
     
+    def get_watermark(self, ticker: str, source: str) -> Optional[datetime]:
+        """Get the last successfully ingested timestamp for a ticker and source."""
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    watermark = session.query(IngestionWatermark).filter(
+                        IngestionWatermark.ticker == ticker,
+                        IngestionWatermark.source == source
+                    ).first()
+                    return watermark.last_ingested_at if watermark else None
+            else:
+                result = self.supabase.table("ingestion_watermarks").select("last_ingested_at").eq(
+                    "ticker", ticker
+                ).eq("source", source).execute()
+                if not result.data:
+                    return None
+                return datetime.fromisoformat(result.data[0]["last_ingested_at"])
+        except Exception as e:
+            logger.error(f"Failed to get watermark for {ticker}/{source}: {e}")
+            return None
+    
+    def set_watermark(self, ticker: str, source: str, last_ingested_at: datetime) -> None:
+        """Advance the watermark for a ticker and source (never moves it backwards)."""
+        try:
+            current = self.get_watermark(ticker, source)
+            if current is not None and current >= last_ingested_at:
+                return
+            
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    watermark = session.query(IngestionWatermark).filter(
+                        IngestionWatermark.ticker == ticker,
+                        IngestionWatermark.source == source
+                    ).first()
+                    if watermark:
+                        watermark.last_ingested_at = last_ingested_at
+                    else:
+                        session.add(IngestionWatermark(
+                            ticker=ticker, source=source, last_ingested_at=last_ingested_at
+                        ))
+                    session.commit()
+            else:
+                self.supabase.table("ingestion_watermarks").upsert({
+                    "ticker": ticker,
+                    "source": source,
+                    "last_ingested_at": last_ingested_at.isoformat()
+                }, on_conflict="ticker,source").execute()
+        except Exception as e:
+            logger.error(f"Failed to set watermark for {ticker}/{source}: {e}")
+            raise
+    
+    def enqueue_collection_jobs(self, tickers: List[str], feeds: List[str], days_back: int = 30) -> int:
+        """Create (or reset to pending, unless currently leased) one job per feed and ticker; returns the count."""
+        now = datetime.utcnow()
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    existing = {
+                        (job.feed, job.ticker): job
+                        for job in session.query(CollectionJob).filter(CollectionJob.feed.in_(feeds))
+                    }
+                    for feed in feeds:
+                        for ticker in tickers:
+                            job = existing.get((feed, ticker))
+                            if job is None:
+                                session.add(CollectionJob(feed=feed, ticker=ticker, days_back=days_back,
+                                                          status=JOB_PENDING, attempts=0, available_at=now))
+                            elif job.status != JOB_LEASED or job.lease_expires_at < now:
+                                job.status = JOB_PENDING
+                                job.attempts = 0
+                                job.days_back = days_back
+                                job.available_at = now
+                                job.last_error = None
+                    session.commit()
+            else:
+                # A plain upsert would also reset leased jobs; the function skips them
+                for start in range(0, len(tickers), 500):
+                    self.supabase.rpc("enqueue_collection_jobs", {
+                        "tickers": tickers[start:start + 500],
+                        "feeds": feeds,
+                        "days_back": days_back
+                    }).execute()
+            return len(feeds) * len(tickers)
+        except Exception as e:
+            logger.error(f"Failed to enqueue collection jobs: {e}")
+            raise
+    
+    def lease_collection_jobs(self, worker_id: str, limit: int, lease_seconds: int,
+                              max_attempts: int) -> List[Dict[str, Any]]:
+        """
+        Lease up to `limit` due jobs for a worker.
+        
+        A job is due when it is pending and past its retry delay, or when its
+        previous lease expired (the worker died or stalled). Jobs whose lease
+        expired on their last attempt are failed instead of leased again.
+        """
+        try:
+            if settings.environment == "development":
+                now = datetime.utcnow()
+                token = uuid.uuid4().hex
+                claimable = or_(
+                    and_(CollectionJob.status == JOB_PENDING, CollectionJob.available_at <= now),
+                    and_(CollectionJob.status == JOB_LEASED, CollectionJob.lease_expires_at < now)
+                )
+                with self.get_session() as session:
+                    session.query(CollectionJob).filter(
+                        CollectionJob.status == JOB_LEASED,
+                        CollectionJob.lease_expires_at < now,
+                        CollectionJob.attempts >= max_attempts
+                    ).update({"status": JOB_FAILED, "last_error": "lease expired"}, synchronize_session=False)
+                    
+                    # SKIP LOCKED lets concurrent workers on Postgres pick disjoint rows; on SQLite
+                    # writers are serialized and the claimable check in the UPDATE settles races
+                    ids = [row.id for row in session.query(CollectionJob.id).filter(claimable).order_by(
+                        CollectionJob.available_at
+                    ).limit(limit).with_for_update(skip_locked=True)]
+                    if ids:
+                        session.query(CollectionJob).filter(CollectionJob.id.in_(ids), claimable).update({
+                            "status": JOB_LEASED,
+                            "lease_owner": worker_id,
+                            "lease_token": token,
+                            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                            "attempts": CollectionJob.attempts + 1
+                        }, synchronize_session=False)
+                    session.commit()
+                    jobs = session.query(CollectionJob).filter(CollectionJob.lease_token == token).all()
+                    return [self._job_to_dict(job) for job in jobs]
+            else:
+                result = self.supabase.rpc("lease_collection_jobs", {
+                    "worker_id": worker_id,
+                    "max_jobs": limit,
+                    "lease_seconds": lease_seconds,
+                    "max_attempts": max_attempts
+                }).execute()
+                return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to lease collection jobs: {e}")
+            return []
+    
+    def renew_collection_job_leases(self, lease_token: str, lease_seconds: int) -> None:
+        """Extend the lease of every job still held under a lease token."""
+        expires_at = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    session.query(CollectionJob).filter(
+                        CollectionJob.lease_token == lease_token, CollectionJob.status == JOB_LEASED
+                    ).update({"lease_expires_at": expires_at}, synchronize_session=False)
+                    session.commit()
+            else:
+                self.supabase.table("collection_jobs").update(
+                    {"lease_expires_at": expires_at.isoformat()}
+                ).eq("lease_token", lease_token).eq("status", JOB_LEASED).execute()
+        except Exception as e:
+            logger.error(f"Failed to renew leases for {lease_token}: {e}")
+    
+    def complete_collection_job(self, job: Dict[str, Any]) -> None:
+        """Mark a leased job done (ignored if its lease was lost to another worker)."""
+        self._update_leased_job(job, {"status": JOB_DONE, "lease_token": None, "last_error": None})
+    
+    def fail_collection_job(self, job: Dict[str, Any], error: str, max_attempts: int,
+                            retry_delay_seconds: int) -> None:
+        """Put a leased job back with exponential backoff, or fail it after max_attempts."""
+        if job["attempts"] >= max_attempts:
+            changes = {"status": JOB_FAILED}
+        else:
+            delay = retry_delay_seconds * 2 ** max(0, job["attempts"] - 1)
+            changes = {"status": JOB_PENDING, "available_at": datetime.utcnow() + timedelta(seconds=delay)}
+        self._update_leased_job(job, {**changes, "lease_token": None, "last_error": error[:1000]})
+    
+    def get_collection_job_counts(self) -> Dict[str, int]:
+        """Number of collection jobs in each state."""
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    rows = session.query(CollectionJob.status, func.count(CollectionJob.id)).group_by(
+                        CollectionJob.status
+                    ).all()
+                    return {status: count for status, count in rows}
+            else:
+                counts = {}
+                for status in (JOB_PENDING, JOB_LEASED, JOB_DONE, JOB_FAILED):
+                    result = self.supabase.table("collection_jobs").select("id", count="exact").eq(
+                        "status", status
+                    ).limit(1).execute()
+                    counts[status] = result.count or 0
+                return counts
+        except Exception as e:
+            logger.error(f"Failed to count collection jobs: {e}")
+            return {}
+    
+    def _update_leased_job(self, job: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    session.query(CollectionJob).filter(
+                        CollectionJob.id == job["id"], CollectionJob.lease_token == job["lease_token"]
+                    ).update(changes, synchronize_session=False)
+                    session.commit()
+            else:
+                changes = {
+                    key: value.isoformat() if isinstance(value, datetime) else value
+                    for key, value in changes.items()
+                }
+                self.supabase.table("collection_jobs").update(changes).eq("id", job["id"]).eq(
+                    "lease_token", job["lease_token"]
+                ).execute()
+        except Exception as e:
+            logger.error(f"Failed to update collection job {job['id']}: {e}")
+    
+    def _job_to_dict(self, job: CollectionJob) -> Dict[str, Any]:
+        return {column.name: getattr(job, column.name) for column in CollectionJob.__table__.columns}
+    
+    def replace_earnings_calendar(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replace the earnings calendar with a new snapshot, streaming rows in chunks.
+        
+        Nothing is touched when rows is empty, so a failed download never
+        wipes the previous calendar. A (symbol, report_date) pair listed more
+        than once is kept at its first occurrence, since the table is unique
+        on it. Returns the number of rows written.
+        """
+        def first_per_report(rows):
+            seen = set()
+            for row in rows:
+                key = (row["symbol"], row["report_date"])
+                if key not in seen:
+                    seen.add(key)
+                    yield row
+        
+        rows = first_per_report(rows)
+        chunk = list(islice(rows, EARNINGS_CHUNK_SIZE))
+        if not chunk:
+            return 0
+        ingested_at = datetime.utcnow()
+        count = 0
+        try:
+            if settings.environment == "development":
+                # One transaction: readers see the old calendar until the commit
+                with self.get_session() as session:
+                    session.query(EarningsCalendar).delete()
+                    while chunk:
+                        session.bulk_insert_mappings(
+                            EarningsCalendar, [{**row, "ingested_at": ingested_at} for row in chunk]
+                        )
+                        count += len(chunk)
+                        chunk = list(islice(rows, EARNINGS_CHUNK_SIZE))
+                    session.commit()
+            else:
+                # Upsert the snapshot, then drop reports that are no longer listed
+                while chunk:
+                    self.supabase.table("earnings_calendar").upsert([
+                        {**{key: value.isoformat() if isinstance(value, date) else value for key, value in row.items()},
+                         "ingested_at": ingested_at.isoformat()}
+                        for row in chunk
+                    ], on_conflict="symbol,report_date").execute()
+                    count += len(chunk)
+                    chunk = list(islice(rows, EARNINGS_CHUNK_SIZE))
+                self.supabase.table("earnings_calendar").delete().lt("ingested_at", ingested_at.isoformat()).execute()
+            logger.info(f"Replaced earnings calendar with {count} reports")
+            return count
+        except Exception as e:
+            logger.error(f"Failed to replace earnings calendar: {e}")
+            raise
+    
+    def get_earnings_calendar_refreshed_at(self) -> Optional[datetime]:
+        """When the current earnings calendar snapshot was ingested (None if never)."""
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    return session.query(func.max(EarningsCalendar.ingested_at)).scalar()
+            else:
+                result = self.supabase.table("earnings_calendar").select("ingested_at").order(
+                    "ingested_at", desc=True
+                ).limit(1).execute()
+                return datetime.fromisoformat(result.data[0]["ingested_at"]) if result.data else None
+        except Exception as e:
+            logger.error(f"Failed to get earnings calendar age: {e}")
+            return None
+    
+    def get_earnings_calendar(self, symbol: str) -> List[Dict[str, Any]]:
+        """Get the upcoming earnings reports for a symbol, soonest first."""
+        try:
+            if settings.environment == "development":
+                with self.get_session() as session:
+                    reports = session.query(EarningsCalendar).filter(
+                        EarningsCalendar.symbol == symbol.upper()
+                    ).order_by(EarningsCalendar.report_date).all()
+                    return [
+                        {column.name: getattr(report, column.name) for column in EarningsCalendar.__table__.columns}
+                        for report in reports
+                    ]
+            else:
+                result = self.supabase.table("earnings_calendar").select("*").eq(
+                    "symbol", symbol.upper()
+                ).order("report_date").execute()
+                return result.data
+        except Exception as e:
+            logger.error(f"Failed to get earnings calendar for {symbol}: {e}")
+            return []
+    
     def get_esg_scores_history(self, company_id: int, days: int = 30) -> List[Dict[str, Any]]:
         """Get ESG scores history for a company."""
         try:
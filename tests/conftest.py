@@ -0,0 +1,26 @@
+"""
+Shared fixtures for the test suite.
+"""
+
+import pytest
+import sys
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import Base, DatabaseManager
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """DatabaseManager on a throwaway SQLite file"""
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.supabase = None
+    manager.engine = create_engine(f"sqlite:///{tmp_path / 'esg.db'}")
+    Base.metadata.create_all(bind=manager.engine)
+    manager.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=manager.engine)
+    return manager
@@ -0,0 +1,203 @@
+"""
+Tests for the batched Alpha Vantage news feed and how the orchestrator merges it.
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.alpha_vantage_collector import AlphaVantageCollector
+from src.data_collection.data_orchestrator import DataOrchestrator, WATERMARK_ALPHA_NEWS
+
+
+def feed_item(url, published, *ticker_relevance):
+    return {
+        "url": url,
+        "title": f"Story at {url}",
+        "summary": "",
+        "source": "Newswire",
+        "time_published": published,
+        "ticker_sentiment": [
+            {"ticker": ticker, "relevance_score": str(relevance), "ticker_sentiment_score": "0.4",
+             "ticker_sentiment_label": "Bullish"}
+            for ticker, relevance in ticker_relevance
+        ]
+    }
+
+
+class FakeResponse:
+    status_code = 200
+    
+    def __init__(self, feed):
+        self.feed = feed
+    
+    def json(self):
+        return {"feed": self.feed}
+
+
+def make_collector(*pages):
+    """Collector whose feed calls answer with the given pages and record their params."""
+    collector = AlphaVantageCollector.__new__(AlphaVantageCollector)
+    collector.api_key = "test-key"
+    collector.calls = []
+    responses = [FakeResponse(page) for page in pages]
+    
+    def get(params):
+        collector.calls.append(params)
+        return responses.pop(0) if responses else None
+    
+    collector._get = get
+    return collector
+
+
+class TestNewsSentimentBatch:
+    """Test feed paging, routing by ticker and relevance, and URL dedupe."""
+    
+    def test_articles_routed_by_ticker_and_relevance(self):
+        """Test that each wanted ticker gets the articles that are relevant to it."""
+        collector = make_collector([
+            feed_item("https://news.example/1", "20240105T120000", ("AAPL", 0.9), ("MSFT", 0.05)),
+            feed_item("https://news.example/2", "20240105T110000", ("MSFT", 0.6), ("TSLA", 0.9)),
+            feed_item("https://news.example/3", "bad-time", ("AAPL", 0.9))
+        ])
+        
+        articles = collector.get_news_sentiment_batch(["aapl", "MSFT", "NVDA"], datetime(2024, 1, 1), limit=10)
+        
+        assert set(articles) == {"AAPL", "MSFT", "NVDA"}
+        assert [article["url"] for article in articles["AAPL"]] == ["https://news.example/1"]
+        assert [article["url"] for article in articles["MSFT"]] == ["https://news.example/2"]
+        assert articles["NVDA"] == []
+        assert articles["AAPL"][0]["relevance_score"] == 0.9
+        assert articles["AAPL"][0]["sentiment_label"] == "positive"
+        assert len(collector.calls) == 1
+    
+    def test_full_pages_continue_from_oldest_article_without_repeats(self):
+        """Test that a full page is followed by one ending at its oldest article, and repeated URLs are dropped."""
+        collector = make_collector(
+            [feed_item("https://news.example/1", "20240105T120000", ("AAPL", 0.9)),
+             feed_item("https://news.example/2", "20240104T090000", ("AAPL", 0.9))],
+            [feed_item("https://news.example/2", "20240104T090000", ("AAPL", 0.9)),
+             feed_item("https://news.example/3", "20240103T090000", ("AAPL", 0.9))],
+            [feed_item("https://news.example/4", "20240102T090000", ("AAPL", 0.9))]
+        )
+        
+        articles = collector.get_news_sentiment_batch(["AAPL"], datetime(2024, 1, 1), limit=2, max_calls=5)
+        
+        assert [article["url"] for article in articles["AAPL"]] == [
+            "https://news.example/1", "https://news.example/2", "https://news.example/3", "https://news.example/4"
+        ]
+        assert "time_to" not in collector.calls[0]
+        assert collector.calls[1]["time_to"] == "20240104T0900"
+        assert collector.calls[2]["time_to"] == "20240103T0900"
+        assert len(collector.calls) == 3
+    
+    def test_no_call_made_returns_none(self):
+        """Test that a deferred first call reports None rather than an empty feed."""
+        assert make_collector().get_news_sentiment_batch(["AAPL"], datetime(2024, 1, 1)) is None
+
+
+class FakeDatabase:
+    def __init__(self, watermarks):
+        self.watermarks = watermarks
+    
+    def get_watermark(self, ticker, source):
+        return self.watermarks.get((ticker, source))
+
+
+class FakeAlphaCollector(AlphaVantageCollector):
+    """Returns fixed feed articles and records the requested time_from."""
+    
+    def __init__(self, articles):
+        self.articles = articles
+        self.time_from = None
+    
+    def get_news_sentiment_batch(self, tickers, time_from, **kwargs):
+        self.time_from = time_from
+        return self.articles
+
+
+def article(url, date, headline=None):
+    return {"url": url, "date": date, "headline": headline or f"Story at {url}", "content": "",
+            "source": "Newswire", "sentiment_score": 0.4, "sentiment_label": "positive",
+            "relevance_score": 0.8, "data_source": "alpha_vantage"}
+
+
+def make_orchestrator(watermarks, articles):
+    orchestrator = DataOrchestrator.__new__(DataOrchestrator)
+    orchestrator.db_manager = FakeDatabase(watermarks)
+    orchestrator.alpha_collector = FakeAlphaCollector(articles)
+    return orchestrator
+
+
+class TestCollectAlphaNews:
+    """Test watermark filtering of the shared feed."""
+    
+    def test_each_ticker_keeps_articles_after_its_watermark(self):
+        """Test that the feed starts at the oldest watermark and each ticker filters by its own."""
+        orchestrator = make_orchestrator(
+            {("AAPL", WATERMARK_ALPHA_NEWS): datetime(2024, 1, 3), ("MSFT", WATERMARK_ALPHA_NEWS): datetime(2024, 1, 1),
+             ("TSLA", WATERMARK_ALPHA_NEWS): datetime(2024, 1, 5)},
+            {
+                "AAPL": [article("https://news.example/1", "2024-01-02T09:00:00"),
+                         article("https://news.example/2", "2024-01-04T09:00:00")],
+                "MSFT": [article("https://news.example/1", "2024-01-02T09:00:00")]
+            }
+        )
+        
+        news = orchestrator.collect_alpha_news(["AAPL", "MSFT", "TSLA"], days_back=100000)
+        
+        assert orchestrator.alpha_collector.time_from == datetime(2024, 1, 1)
+        assert [item["url"] for item in news["AAPL"]] == ["https://news.example/2"]
+        assert [item["url"] for item in news["MSFT"]] == ["https://news.example/1"]
+        assert news["TSLA"] == []
+    
+    def test_articles_without_date_are_skipped(self):
+        """Test that unparsable dates are dropped instead of failing the comparison."""
+        orchestrator = make_orchestrator(
+            {("AAPL", WATERMARK_ALPHA_NEWS): datetime(2024, 1, 1)},
+            {"AAPL": [article("https://news.example/1", None), article("https://news.example/2", "yesterday"),
+                      article("https://news.example/3", "2024-01-02T09:00:00")]}
+        )
+        
+        news = orchestrator.collect_alpha_news(["AAPL"])
+        
+        assert [item["url"] for item in news["AAPL"]] == ["https://news.example/3"]
+
+
+class TestMergeAlphaNews:
+    """Test merging feed articles into already scored news."""
+    
+    def test_known_urls_become_duplicates(self):
+        """Test that feed copies of collected stories are listed as duplicates and new stories are added."""
+        orchestrator = make_orchestrator({}, {})
+        collected_data = {"ticker": "AAPL", "news": [
+            {**article("https://yahoo.example/a", "2024-01-02T09:00:00", "Apple opens a solar farm in Nevada"),
+             "data_source": "yahoo_finance",
+             "duplicates": [{"url": "https://news.example/copy", "source": "Wire", "date": None, "data_source": "news_api"}]},
+            {**article("https://yahoo.example/b", "2024-01-02T10:00:00", "Apple faces a labor lawsuit in court"),
+             "data_source": "yahoo_finance"}
+        ]}
+        alpha_news = [
+            article("https://news.example/copy", "2024-01-02T09:30:00", "Solar farm deal for the iPhone maker"),
+            article("https://yahoo.example/b", "2024-01-02T10:30:00", "Lawsuit filed over warehouse conditions"),
+            article("https://news.example/new", "2024-01-03T08:00:00", "Apple publishes its diversity report")
+        ]
+        
+        orchestrator._merge_alpha_news(collected_data, alpha_news)
+        
+        assert [item["url"] for item in collected_data["news"]] == [
+            "https://yahoo.example/a", "https://yahoo.example/b", "https://news.example/new"
+        ]
+        first, second, _ = collected_data["news"]
+        assert [d["data_source"] for d in first["duplicates"]] == ["news_api", "alpha_vantage"]
+        assert [d["url"] for d in second["duplicates"]] == ["https://yahoo.example/b"]
+        assert collected_data["alpha_sentiment"]["news_count"] == 3
+        assert collected_data["alpha_sentiment"]["data_source"] == "alpha_vantage"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
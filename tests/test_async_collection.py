@@ -0,0 +1,206 @@
+"""
+Tests for the asyncio collection mode of the data orchestrator.
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection import data_orchestrator
+from src.data_collection.data_orchestrator import DataOrchestrator
+
+TICKERS = ["AAPL", "MSFT", "TSLA"]
+
+
+class FakeDatabase:
+    def get_watermark(self, ticker, source):
+        return None
+
+
+class FakeYahooCollector:
+    def ticker_context(self, ticker):
+        return None
+    
+    def get_batch_financial_metrics(self, tickers, days_back, since=None, contexts=None):
+        return {ticker: [{"date": "2024-01-02T00:00:00", "stock_price": 10.0}] for ticker in tickers}
+    
+    def get_company_info(self, ticker, context=None):
+        if ticker == "TSLA":
+            raise RuntimeError("Yahoo Finance is down")
+        return {"ticker": ticker, "name": f"{ticker} Corp"}
+    
+    def get_esg_scores(self, ticker, days_back, context=None):
+        return [{"date": "2024-01-02", "overall_score": 50.0}]
+    
+    def get_news(self, ticker, days_back, since=None, context=None):
+        return [{"date": "2024-01-02T09:00:00", "headline": f"{ticker} opens a solar farm in the desert",
+                 "content": "", "url": f"https://yahoo.example/{ticker}", "data_source": "yahoo_finance"}]
+
+
+class FakeNewsCollector:
+    """NewsAPI stand-in that records how many searches run at once."""
+    
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    def _article(self, company_name):
+        return {"date": "2024-01-03T09:00:00", "headline": f"{company_name} faces a labor lawsuit in court",
+                "content": "", "url": f"https://newsapi.example/{company_name}", "data_source": "news_api"}
+    
+    def get_esg_news(self, company_name, days_back, since=None):
+        return [self._article(company_name)]
+    
+    async def get_esg_news_async(self, session, company_name, days_back, semaphore=None, since=None):
+        async with semaphore:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.05)
+            self.in_flight -= 1
+        return [self._article(company_name)]
+
+
+class FakeAlphaCollector:
+    """Alpha Vantage stand-in whose batched feed only reaches the tickers in `feed`."""
+    
+    def __init__(self, feed=None):
+        self.feed = feed or {}
+        self.sentiment_calls = []
+    
+    def get_company_overview(self, ticker):
+        return {"pe_ratio": 25.0}
+    
+    async def get_company_overview_async(self, session, ticker, semaphore=None):
+        return self.get_company_overview(ticker)
+    
+    def get_sentiment_analysis(self, ticker):
+        self.sentiment_calls.append(ticker)
+        return {"ticker": ticker, "news_count": 1, "data_source": "alpha_vantage"}
+    
+    async def get_sentiment_analysis_async(self, session, ticker, semaphore=None):
+        return self.get_sentiment_analysis(ticker)
+    
+    def get_news_sentiment_batch(self, tickers, time_from):
+        return self.feed
+    
+    def summarize_sentiment(self, ticker, articles):
+        return {"ticker": ticker, "news_count": len(articles), "data_source": "alpha_vantage_feed"}
+
+
+class FakeFMPCollector:
+    api_key = None
+
+
+class FakeQuotaPlanner:
+    """Plans every call that is not skipped, as if the budget were unlimited."""
+    
+    def plan(self, provider, tickers, data_types, skip=None):
+        return [(ticker, data_type) for data_type in data_types for ticker in tickers
+                if (ticker, data_type) not in (skip or set())]
+
+
+class FakeSentimentAnalyzer:
+    loaded = True
+    
+    def cache_stats(self, since=None):
+        return None
+    
+    def analyze_news_batch(self, articles):
+        return [{**article, "sentiment_score": 0.5, "sentiment_label": "positive"} for article in articles]
+
+
+class FakeAsyncSession:
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def make_orchestrator(provider_concurrency=None):
+    """Orchestrator with fake collectors whose saves are recorded instead of written."""
+    orchestrator = DataOrchestrator.__new__(DataOrchestrator)
+    orchestrator.db_manager = FakeDatabase()
+    orchestrator.yahoo_collector = FakeYahooCollector()
+    orchestrator.news_collector = FakeNewsCollector()
+    orchestrator.alpha_collector = FakeAlphaCollector()
+    orchestrator.fmp_collector = FakeFMPCollector()
+    orchestrator.quota_planner = FakeQuotaPlanner()
+    orchestrator.sentiment_analyzer = FakeSentimentAnalyzer()
+    orchestrator.provider_concurrency = {**data_orchestrator.DEFAULT_PROVIDER_CONCURRENCY, **(provider_concurrency or {})}
+    orchestrator.saved = {}
+    
+    def save_to_database(collected_data):
+        orchestrator.saved[collected_data["ticker"]] = collected_data
+        return collected_data["company_info"] is not None
+    
+    orchestrator.save_to_database = save_to_database
+    return orchestrator
+
+
+def comparable(collected_data):
+    """Collected data without the fields that depend on when and how it was collected"""
+    return {key: value for key, value in collected_data.items()
+            if key not in ("collection_date", "stage_timings")}
+
+
+@pytest.fixture(autouse=True)
+def offline_session(monkeypatch):
+    monkeypatch.setattr(data_orchestrator, "create_async_session", FakeAsyncSession)
+
+
+class TestAsyncCollection:
+    """Test that async mode matches the threaded mode and bounds each provider."""
+    
+    def test_async_mode_matches_sync_mode(self):
+        """Test that both modes save the same data, keeping the other stages when one fails."""
+        sync_orchestrator = make_orchestrator()
+        async_orchestrator = make_orchestrator()
+        
+        sync_results = sync_orchestrator.collect_all_companies(TICKERS, use_async=False)
+        async_results = async_orchestrator.collect_all_companies(TICKERS, use_async=True)
+        
+        assert async_results["companies"] == sync_results["companies"] == {
+            "AAPL": "success", "MSFT": "success", "TSLA": "success"
+        }
+        for ticker in TICKERS:
+            assert comparable(async_orchestrator.saved[ticker]) == comparable(sync_orchestrator.saved[ticker])
+        assert [article["data_source"] for article in async_orchestrator.saved["AAPL"]["news"]] == [
+            "yahoo_finance", "news_api"
+        ]
+        assert async_orchestrator.saved["AAPL"]["company_info"]["pe_ratio"] == 25.0
+        # TSLA's Yahoo Finance lookup failed, but its overview and scores are still saved
+        assert async_orchestrator.saved["TSLA"]["company_info"] == {"pe_ratio": 25.0}
+        assert async_orchestrator.saved["TSLA"]["esg_scores"]
+        assert async_orchestrator.saved["TSLA"]["errors"][0] == "Error in company_info stage for TSLA: Yahoo Finance is down"
+    
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_tickers_missing_from_feed_get_own_sentiment_call(self, use_async):
+        """Test that only tickers the batched feed did not reach fall back to a per-ticker call."""
+        orchestrator = make_orchestrator()
+        orchestrator.alpha_collector = FakeAlphaCollector({"AAPL": [{
+            "date": "2024-01-02T09:00:00", "headline": "Apple expands its recycling program",
+            "content": "", "url": "https://alpha.example/AAPL", "data_source": "alpha_vantage"
+        }]})
+        
+        orchestrator.collect_all_companies(["AAPL", "MSFT"], use_async=use_async)
+        
+        assert orchestrator.alpha_collector.sentiment_calls == ["MSFT"]
+        assert orchestrator.saved["AAPL"]["alpha_sentiment"]["data_source"] == "alpha_vantage_feed"
+        assert orchestrator.saved["MSFT"]["alpha_sentiment"]["data_source"] == "alpha_vantage"
+    
+    @pytest.mark.parametrize("limit", [1, 2])
+    def test_provider_concurrency_is_bounded(self, limit):
+        """Test that no more NewsAPI searches run at once than the provider's limit."""
+        orchestrator = make_orchestrator({"news_api": limit})
+        orchestrator.collect_all_companies(["AAPL", "MSFT", "NVDA", "JPM"], use_async=True)
+        
+        assert orchestrator.news_collector.max_in_flight == limit
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,117 @@
+"""
+Tests for the per-provider circuit breakers.
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.circuit_breaker import (
+    CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, parse_retry_after,
+    STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+)
+
+
+class FakeResponse:
+    """Minimal HTTP response stand-in."""
+    
+    def __init__(self, status_code, headers=None, from_cache=False):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+
+def failing():
+    raise ConnectionError("provider down")
+
+
+class TestCircuitBreaker:
+    """Test circuit state transitions."""
+    
+    def test_opens_after_consecutive_failures(self):
+        """Test that the circuit opens at the failure threshold and refuses calls."""
+        breaker = CircuitBreaker("fmp", failure_threshold=2, base_backoff=60, jitter=0)
+        
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(failing)
+        
+        assert breaker.state == STATE_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "ok")
+    
+    def test_half_open_trial_closes_circuit(self):
+        """Test that one successful trial after the backoff closes the circuit."""
+        breaker = CircuitBreaker("fmp", failure_threshold=1, base_backoff=0.05, jitter=0)
+        with pytest.raises(ConnectionError):
+            breaker.call(failing)
+        
+        time.sleep(0.06)
+        assert breaker.state == STATE_HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()  # only one trial at a time
+        
+        breaker.record_success(0.01)
+        assert breaker.state == STATE_CLOSED
+    
+    def test_retry_after_extends_backoff(self):
+        """Test that a 429 with Retry-After opens the circuit for at least that long."""
+        breaker = CircuitBreaker("news_api", failure_threshold=5, base_backoff=0.01, jitter=0)
+        
+        response = breaker.call(lambda: FakeResponse(429, {"Retry-After": "30"}))
+        
+        assert response.status_code == 429
+        assert breaker.state == STATE_OPEN
+        assert breaker.retry_in() > 25
+    
+    def test_cached_responses_are_not_counted(self):
+        """Test that cache hits do not affect health stats."""
+        breaker = CircuitBreaker("fmp")
+        
+        breaker.call(lambda: FakeResponse(200, from_cache=True))
+        
+        assert breaker.stats()["calls"] == 0
+    
+    def test_retries_transient_failures(self):
+        """Test that a transient failure is retried and the success recorded."""
+        breaker = CircuitBreaker("yahoo_finance", failure_threshold=3)
+        attempts = []
+        
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError("reset")
+            return "data"
+        
+        assert breaker.call(flaky, retries=1) == "data"
+        assert breaker.stats()["success_rate"] == 0.5
+
+
+class TestCircuitBreakerRegistry:
+    """Test provider ranking for fallback chains."""
+    
+    def test_rank_skips_open_and_prefers_healthy(self):
+        """Test that open providers are dropped and healthier ones go first."""
+        registry = CircuitBreakerRegistry(failure_threshold=3)
+        registry.get("alpha_vantage").record_failure(retry_after=60)
+        registry.get("fmp").record_success(0.1)
+        registry.get("fmp").record_failure()
+        registry.get("fmp").record_success(0.1)
+        registry.get("yahoo_finance").record_success(0.1)
+        
+        assert registry.rank(["fmp", "yahoo_finance", "alpha_vantage"]) == ["yahoo_finance", "fmp"]
+
+
+def test_parse_retry_after():
+    """Test Retry-After parsing in both header formats."""
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,233 @@
+"""
+Tests for the database writes and the collection job queue on a throwaway SQLite file.
+"""
+
+import pytest
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import CollectionJob, EarningsCalendar, ESGScores, News, StockPrice
+from src.data_collection.alpha_vantage_collector import AlphaVantageCollector
+from src.data_collection.data_orchestrator import DataOrchestrator, WATERMARK_YAHOO_PRICES
+
+EARNINGS_CSV = """symbol,name,reportDate,fiscalDateEnding,estimate,currency
+aapl,Apple Inc,2024-05-02,2024-03-31,1.5,USD
+MSFT,Microsoft Corp,2024-04-25,2024-03-31,,USD
+,No Symbol Inc,2024-04-30,2024-03-31,0.1,USD
+TSLA,Tesla Inc,not-a-date,2024-03-31,0.5,USD
+AAPL,Apple Inc (duplicate),2024-05-02,2024-03-31,1.6,USD
+"""
+
+
+def price(day, close):
+    return {"date": f"2024-01-{day:02d}T00:00:00-05:00", "stock_price": close, "volume": 1000,
+            "market_cap": close * 10, "data_source": "yahoo_finance"}
+
+
+class TestBatchInserts:
+    """Test the one-transaction batch inserts used by the orchestrator and pipeline."""
+    
+    def test_batch_insert_drops_unknown_keys(self, db_manager):
+        """Test that pipeline-only keys are dropped and every row is inserted."""
+        rows = [
+            {"company_id": 1, "date": datetime(2024, 1, day), "headline": f"Story {day}", "ticker": "AAPL",
+             "sentiment_method": "huggingface", "duplicates": []}
+            for day in (2, 3)
+        ]
+        assert db_manager.insert_news_batch(rows) == 2
+        assert db_manager.insert_esg_scores_batch([{"company_id": 1, "date": datetime(2024, 1, 2), "ticker": "AAPL"}]) == 1
+        assert db_manager.insert_news_batch([]) == 0
+        
+        with db_manager.get_session() as session:
+            assert [news.headline for news in session.query(News).order_by(News.date)] == ["Story 2", "Story 3"]
+            assert session.query(ESGScores).count() == 1
+    
+    def test_failed_batch_inserts_nothing(self, db_manager):
+        """Test that a batch with an invalid row is rolled back as a whole."""
+        rows = [
+            {"company_id": 1, "date": datetime(2024, 1, 2), "headline": "Kept?"},
+            {"company_id": 1, "date": None, "headline": "Missing date"}
+        ]
+        with pytest.raises(Exception):
+            db_manager.insert_news_batch(rows)
+        
+        with db_manager.get_session() as session:
+            assert session.query(News).count() == 0
+
+
+class TestStockPrices:
+    """Test price storage and the price watermark."""
+    
+    def test_upsert_updates_existing_days(self, db_manager):
+        """Test that a re-fetched day replaces the stored row instead of failing."""
+        first = [{"ticker": "AAPL", "date": datetime(2024, 1, 2), "stock_price": 10.0}]
+        again = [
+            {"ticker": "AAPL", "date": datetime(2024, 1, 2), "stock_price": 11.0},
+            {"ticker": "AAPL", "date": datetime(2024, 1, 3), "stock_price": 12.0},
+            {"ticker": "AAPL", "date": datetime(2024, 1, 3), "stock_price": 12.5}
+        ]
+        assert db_manager.upsert_stock_prices_batch(first) == 1
+        assert db_manager.upsert_stock_prices_batch(again) == 2
+        
+        with db_manager.get_session() as session:
+            stored = {row.date.day: row.stock_price for row in session.query(StockPrice)}
+        assert stored == {2: 11.0, 3: 12.5}
+    
+    def test_prices_saved_without_company_row(self, db_manager):
+        """Test that prices are stored and the watermark moves even for an unknown company."""
+        orchestrator = DataOrchestrator.__new__(DataOrchestrator)
+        orchestrator.db_manager = db_manager
+        
+        assert orchestrator.save_prices("NEWCO", [price(2, 5.0), price(3, 6.0)])
+        with db_manager.get_session() as session:
+            assert session.query(StockPrice).filter(StockPrice.ticker == "NEWCO").count() == 2
+        assert db_manager.get_watermark("NEWCO", WATERMARK_YAHOO_PRICES) == datetime(2024, 1, 3)
+    
+    def test_failed_write_keeps_watermark(self, db_manager):
+        """Test that prices which were not stored are not marked as ingested."""
+        orchestrator = DataOrchestrator.__new__(DataOrchestrator)
+        orchestrator.db_manager = db_manager
+        
+        def fail(rows):
+            raise RuntimeError("database is locked")
+        db_manager.upsert_stock_prices_batch = fail
+        
+        assert not orchestrator.save_prices("AAPL", [price(2, 5.0)])
+        assert db_manager.get_watermark("AAPL", WATERMARK_YAHOO_PRICES) is None
+
+
+class TestEarningsCalendar:
+    """Test parsing the bulk earnings download and replacing the stored snapshot."""
+    
+    def test_parse_skips_malformed_rows(self):
+        """Test that rows without a symbol or a valid report date are dropped."""
+        rows = list(AlphaVantageCollector.__new__(AlphaVantageCollector)._parse_earnings_csv(EARNINGS_CSV))
+        
+        assert [(row["symbol"], row["report_date"]) for row in rows] == [
+            ("AAPL", date(2024, 5, 2)), ("MSFT", date(2024, 4, 25)), ("AAPL", date(2024, 5, 2))
+        ]
+        assert rows[0]["estimate"] == 1.5 and rows[1]["estimate"] is None
+    
+    def test_replace_keeps_first_of_duplicate_reports(self, db_manager):
+        """Test that a repeated (symbol, report_date) pair does not abort the replace."""
+        rows = AlphaVantageCollector.__new__(AlphaVantageCollector)._parse_earnings_csv(EARNINGS_CSV)
+        
+        assert db_manager.replace_earnings_calendar(rows) == 2
+        assert db_manager.get_earnings_calendar("AAPL")[0]["name"] == "Apple Inc"
+    
+    def test_empty_download_keeps_old_snapshot(self, db_manager):
+        """Test that a download without rows leaves the previous calendar in place."""
+        parse = AlphaVantageCollector.__new__(AlphaVantageCollector)._parse_earnings_csv
+        db_manager.replace_earnings_calendar(parse(EARNINGS_CSV))
+        
+        assert db_manager.replace_earnings_calendar(parse("symbol,name,reportDate\n")) == 0
+        with db_manager.get_session() as session:
+            assert session.query(EarningsCalendar).count() == 2
+
+
+def lease(db_manager, worker_id="worker-1", limit=10, lease_seconds=60, max_attempts=3):
+    return db_manager.lease_collection_jobs(worker_id, limit, lease_seconds, max_attempts)
+
+
+def stored_job(db_manager, job_id):
+    with db_manager.get_session() as session:
+        return db_manager._job_to_dict(session.get(CollectionJob, job_id))
+
+
+class TestCollectionJobs:
+    """Test leasing, retrying and settling jobs in the collection queue."""
+    
+    def test_leases_never_share_a_job(self, db_manager):
+        """Test that concurrent workers each get different jobs until the queue is empty."""
+        db_manager.enqueue_collection_jobs(["AAPL", "MSFT", "TSLA"], ["prices"])
+        
+        first = lease(db_manager, "worker-1", limit=2)
+        second = lease(db_manager, "worker-2", limit=2)
+        
+        assert len(first) == 2 and len(second) == 1
+        assert not {job["id"] for job in first} & {job["id"] for job in second}
+        assert {job["ticker"] for job in first + second} == {"AAPL", "MSFT", "TSLA"}
+        assert lease(db_manager, "worker-3") == []
+    
+    def test_expired_lease_is_leased_again(self, db_manager):
+        """Test that a job whose lease expired goes to the next worker with one more attempt."""
+        db_manager.enqueue_collection_jobs(["AAPL"], ["prices"])
+        [stale] = lease(db_manager, "worker-1", lease_seconds=-1)
+        
+        [job] = lease(db_manager, "worker-2")
+        
+        assert job["id"] == stale["id"]
+        assert (stale["attempts"], job["attempts"]) == (1, 2)
+        assert job["lease_owner"] == "worker-2" and job["lease_token"] != stale["lease_token"]
+    
+    def test_expired_lease_on_last_attempt_fails(self, db_manager):
+        """Test that a job whose final lease expired is failed instead of leased again."""
+        db_manager.enqueue_collection_jobs(["AAPL"], ["prices"])
+        [job] = lease(db_manager, lease_seconds=-1, max_attempts=1)
+        
+        assert lease(db_manager, max_attempts=1) == []
+        stored = stored_job(db_manager, job["id"])
+        assert stored["status"] == "failed" and stored["last_error"] == "lease expired"
+    
+    @pytest.mark.parametrize("attempts,delay", [(1, 60), (2, 120), (3, 240)])
+    def test_fail_backs_off_exponentially(self, db_manager, attempts, delay):
+        """Test that a failed job becomes due again after retry_delay * 2 ** (attempts - 1)."""
+        db_manager.enqueue_collection_jobs(["AAPL"], ["prices"])
+        for _ in range(attempts):
+            [job] = lease(db_manager, lease_seconds=-1, max_attempts=5)
+        
+        before = datetime.utcnow()
+        db_manager.fail_collection_job(job, "timeout", max_attempts=5, retry_delay_seconds=60)
+        after = datetime.utcnow()
+        
+        stored = stored_job(db_manager, job["id"])
+        assert stored["status"] == "pending" and stored["last_error"] == "timeout"
+        assert stored["attempts"] == attempts
+        assert before + timedelta(seconds=delay) <= stored["available_at"] <= after + timedelta(seconds=delay)
+        assert lease(db_manager, max_attempts=5) == []
+    
+    def test_fail_on_last_attempt_is_final(self, db_manager):
+        """Test that a job failing its last attempt is not retried."""
+        db_manager.enqueue_collection_jobs(["AAPL"], ["prices"])
+        [job] = lease(db_manager, max_attempts=1)
+        
+        db_manager.fail_collection_job(job, "timeout", max_attempts=1, retry_delay_seconds=60)
+        
+        assert stored_job(db_manager, job["id"])["status"] == "failed"
+    
+    def test_stale_lease_token_changes_nothing(self, db_manager):
+        """Test that a worker whose lease was taken over cannot complete or fail the job."""
+        db_manager.enqueue_collection_jobs(["AAPL"], ["prices"])
+        [stale] = lease(db_manager, "worker-1", lease_seconds=-1)
+        [job] = lease(db_manager, "worker-2")
+        
+        db_manager.complete_collection_job(stale)
+        db_manager.fail_collection_job(stale, "timeout", max_attempts=3, retry_delay_seconds=60)
+        
+        stored = stored_job(db_manager, job["id"])
+        assert stored["status"] == "leased" and stored["lease_token"] == job["lease_token"]
+        assert stored["attempts"] == 2 and stored["last_error"] is None
+        
+        db_manager.complete_collection_job(job)
+        assert stored_job(db_manager, job["id"])["status"] == "done"
+    
+    def test_enqueue_resets_jobs_except_live_leases(self, db_manager):
+        """Test that re-enqueueing reschedules settled jobs but leaves leased ones with their worker."""
+        db_manager.enqueue_collection_jobs(["AAPL", "MSFT"], ["prices"])
+        jobs = {job["ticker"]: job for job in lease(db_manager)}
+        db_manager.complete_collection_job(jobs["AAPL"])
+        
+        assert db_manager.enqueue_collection_jobs(["AAPL", "MSFT"], ["prices"]) == 2
+        
+        assert stored_job(db_manager, jobs["AAPL"]["id"])["status"] == "pending"
+        leased = stored_job(db_manager, jobs["MSFT"]["id"])
+        assert leased["status"] == "leased" and leased["attempts"] == 1
+        assert db_manager.get_collection_job_counts() == {"pending": 1, "leased": 1}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,83 @@
+"""
+Tests for near-duplicate news detection.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_processing.dedup import (
+    DEFAULT_MAX_DISTANCE, NearDuplicateIndex, cluster_near_duplicates, dedupe_news, hamming_distance, simhash
+)
+
+STORY = (
+    "Apple commits to carbon neutral supply chain by 2030. The company said on Tuesday that its "
+    "manufacturing partners will switch to renewable energy, cutting emissions across its products "
+    "and data centers while expanding recycling programs for rare earth materials."
+)
+
+
+class TestSimHash:
+    """Test fingerprint similarity."""
+    
+    def test_light_edits_stay_close(self):
+        """Test that a syndicated copy with a byline is within the default distance."""
+        copy = "Reuters - " + STORY.replace("Tuesday", "Tuesday,") + " Reporting by staff."
+        assert hamming_distance(simhash(STORY), simhash(copy)) <= DEFAULT_MAX_DISTANCE
+    
+    def test_different_stories_are_far_apart(self):
+        """Test that unrelated stories get distant fingerprints."""
+        other = "Tesla faces labor board complaint over working conditions at its Texas gigafactory plant."
+        assert hamming_distance(simhash(STORY), simhash(other)) > DEFAULT_MAX_DISTANCE
+    
+    def test_index_finds_near_fingerprints(self):
+        """Test that the banded index finds every fingerprint within the distance."""
+        index = NearDuplicateIndex(max_distance=3)  # 4 bands of 16 bits
+        index.add(0b1011 << 40)
+        assert index.find((0b1011 << 40) ^ 0b111) == 0
+        assert index.find((0b1011 << 40) ^ 0b1111) is None
+
+
+class TestDedupeNews:
+    """Test clustering of news articles."""
+    
+    def test_cross_source_copies_collapse(self):
+        """Test that copies from different sources keep the first article only."""
+        articles = [
+            {"headline": "Apple sets 2030 carbon goal", "content": STORY, "url": "https://a.example/1",
+             "source": "Yahoo", "data_source": "yahoo_finance"},
+            {"headline": "Tesla labor complaint", "content": "Labor board complaint filed over Texas plant.",
+             "url": "https://b.example/2", "source": "AP", "data_source": "news_api"},
+            {"headline": "Apple sets 2030 carbon goal", "content": STORY + " More to follow.",
+             "url": "https://c.example/3", "source": "Reuters", "data_source": "news_api"}
+        ]
+        
+        unique_news = dedupe_news(articles)
+        
+        assert [article["url"] for article in unique_news] == ["https://a.example/1", "https://b.example/2"]
+        assert unique_news[0]["duplicates"][0]["url"] == "https://c.example/3"
+        assert unique_news[1]["duplicates"] == []
+    
+    def test_rerun_keeps_earlier_duplicates(self):
+        """Test that merging new articles into a deduped list keeps the duplicates already found."""
+        first = {"headline": "Apple sets 2030 carbon goal", "content": STORY, "url": "https://a.example/1"}
+        copy = {"headline": "Apple sets 2030 carbon goal", "content": STORY, "url": "https://c.example/3"}
+        unique_news = dedupe_news([first, copy])
+        
+        late_copy = {"headline": "Apple sets 2030 carbon goal", "content": STORY, "url": "https://d.example/4",
+                     "data_source": "alpha_vantage"}
+        merged = dedupe_news(unique_news + [late_copy])
+        
+        assert len(merged) == 1
+        assert [duplicate["url"] for duplicate in merged[0]["duplicates"]] == ["https://c.example/3", "https://d.example/4"]
+    
+    def test_empty_texts_are_not_merged(self):
+        """Test that articles with no text are kept apart."""
+        assert cluster_near_duplicates(["", "", STORY]) == [[0], [1], [2]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+"""
+Tests for the weighted ESG lexicon matcher.
+"""
+
+import pytest
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_processing.esg_lexicon import DEFAULT_LEXICON_PATH, ESGLexicon, LexiconTerm
+
+
+@pytest.fixture
+def lexicon():
+    return ESGLexicon([
+        LexiconTerm("green", 0.1, "E", ("greener",)),
+        LexiconTerm("carbon neutral", 0.2, "E"),
+        LexiconTerm("scandal", -0.1, "G", ("scandals",)),
+        LexiconTerm("diversity", 0.1, "S")
+    ])
+
+
+class TestESGLexicon:
+    """Test matching, weighting and loading of lexicon terms."""
+    
+    def test_word_boundaries(self, lexicon):
+        """Test that terms only match whole words, multi-word terms across whitespace."""
+        assert lexicon.score("Greenberg joins the board").terms == []
+        assert lexicon.score("Plant goes Carbon\nNeutral, greener than before").terms == ["carbon neutral", "green"]
+    
+    def test_weights_and_pillars(self, lexicon):
+        """Test that each term counts once and bonuses add up per pillar."""
+        score = lexicon.score("Green bonds, green roofs; scandals and a scandal hit diversity goals")
+        
+        assert score.terms == ["green", "scandal", "diversity"]
+        assert score.bonus == pytest.approx(0.1)
+        assert score.pillars == pytest.approx({"E": 0.1, "S": 0.1, "G": -0.1})
+    
+    def test_batch_matches_single_scores(self, lexicon):
+        """Test that batch scoring gives the per-text results in order."""
+        texts = ["green scandal", "", "diversity", "green scandal"]
+        
+        assert lexicon.score_batch(texts) == [lexicon.score(text) for text in texts]
+    
+    def test_term_file(self, tmp_path):
+        """Test that the bundled file loads and malformed files are rejected."""
+        bundled = ESGLexicon.from_file(DEFAULT_LEXICON_PATH)
+        assert bundled.score("Regulators fined the firm over emissions violations").bonus == pytest.approx(-0.3)
+        
+        unversioned = tmp_path / "unversioned.json"
+        unversioned.write_text(json.dumps({"terms": []}))
+        bad_pillar = tmp_path / "bad_pillar.json"
+        bad_pillar.write_text(json.dumps({"version": 1, "terms": [{"term": "x", "weight": 0.1, "pillar": "Q"}]}))
+        for path in (unversioned, bad_pillar):
+            with pytest.raises(ValueError):
+                ESGLexicon.from_file(str(path))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,116 @@
+"""
+Tests for batched FMP requests fanned out into the shared HTTP cache.
+"""
+
+import pytest
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.fmp_collector import FMPCollector
+from src.data_collection.http_cache import CachedResponse
+
+BASE_URL = "https://fmp.example/api/v3"
+
+
+class FakeHTTPCache:
+    """In-memory stand-in for HTTPCache answering batch requests from known profiles."""
+    
+    def __init__(self, profiles, status_code=200):
+        self.profiles = profiles
+        self.status_code = status_code
+        self.entries = {}
+        self.requests = []
+    
+    def peek(self, url, params=None):
+        if url not in self.entries:
+            return None
+        return CachedResponse(url, 200, self.entries[url], from_cache=True)
+    
+    def put(self, url, params, content, headers=None, endpoint_class=None):
+        self.entries[url] = content
+    
+    def get(self, url, params=None, timeout=None, before_fetch=None):
+        self.requests.append(url)
+        symbols = url.rsplit("/", 1)[1].split(",")
+        body = [self.profiles[symbol] for symbol in symbols if symbol in self.profiles]
+        return CachedResponse(url, self.status_code, json.dumps(body).encode("utf-8"))
+
+
+class FakeQuotaPlanner:
+    def before_fetch(self, provider, ticker, data_type, rate_limiter=None):
+        return None
+    
+    def observe(self, provider, hook, response):
+        pass
+
+
+def profile(symbol):
+    return {"symbol": symbol, "companyName": f"{symbol} Inc", "sector": "Technology", "fullTimeEmployees": "100"}
+
+
+def make_collector(http_cache, batch_size=2):
+    return FMPCollector(api_key="test-key", rate_limiter=object(), http_cache=http_cache, base_url=BASE_URL,
+                        quota_planner=FakeQuotaPlanner(), batch_size=batch_size)
+
+
+class TestFMPCollector:
+    """Test batching, cache reuse and fan-out of batch answers."""
+    
+    def test_symbols_fetched_in_batches(self):
+        """Test that uncached symbols are requested batch_size at a time."""
+        http_cache = FakeHTTPCache({symbol: profile(symbol) for symbol in ("AAPL", "MSFT", "TSLA", "NVDA", "JPM")})
+        profiles = make_collector(http_cache).get_profiles(["AAPL", "MSFT", "TSLA", "NVDA", "JPM", "AAPL"])
+        
+        assert http_cache.requests == [
+            f"{BASE_URL}/profile/AAPL,MSFT", f"{BASE_URL}/profile/TSLA,NVDA", f"{BASE_URL}/profile/JPM"
+        ]
+        assert list(profiles) == ["AAPL", "MSFT", "TSLA", "NVDA", "JPM"]
+        assert profiles["NVDA"]["companyName"] == "NVDA Inc"
+    
+    def test_fresh_cache_entries_are_not_requested(self):
+        """Test that symbols with a fresh single-symbol entry are served without a request."""
+        http_cache = FakeHTTPCache({"MSFT": profile("MSFT")})
+        http_cache.put(f"{BASE_URL}/profile/AAPL", None, json.dumps([profile("AAPL")]).encode("utf-8"))
+        
+        profiles = make_collector(http_cache).get_profiles(["AAPL", "MSFT"])
+        
+        assert http_cache.requests == [f"{BASE_URL}/profile/MSFT"]
+        assert profiles["AAPL"]["companyName"] == "AAPL Inc"
+        assert profiles["MSFT"]["companyName"] == "MSFT Inc"
+    
+    def test_batch_answer_fanned_out_per_symbol(self):
+        """Test that each symbol of a batch is cached on its own, unknown symbols as an empty list."""
+        http_cache = FakeHTTPCache({"AAPL": profile("AAPL")})
+        collector = make_collector(http_cache)
+        
+        profiles = collector.get_profiles(["AAPL", "ZZZZ"])
+        
+        assert profiles == {"AAPL": profile("AAPL"), "ZZZZ": None}
+        assert json.loads(http_cache.entries[f"{BASE_URL}/profile/AAPL"]) == [profile("AAPL")]
+        assert json.loads(http_cache.entries[f"{BASE_URL}/profile/ZZZZ"]) == []
+        assert collector.get_profiles(["AAPL", "ZZZZ"]) == profiles
+        assert len(http_cache.requests) == 1
+    
+    def test_failed_batch_is_not_cached(self):
+        """Test that a failed batch leaves its symbols empty and uncached."""
+        http_cache = FakeHTTPCache({"AAPL": profile("AAPL")}, status_code=500)
+        
+        assert make_collector(http_cache).get_profiles(["AAPL"]) == {"AAPL": None}
+        assert http_cache.entries == {}
+    
+    def test_company_info_only_for_known_profiles(self):
+        """Test that company info is formatted for symbols FMP has a profile for."""
+        http_cache = FakeHTTPCache({"AAPL": profile("AAPL")})
+        info = make_collector(http_cache).get_company_info_batch(["AAPL", "ZZZZ"])
+        
+        assert list(info) == ["AAPL"]
+        assert info["AAPL"]["name"] == "AAPL Inc" and info["AAPL"]["employees"] == 100
+        assert info["AAPL"]["data_source"] == "fmp"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
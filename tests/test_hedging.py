@@ -0,0 +1,72 @@
+"""
+Tests for hedged fallback chains.
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.hedging import Hedger
+
+
+def slow(value, seconds):
+    def fetch():
+        time.sleep(seconds)
+        return value
+    return fetch
+
+
+def failing():
+    raise ConnectionError("provider down")
+
+
+class TestHedger:
+    """Test hedged races between fallback sources."""
+    
+    def test_slow_primary_is_hedged(self):
+        """Test that the secondary starts after the hedge delay and wins."""
+        hedger = Hedger(default_delay=0.05, min_delay=0.01)
+        start = time.monotonic()
+        
+        result = hedger.race("stock_data", {"fmp": slow([1], 2.0), "yahoo_finance": slow([2], 0.01)})
+        
+        assert result == ("yahoo_finance", [2])
+        assert time.monotonic() - start < 1.0
+    
+    def test_failure_hands_over_immediately(self):
+        """Test that a failing source does not wait out the hedge delay."""
+        hedger = Hedger(default_delay=5.0)
+        start = time.monotonic()
+        
+        result = hedger.race("company_data", {"fmp": failing, "alpha_vantage": slow({"Symbol": "AAPL"}, 0.01)})
+        
+        assert result == ("alpha_vantage", {"Symbol": "AAPL"})
+        assert time.monotonic() - start < 1.0
+    
+    def test_no_valid_result(self):
+        """Test that empty results from every source give None."""
+        hedger = Hedger(default_delay=0.01, min_delay=0.01)
+        assert hedger.race("stock_data", {"fmp": lambda: None, "yahoo_finance": lambda: []}) is None
+    
+    def test_disabled_runs_in_sequence(self):
+        """Test that with hedging off the fallback only starts when the primary gives up."""
+        hedger = Hedger(enabled=False, default_delay=0.01, min_delay=0.01)
+        assert hedger.race("stock_data", {"fmp": slow([1], 0.2), "yahoo_finance": slow([2], 0.01)}) == ("fmp", [1])
+    
+    def test_stats_reorder_sources(self):
+        """Test that a consistently faster source moves to the front."""
+        hedger = Hedger(default_delay=1.0)
+        for _ in range(5):
+            hedger.race("stock_data", {"fmp": failing, "yahoo_finance": lambda: [1]})
+        
+        assert hedger.rank("stock_data", ["fmp", "yahoo_finance"]) == ["yahoo_finance", "fmp"]
+        wins = {row["source"]: row["wins"] for row in hedger.snapshot("stock_data")}
+        assert wins == {"fmp": 0, "yahoo_finance": 5}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
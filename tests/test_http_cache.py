@@ -0,0 +1,147 @@
+"""
+Tests for the disk-backed HTTP response cache with a stubbed session.
+"""
+
+import pytest
+import sys
+import os
+import zlib
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection import http_cache as http_cache_module
+from src.data_collection.http_cache import ENDPOINT_TTLS, HTTPCache, cache_key, classify_endpoint
+
+PRICES_URL = "https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol=AAPL"
+OVERVIEW_URL = "https://www.alphavantage.co/query?function=OVERVIEW&symbol=AAPL"
+
+
+class FakeClock:
+    """Stands in for the time module inside http_cache."""
+    
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def time(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """Answers with queued responses and records the request headers."""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+    
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return HTTPCache(str(tmp_path / "cache"))
+
+
+class TestHTTPCache:
+    """Test TTLs, revalidation, eviction, compression and throttling."""
+    
+    def test_ttl_follows_endpoint_class(self, cache, clock):
+        """Test that prices expire after minutes while fundamentals stay fresh for a day."""
+        assert classify_endpoint(PRICES_URL) == "prices"
+        assert classify_endpoint(OVERVIEW_URL) == "fundamentals"
+        session = FakeSession(
+            FakeResponse(200, b'{"price": 1}'), FakeResponse(200, b'{"name": "Apple"}'),
+            FakeResponse(200, b'{"price": 2}')
+        )
+        cache.get(PRICES_URL, session=session)
+        cache.get(OVERVIEW_URL, session=session)
+        
+        clock.now += ENDPOINT_TTLS["prices"] + 1
+        assert cache.get(PRICES_URL, session=session).json() == {"price": 2}
+        overview = cache.get(OVERVIEW_URL, session=session)
+        assert overview.from_cache and overview.json() == {"name": "Apple"}
+        assert len(session.requests) == 3
+    
+    def test_stale_entry_revalidated_with_etag(self, cache, clock):
+        """Test that a 304 answer serves the stored body and renews its TTL."""
+        session = FakeSession(
+            FakeResponse(200, b'{"price": 1}', {"ETag": '"v1"'}),
+            FakeResponse(304, b"")
+        )
+        cache.get(PRICES_URL, session=session)
+        clock.now += ENDPOINT_TTLS["prices"] + 1
+        
+        response = cache.get(PRICES_URL, session=session)
+        assert session.requests[1] == {"If-None-Match": '"v1"'}
+        assert response.status_code == 200 and response.json() == {"price": 1}
+        assert cache.get(PRICES_URL, session=session).from_cache
+        assert len(session.requests) == 2
+    
+    def test_least_recently_used_entries_evicted(self, tmp_path, clock):
+        """Test that the store shrinks by dropping the entries read longest ago."""
+        bodies = [os.urandom(1000) for _ in range(3)]  # random bytes do not compress
+        cache = HTTPCache(str(tmp_path / "cache"), max_bytes=2500)
+        urls = [f"https://newsapi.org/v2/everything?q={name}" for name in ("a", "b", "c")]
+        
+        session = FakeSession(*(FakeResponse(200, body) for body in bodies))
+        for url in urls[:2]:
+            clock.now += 1
+            cache.get(url, session=session)
+        clock.now += 1
+        assert cache.peek(urls[0]) is not None  # a is now more recently used than b
+        clock.now += 1
+        cache.get(urls[2], session=session)
+        
+        assert cache.peek(urls[1]) is None
+        assert cache.peek(urls[0]).content == bodies[0]
+        assert cache.peek(urls[2]).content == bodies[2]
+        assert cache.stats()["bytes"] <= 2500
+    
+    def test_bodies_stored_compressed(self, cache):
+        """Test that bodies are zlib-compressed on disk and served decompressed."""
+        url = "https://newsapi.org/v2/everything?q=ESG"
+        body = b'{"articles": [' + b'{"title": "ESG"},' * 500 + b'{}]}'
+        cache.get(url, session=FakeSession(FakeResponse(200, body)))
+        
+        entry = cache._lookup(cache_key("GET", url))
+        with open(cache._body_path(entry["body_hash"]), "rb") as body_file:
+            stored = body_file.read()
+        assert len(stored) < len(body) / 10
+        assert zlib.decompress(stored) == body
+        assert cache.peek(url).content == body
+    
+    @pytest.mark.parametrize("status, body", [
+        (200, b'{"Note": "Thank you for using Alpha Vantage! Our standard API rate limit is 5 requests per minute."}'),
+        (200, b'{"Information": "You have reached the daily rate limit."}'),
+        (429, b'{"error": "Too Many Requests"}')
+    ])
+    def test_throttle_responses_not_cached(self, cache, status, body):
+        """Test that rate limit answers are returned but fetched again next time."""
+        session = FakeSession(FakeResponse(status, body), FakeResponse(200, b'{"Symbol": "AAPL"}'))
+        
+        first = cache.get(OVERVIEW_URL, session=session)
+        assert first.status_code == status and not first.from_cache
+        assert cache.peek(OVERVIEW_URL) is None
+        assert cache.get(OVERVIEW_URL, session=session).json() == {"Symbol": "AAPL"}
+        assert cache.get(OVERVIEW_URL, session=session).from_cache
+        assert len(session.requests) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
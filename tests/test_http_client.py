@@ -0,0 +1,109 @@
+"""
+Tests for the shared pooled HTTP client.
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+
+import aiohttp
+import requests
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection import http_client
+from src.data_collection.http_client import HTTPClientConfig, PooledSession, create_async_session, json_loads
+
+CONFIG = HTTPClientConfig(timeout=7.0, pool_connections=2, pool_maxsize=4)
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Keyword arguments of every request that reaches requests.Session, which sends nothing"""
+    calls = []
+    
+    def request(self, method, url, **kwargs):
+        calls.append(kwargs)
+        return None
+    
+    monkeypatch.setattr(requests.Session, "request", request)
+    return calls
+
+
+@pytest.fixture
+def async_options(monkeypatch):
+    """Build a session from CONFIG inside a running loop and return its timeout and headers"""
+    monkeypatch.setattr(http_client, "_http_config", CONFIG)
+    
+    def async_options(**session_options):
+        async def build():
+            async with create_async_session(**session_options) as session:
+                return session.timeout, dict(session.headers)
+        return asyncio.run(build())
+    return async_options
+
+
+class TestPooledSession:
+    """Test the default timeout of the shared sync session."""
+    
+    @pytest.mark.parametrize("timeout", [{}, {"timeout": None}])
+    def test_default_timeout_injected(self, sent, timeout):
+        """Test that calls without their own timeout get the configured one."""
+        PooledSession(CONFIG).get("https://example.com/quote", **timeout)
+        
+        assert sent[0]["timeout"] == 7.0
+    
+    def test_explicit_timeout_wins(self, sent):
+        """Test that a call's own timeout replaces the configured one."""
+        PooledSession(CONFIG).get("https://example.com/quote", timeout=2.5)
+        
+        assert sent[0]["timeout"] == 2.5
+    
+    def test_shared_headers_sent(self):
+        """Test that the session carries the shared headers."""
+        assert PooledSession(CONFIG).headers["User-Agent"] == http_client.DEFAULT_HEADERS["User-Agent"]
+
+
+class TestAsyncSession:
+    """Test that the async session shares the sync configuration."""
+    
+    def test_default_timeout_and_headers(self, async_options):
+        """Test that the session gets the configured timeout and headers."""
+        timeout, headers = async_options()
+        
+        assert timeout.total == 7.0
+        assert headers["User-Agent"] == http_client.DEFAULT_HEADERS["User-Agent"]
+    
+    def test_explicit_timeout_wins(self, async_options):
+        """Test that a timeout passed in replaces the configured one."""
+        timeout, _ = async_options(timeout=aiohttp.ClientTimeout(total=2.5))
+        
+        assert timeout.total == 2.5
+
+
+class TestJsonLoads:
+    """Test the JSON decoder choice."""
+    
+    def test_falls_back_without_orjson(self, monkeypatch):
+        """Test that bodies decode with the standard library when orjson is missing."""
+        monkeypatch.setattr(http_client, "orjson", None)
+        
+        assert json_loads(b'{"symbol": "AAPL", "price": 185.5}') == {"symbol": "AAPL", "price": 185.5}
+        assert json_loads('[1, 2]') == [1, 2]
+    
+    def test_uses_orjson_when_installed(self, monkeypatch):
+        """Test that orjson decodes the body when it is available."""
+        class FakeOrjson:
+            @staticmethod
+            def loads(content):
+                return {"decoded_by": "orjson"}
+        
+        monkeypatch.setattr(http_client, "orjson", FakeOrjson)
+        
+        assert json_loads(b'{}') == {"decoded_by": "orjson"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
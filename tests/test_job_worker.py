@@ -0,0 +1,105 @@
+"""
+Tests for the collection job worker on a throwaway SQLite queue.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import CollectionJob
+from src.data_collection import job_worker
+from src.data_collection.job_worker import JobWorker
+
+
+class FakeOrchestrator:
+    """Returns fixed results for a feed and records what it was asked to collect."""
+    
+    def __init__(self, results=None, error=None):
+        self.results = results
+        self.error = error
+        self.calls = []
+    
+    def collect_feed(self, feed, tickers, days_back=30):
+        self.calls.append((feed, tickers, days_back))
+        if self.error:
+            raise self.error
+        return self.results
+
+
+@pytest.fixture
+def make_worker(db_manager, monkeypatch):
+    monkeypatch.setattr(job_worker, "get_db_manager", lambda: db_manager)
+    
+    def make_worker(orchestrator):
+        return JobWorker(orchestrator=orchestrator, worker_id="worker-1", max_attempts=3, retry_delay=60)
+    return make_worker
+
+
+def leased_jobs(db_manager, tickers, feed="news"):
+    db_manager.enqueue_collection_jobs(tickers, [feed], days_back=7)
+    return db_manager.lease_collection_jobs("worker-1", len(tickers), 60, 3)
+
+
+def job_states(db_manager):
+    with db_manager.get_session() as session:
+        return {job.ticker: (job.status, job.last_error) for job in session.query(CollectionJob)}
+
+
+class TestRunGroup:
+    """Test mapping a feed's per-ticker results onto the leased jobs."""
+    
+    def test_results_and_errors_settle_each_job(self, db_manager, make_worker):
+        """Test that successful tickers are done and the rest fail with their own errors."""
+        orchestrator = FakeOrchestrator({
+            "companies": {"AAPL": "success", "MSFT": "failed", "TSLA": "error"},
+            "errors": ["Failed to save data for MSFT", "Error processing TSLA: timeout",
+                       "Error processing MSFTX: timeout"]
+        })
+        worker = make_worker(orchestrator)
+        jobs = leased_jobs(db_manager, ["AAPL", "MSFT", "TSLA", "NVDA"])
+        
+        worker._run_group("news", 7, jobs)
+        
+        assert orchestrator.calls == [("news", ["AAPL", "MSFT", "TSLA", "NVDA"], 7)]
+        assert job_states(db_manager) == {
+            "AAPL": ("done", None),
+            "MSFT": ("pending", "Failed to save data for MSFT"),
+            "TSLA": ("pending", "Error processing TSLA: timeout"),
+            "NVDA": ("pending", "news collection failed for NVDA")
+        }
+        assert worker.stats == {"batches": 0, "done": 1, "failed": 3}
+    
+    def test_crashed_feed_fails_every_job(self, db_manager, make_worker):
+        """Test that an exception from the feed fails all of its jobs with that error."""
+        worker = make_worker(FakeOrchestrator(error=RuntimeError("database is locked")))
+        jobs = leased_jobs(db_manager, ["AAPL", "MSFT"])
+        
+        worker._run_group("news", 7, jobs)
+        
+        assert job_states(db_manager) == {
+            "AAPL": ("pending", "database is locked"), "MSFT": ("pending", "database is locked")
+        }
+        assert worker.stats["failed"] == 2
+
+
+class TestRun:
+    """Test the lease loop."""
+    
+    def test_drain_processes_queue_once(self, db_manager, make_worker):
+        """Test that a draining worker settles every due job and then returns."""
+        orchestrator = FakeOrchestrator({"companies": {"AAPL": "success", "MSFT": "success"}, "errors": []})
+        worker = make_worker(orchestrator)
+        db_manager.enqueue_collection_jobs(["AAPL", "MSFT"], ["prices", "esg"], days_back=7)
+        
+        worker.run(drain=True)
+        
+        assert sorted(feed for feed, _, _ in orchestrator.calls) == ["esg", "prices"]
+        assert db_manager.get_collection_job_counts() == {"done": 4}
+        assert worker.stats == {"batches": 1, "done": 4, "failed": 0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
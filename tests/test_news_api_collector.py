@@ -0,0 +1,58 @@
+"""
+Tests for packing NewsAPI keywords into boolean queries.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.news_api_collector import ESG_KEYWORDS, MAX_QUERY_LENGTH, build_query, plan_queries
+
+
+class TestBuildQuery:
+    """Test the boolean query for one keyword group."""
+    
+    def test_keywords_or_combined_and_phrases_quoted(self):
+        """Test that keywords are OR-ed under the company and multi-word terms are quoted."""
+        query = build_query("Johnson & Johnson", ["ESG", "climate change", "carbon"])
+        assert query == '"Johnson & Johnson" AND (ESG OR "climate change" OR carbon)'
+        assert build_query("Apple", ["ESG"]) == "Apple AND (ESG)"
+
+
+class TestPlanQueries:
+    """Test splitting keywords across queries under the length limit."""
+    
+    def test_all_keywords_fit_one_query(self):
+        """Test that the default keywords need a single query for a typical company."""
+        groups = plan_queries("Microsoft", ESG_KEYWORDS)
+        
+        assert groups == [ESG_KEYWORDS]
+        assert len(build_query("Microsoft", groups[0])) <= MAX_QUERY_LENGTH
+    
+    def test_groups_respect_max_length_and_keep_order(self):
+        """Test that a tight limit splits the keywords into in-order groups that each fit."""
+        groups = plan_queries("Alphabet", ESG_KEYWORDS, max_length=60)
+        
+        assert len(groups) > 1
+        assert [keyword for group in groups for keyword in group] == ESG_KEYWORDS
+        assert all(len(build_query("Alphabet", group)) <= 60 for group in groups)
+        # Greedy packing: the next group's first keyword would not have fit the previous query
+        for group, following in zip(groups, groups[1:]):
+            assert len(build_query("Alphabet", group + following[:1])) > 60
+    
+    def test_keyword_too_long_for_any_query_is_skipped(self):
+        """Test that a keyword that cannot fit even alone is dropped instead of breaking the limit."""
+        groups = plan_queries("Tesla", ["ESG", "x" * 80, "carbon"], max_length=40)
+        
+        assert groups == [["ESG", "carbon"]]
+    
+    def test_no_keywords_no_queries(self):
+        """Test that nothing is planned without keywords."""
+        assert plan_queries("Tesla", []) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,42 @@
+"""
+Tests for the ONNX backend's accuracy drift report.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_processing.onnx_backend import drift_report
+
+
+def result(score, label):
+    return {"sentiment_score": score, "sentiment_label": label, "method": "huggingface"}
+
+
+class TestDriftReport:
+    """Test the comparison of two backends' results."""
+    
+    def test_agreement_and_score_differences(self):
+        """Test that label agreement and score drift are measured per text."""
+        reference = [result(0.8, "positive"), result(-0.6, "negative"), result(0.05, "neutral")]
+        candidate = [result(0.75, "positive"), result(-0.6, "negative"), result(0.15, "positive")]
+        
+        report = drift_report(reference, candidate)
+        
+        assert report["texts"] == 3
+        assert report["label_agreement"] == pytest.approx(2 / 3)
+        assert report["mean_score_diff"] == pytest.approx(0.05)
+        assert report["max_score_diff"] == pytest.approx(0.1)
+        assert report["disagreements"] == [{"index": 2, "reference": "neutral", "candidate": "positive"}]
+    
+    def test_mismatched_lengths_rejected(self):
+        """Test that results for different text lists are not compared."""
+        with pytest.raises(ValueError):
+            drift_report([result(0.1, "neutral")], [])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,164 @@
+"""
+Tests for the streaming collection pipeline with a fake orchestrator.
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.pipeline import CollectionPipeline
+from src.data_collection.data_orchestrator import (
+    DataOrchestrator, WATERMARK_NEWS_API, WATERMARK_YAHOO_NEWS, WATERMARK_YAHOO_PRICES
+)
+
+STORIES = [
+    "opens a solar farm in the Nevada desert to power its data centers",
+    "faces a class action lawsuit over warehouse labor conditions"
+]
+
+
+class FakeDatabase:
+    """Records every write in order; batches holding a ticker in fail_tickers raise."""
+    
+    def __init__(self, fail_tickers=()):
+        self.fail_tickers = set(fail_tickers)
+        self.events = []
+        self.companies = {}
+        self.watermarks = {}
+    
+    def get_watermark(self, ticker, source):
+        return self.watermarks.get((ticker, source))
+    
+    def set_watermark(self, ticker, source, timestamp):
+        self.events.append(("watermark", ticker, source))
+        self.watermarks[(ticker, source)] = timestamp
+    
+    def get_company_by_ticker(self, ticker):
+        return {"id": self.companies[ticker]} if ticker in self.companies else None
+    
+    def insert_company(self, company_info):
+        self.companies[company_info["ticker"]] = len(self.companies) + 1
+        return self.companies[company_info["ticker"]]
+    
+    def _insert(self, kind, rows):
+        tickers = {row["ticker"] for row in rows}
+        if rows and tickers & self.fail_tickers:
+            raise RuntimeError("database is locked")
+        self.events.append(("insert", kind, tickers, len(rows)))
+        return len(rows)
+    
+    def upsert_stock_prices_batch(self, rows):
+        return self._insert("prices", rows)
+    
+    def insert_esg_scores_batch(self, rows):
+        return self._insert("esg_scores", rows)
+    
+    def insert_news_batch(self, rows):
+        return self._insert("news", rows)
+
+
+class FakeYahooCollector:
+    def ticker_context(self, ticker):
+        return None
+    
+    def get_batch_financial_metrics(self, tickers, days_back, since=None, contexts=None):
+        return {
+            ticker: [{"date": f"2024-01-0{day}T00:00:00", "stock_price": 10.0 + day} for day in (2, 3)]
+            for ticker in tickers
+        }
+    
+    def get_company_info(self, ticker, context=None):
+        return {"ticker": ticker, "name": f"{ticker} Corp"}
+    
+    def get_esg_scores(self, ticker, days_back, context=None):
+        return [{"date": f"2024-01-0{day}", "overall_score": 50.0} for day in (2, 3)]
+    
+    def get_news(self, ticker, days_back, since=None, context=None):
+        return [
+            {"date": f"2024-01-0{day}T09:00:00", "headline": f"{ticker} {story}", "content": "",
+             "url": f"https://news.example/{ticker}/{day}", "data_source": "yahoo_finance"}
+            for day, story in zip((2, 3), STORIES)
+        ]
+
+
+class FakeNewsCollector:
+    def get_esg_news(self, name, days_back, since=None):
+        return []
+
+
+class FakeQuotaPlanner:
+    def plan(self, provider, tickers, data_types, skip=None):
+        return []
+
+
+class FakeSentimentAnalyzer:
+    loaded = True
+    
+    def cache_stats(self, since=None):
+        return None
+    
+    def analyze_news_batch(self, articles):
+        return [{**article, "sentiment_score": 0.5, "sentiment_label": "positive"} for article in articles]
+
+
+def make_pipeline(db_manager, batch_size):
+    orchestrator = DataOrchestrator.__new__(DataOrchestrator)
+    orchestrator.db_manager = db_manager
+    orchestrator.yahoo_collector = FakeYahooCollector()
+    orchestrator.news_collector = FakeNewsCollector()
+    orchestrator.alpha_collector = None
+    orchestrator.quota_planner = FakeQuotaPlanner()
+    orchestrator.sentiment_analyzer = FakeSentimentAnalyzer()
+    return CollectionPipeline(orchestrator, queue_size=4, batch_size=batch_size, sentiment_batch_size=2)
+
+
+class TestCollectionPipeline:
+    """Test batching, watermark ordering and failed batches."""
+    
+    def test_rows_written_in_bounded_batches(self):
+        """Test that every row is saved and no flush goes far past the batch size."""
+        db_manager = FakeDatabase()
+        results = make_pipeline(db_manager, batch_size=4).run(["AAPL", "MSFT", "TSLA"])
+        
+        assert results["successful"] == 3 and results["failed"] == 0
+        assert (results["prices_saved"], results["esg_scores_saved"], results["news_saved"]) == (6, 6, 6)
+        inserts = [event for event in db_manager.events if event[0] == "insert"]
+        # A batch is flushed as soon as it reaches batch_size, so no flush holds more than one record over it
+        assert all(count <= 4 + 1 for _, _, _, count in inserts)
+        assert db_manager.watermarks[("MSFT", WATERMARK_YAHOO_PRICES)] == datetime(2024, 1, 3)
+        assert db_manager.watermarks[("MSFT", WATERMARK_YAHOO_NEWS)] == datetime(2024, 1, 3, 9)
+        assert ("MSFT", WATERMARK_NEWS_API) not in db_manager.watermarks
+    
+    def test_watermarks_follow_the_commit(self):
+        """Test that a ticker's watermarks are set only after its last rows were inserted."""
+        db_manager = FakeDatabase()
+        make_pipeline(db_manager, batch_size=5).run(["AAPL", "MSFT"])
+        
+        for ticker in ("AAPL", "MSFT"):
+            last_insert = max(
+                index for index, event in enumerate(db_manager.events)
+                if event[0] == "insert" and ticker in event[2]
+            )
+            first_watermark = min(
+                index for index, event in enumerate(db_manager.events)
+                if event[0] == "watermark" and event[1] == ticker
+            )
+            assert first_watermark > last_insert
+    
+    def test_failed_batch_fails_its_tickers(self):
+        """Test that a failed insert marks its tickers failed and keeps their watermarks."""
+        db_manager = FakeDatabase(fail_tickers={"MSFT"})
+        results = make_pipeline(db_manager, batch_size=3).run(["AAPL", "MSFT", "TSLA"])
+        
+        assert results["companies"] == {"AAPL": "success", "MSFT": "failed", "TSLA": "success"}
+        assert any(error.startswith("Failed to save") for error in results["errors"])
+        assert not [key for key in db_manager.watermarks if key[0] == "MSFT"]
+        assert ("TSLA", WATERMARK_YAHOO_PRICES) in db_manager.watermarks
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
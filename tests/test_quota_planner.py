@@ -0,0 +1,73 @@
+"""
+Tests for the daily call budget planner.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.quota_planner import QuotaExceededError, QuotaLedger, QuotaPlanner
+
+
+@pytest.fixture
+def planner(tmp_path):
+    return QuotaPlanner(QuotaLedger(str(tmp_path / "quota.db")), budgets={"alpha_vantage": 10})
+
+
+class TestQuotaPlanner:
+    """Test budget accounting, reserves and planning."""
+    
+    def test_budget_is_never_exceeded(self, planner):
+        """Test that calls are refused once the daily budget is spent."""
+        planner.paced_allowance = lambda provider: 10
+        granted = [planner.try_acquire("alpha_vantage", f"T{i}", "prices")[0] for i in range(12)]
+        
+        assert sum(call_id is not None for call_id in granted) == 10
+        assert planner.remaining("alpha_vantage") == 0
+    
+    def test_reserve_kept_for_high_priority(self, planner):
+        """Test that low-priority data types leave the reserve untouched."""
+        planner.paced_allowance = lambda provider: 10
+        for i in range(9):
+            planner.try_acquire("alpha_vantage", f"T{i}", "overview")
+        
+        call_id, reason = planner.try_acquire("alpha_vantage", "AAPL", "news_sentiment")
+        assert call_id is None and "reserved" in reason
+        assert planner.try_acquire("alpha_vantage", "AAPL", "prices")[0] is not None
+    
+    def test_daily_quota_message_blocks_provider(self, planner):
+        """Test that a daily quota error stops further calls."""
+        hook = planner.before_fetch("alpha_vantage", "AAPL", "prices")
+        hook()
+        planner.record_result("alpha_vantage", hook.call_id, 429, "Our standard API rate limit is 25 requests per day")
+        
+        with pytest.raises(QuotaExceededError):
+            planner.before_fetch("alpha_vantage", "MSFT", "prices")()
+    
+    def test_plan_skips_fresh_data(self, planner):
+        """Test that planning skips data fetched successfully within its max age."""
+        call_id, _ = planner.try_acquire("alpha_vantage", "AAPL", "overview")
+        planner.record_result("alpha_vantage", call_id, 200)
+        
+        planned = planner.plan("alpha_vantage", ["AAPL", "MSFT"], ["overview", "news_sentiment"])
+        assert ("AAPL", "overview") not in planned
+        assert ("MSFT", "overview") in planned
+        assert planned[0][1] == "overview"  # higher priority first
+    
+    def test_plan_leaves_skipped_calls_to_others(self, planner):
+        """Test that skipped pairs are neither planned nor take budget from the rest."""
+        planned = planner.plan("alpha_vantage", ["AAPL", "MSFT"], ["overview", "news_sentiment"],
+                               skip={("AAPL", "news_sentiment")})
+        
+        assert sorted(planned) == [("AAPL", "overview"), ("MSFT", "news_sentiment"), ("MSFT", "overview")]
+    
+    def test_unbudgeted_provider_is_always_allowed(self, planner):
+        """Test that providers without a daily budget are not tracked."""
+        assert planner.try_acquire("news_api", "AAPL", "news_sentiment") == (-1, None)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
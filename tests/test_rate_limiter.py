@@ -0,0 +1,76 @@
+"""
+Tests for the per-provider token-bucket rate limiter.
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.rate_limiter import TokenBucket, RateLimiter
+
+
+class TestTokenBucket:
+    """Test in-memory token bucket behaviour."""
+
+    def test_burst_up_to_capacity(self):
+        """Test that a full bucket serves its capacity without waiting."""
+        bucket = TokenBucket(rate=1.0, capacity=3)
+
+        waits = [bucket.reserve() for _ in range(3)]
+        assert waits == [0.0, 0.0, 0.0]
+
+    def test_wait_after_burst(self):
+        """Test that callers past the burst are told how long to wait."""
+        bucket = TokenBucket(rate=2.0, capacity=1)
+
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+        assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+    def test_max_wait_refuses_without_reserving(self):
+        """Test that a refused reservation does not consume tokens."""
+        bucket = TokenBucket(rate=1.0, capacity=1)
+
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve(max_wait=0.1) is None
+        assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+class TestRateLimiter:
+    """Test the provider rate limiter."""
+
+    def test_providers_have_independent_buckets(self):
+        """Test that exhausting one provider does not throttle another."""
+        limiter = RateLimiter(limits={"slow": (0.01, 1), "fast": (100.0, 1)})
+
+        assert limiter.acquire("slow")
+        assert not limiter.acquire("slow", timeout=0.01)
+        assert limiter.acquire("fast", timeout=0.01)
+
+    def test_shared_state_across_instances(self, tmp_path):
+        """Test that limiters sharing a state file draw from one budget."""
+        state_path = str(tmp_path / "limits.db")
+        limits = {"news_api": (0.01, 2)}
+        first = RateLimiter(state_path=state_path, limits=limits)
+        second = RateLimiter(state_path=state_path, limits=limits)
+
+        assert first.acquire("news_api", timeout=0)
+        assert second.acquire("news_api", timeout=0)
+        assert not first.acquire("news_api", timeout=0.01)
+
+    def test_acquire_sleeps_for_refill(self):
+        """Test that acquire waits roughly one refill interval when empty."""
+        limiter = RateLimiter(limits={"epa": (20.0, 1)})
+        limiter.acquire("epa")
+
+        start = time.time()
+        assert limiter.acquire("epa")
+        assert time.time() - start >= 0.04
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,141 @@
+"""
+Tests for the collection scheduler and its single-feed jobs.
+"""
+
+import pytest
+import sys
+import os
+from concurrent.futures import Future
+from datetime import timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.scheduler import CollectionScheduler, JobSpec
+from src.data_collection.data_orchestrator import DataOrchestrator, FEED_NEWS, FEED_PRICES, WATERMARK_YAHOO_PRICES
+
+JOBS = [
+    JobSpec(FEED_NEWS, timedelta(minutes=60), priority=1, batch_size=2),
+    JobSpec(FEED_PRICES, timedelta(minutes=15), priority=0, batch_size=0)
+]
+
+
+class FakeExecutor:
+    """Collects submitted work units instead of running them."""
+    
+    def __init__(self):
+        self.submitted = []
+    
+    def submit(self, fn, feed, tickers, days_back):
+        future = Future()
+        self.submitted.append((feed, tickers, future))
+        return future
+
+
+class FakeDatabase:
+    """Stores price rows and watermarks in memory; knows no companies."""
+    
+    def __init__(self):
+        self.prices = []
+        self.watermarks = {}
+    
+    def get_watermark(self, ticker, source):
+        return self.watermarks.get((ticker, source))
+    
+    def set_watermark(self, ticker, source, timestamp):
+        self.watermarks[(ticker, source)] = timestamp
+    
+    def upsert_stock_prices_batch(self, rows):
+        self.prices.extend(rows)
+        return len(rows)
+    
+    def get_company_by_ticker(self, ticker):
+        return None
+
+
+class FakeYahooCollector:
+    def get_batch_financial_metrics(self, tickers, days_back, since=None, contexts=None):
+        return {
+            ticker: [{"date": "2024-01-02T00:00:00", "stock_price": 10.0, "volume": 5, "market_cap": 50.0}]
+            for ticker in tickers
+        }
+
+
+@pytest.fixture
+def scheduler():
+    return CollectionScheduler(["AAPL", "MSFT", "TSLA"], jobs=JOBS, max_workers=1, max_queue_size=10)
+
+
+class TestCollectionScheduler:
+    """Test work units, priorities, skipping and outcome accounting."""
+    
+    def test_units_follow_batch_size(self, scheduler):
+        """Test that batch_size 0 covers the universe in one unit."""
+        assert [unit.key for unit in scheduler.units] == [
+            (FEED_NEWS, ("AAPL", "MSFT")), (FEED_NEWS, ("TSLA",)), (FEED_PRICES, ("AAPL", "MSFT", "TSLA"))
+        ]
+    
+    def test_most_urgent_job_dispatched_first(self, scheduler):
+        """Test that free workers take the lowest priority number first."""
+        executor = FakeExecutor()
+        scheduler._schedule_due(now=1000.0)
+        scheduler._dispatch(executor)
+        
+        assert [(feed, tickers) for feed, tickers, _ in executor.submitted] == [(FEED_PRICES, ("AAPL", "MSFT", "TSLA"))]
+        assert len(scheduler._queue) == 2
+    
+    def test_pending_unit_is_skipped_not_queued_twice(self, scheduler):
+        """Test that a unit still running when due again is skipped for that interval."""
+        executor = FakeExecutor()
+        scheduler._schedule_due(now=1000.0)
+        scheduler._dispatch(executor)
+        scheduler._schedule_due(now=1000.0 + 16 * 60)
+        
+        assert scheduler.stats[FEED_PRICES]["skipped"] == 1
+        assert scheduler.stats[FEED_NEWS]["skipped"] == 0
+        assert len(scheduler._queue) == 2
+    
+    def test_full_queue_leaves_units_due(self):
+        """Test that units beyond the queue bound stay due instead of being dropped."""
+        scheduler = CollectionScheduler(["AAPL", "MSFT", "TSLA"], jobs=JOBS, max_workers=1, max_queue_size=1)
+        scheduler._schedule_due(now=1000.0)
+        
+        assert len(scheduler._queue) == 1
+        assert sorted(due for due in scheduler._next_due.values()) == [0.0, 0.0, 1000.0 + 15 * 60]
+    
+    def test_reap_counts_failures(self):
+        """Test that failed tickers and crashed units are counted per feed."""
+        scheduler = CollectionScheduler(["AAPL", "MSFT", "TSLA"], jobs=JOBS, max_workers=3)
+        executor = FakeExecutor()
+        scheduler._schedule_due(now=1000.0)
+        scheduler._dispatch(executor)
+        
+        prices, news, crashed = (future for _, _, future in executor.submitted)
+        prices.set_result({"successful": 2, "failed": 1})
+        news.set_result({"successful": 2, "failed": 0})
+        crashed.set_exception(RuntimeError("worker died"))
+        scheduler._reap()
+        
+        assert scheduler.stats[FEED_PRICES]["runs"] == 1 and scheduler.stats[FEED_PRICES]["failures"] == 1
+        assert scheduler.stats[FEED_NEWS]["runs"] == 2 and scheduler.stats[FEED_NEWS]["failures"] == 1
+        assert not scheduler._running
+
+
+class TestPricesFeed:
+    """Test the prices-only refresh run by the scheduler and job workers."""
+    
+    def test_prices_saved_for_tickers_without_company_row(self):
+        """Test that new tickers succeed and their price watermark follows the stored rows."""
+        orchestrator = DataOrchestrator.__new__(DataOrchestrator)
+        orchestrator.db_manager = FakeDatabase()
+        orchestrator.yahoo_collector = FakeYahooCollector()
+        
+        results = orchestrator.collect_feed(FEED_PRICES, ["AAPL", "NEWCO"], days_back=5)
+        
+        assert results["successful"] == 2 and results["failed"] == 0
+        assert {row["ticker"] for row in orchestrator.db_manager.prices} == {"AAPL", "NEWCO"}
+        assert ("NEWCO", WATERMARK_YAHOO_PRICES) in orchestrator.db_manager.watermarks
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,124 @@
+"""
+Tests for the sentiment analyzer's lazy model lifecycle and batched scoring.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_processing.esg_lexicon import ESGLexicon
+from src.data_processing.sentiment_analyzer import MAX_TOKENS, SentimentAnalyzer
+from src.data_processing.sentiment_cache import SentimentCache
+
+RESULT = {"sentiment_score": 0.4, "sentiment_label": "positive", "method": "huggingface"}
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    cache = SentimentCache(str(tmp_path / "sentiment.db"), "test-model@1")
+    return SentimentAnalyzer(cache=cache, backend="pytorch")
+
+
+def label_scores(text):
+    """Model output whose positive score is the text's length, so each result points back to its input"""
+    return [{"label": "positive", "score": len(text) / 100},
+            {"label": "negative", "score": 0.0},
+            {"label": "neutral", "score": 0.0}]
+
+
+class FakePipeline:
+    """Transformers pipeline stand-in that records every call."""
+    
+    def __init__(self, fail_batches=False):
+        self.fail_batches = fail_batches
+        self.calls = []
+    
+    def __call__(self, texts, **kwargs):
+        self.calls.append((texts, kwargs))
+        if isinstance(texts, str):
+            return [label_scores(texts)]
+        if self.fail_batches:
+            raise RuntimeError("CUDA out of memory")
+        return [label_scores(text) for text in texts]
+
+
+@pytest.fixture
+def batch_analyzer(tmp_path):
+    """Analyzer with a loaded fake pipeline and no ESG terms to shift its scores"""
+    cache = SentimentCache(str(tmp_path / "sentiment.db"), "test-model@1")
+    analyzer = SentimentAnalyzer(batch_size=2, cache=cache, backend="pytorch", lexicon=ESGLexicon([]))
+    analyzer._pipeline = FakePipeline()
+    analyzer._loaded = True
+    return analyzer
+
+
+class TestSentimentAnalyzerLifecycle:
+    """Test that the model is only loaded when text actually needs scoring."""
+    
+    def test_construction_loads_nothing(self, analyzer):
+        """Test that creating an analyzer does not load the model."""
+        assert not analyzer.loaded
+        assert analyzer.method == "huggingface"
+    
+    def test_cached_texts_skip_loading(self, analyzer):
+        """Test that a fully cached batch is served without loading the model."""
+        analyzer.cache.put("Company cuts emissions", RESULT)
+        
+        assert analyzer.analyze_huggingface_batch(["Company cuts emissions"]) == [RESULT]
+        assert analyzer.analyze_huggingface_batch([]) == []
+        assert not analyzer.loaded
+
+
+class TestBatchedScoring:
+    """Test that batched inference scores each distinct text once and in input order."""
+    
+    def test_sorted_batch_maps_back_to_input_order(self, batch_analyzer):
+        """Test that texts go to the model sorted by length and come back in input order."""
+        texts = ["Refinery spill fouls the river delta", "Wind farm opens", "Board adds two directors"]
+        
+        results = batch_analyzer.analyze_huggingface_batch(texts)
+        
+        assert batch_analyzer._pipeline.calls == [(
+            ["Wind farm opens", "Board adds two directors", "Refinery spill fouls the river delta"],
+            {"batch_size": 2, "truncation": True, "max_length": MAX_TOKENS}
+        )]
+        assert [result["sentiment_score"] for result in results] == pytest.approx([0.36, 0.15, 0.24])
+    
+    def test_identical_texts_scored_once(self, batch_analyzer):
+        """Test that texts equal after normalization reach the model once and share its result."""
+        texts = ["Wind farm opens", "Board adds two directors", "Wind  farm opens ", "Wind farm opens"]
+        
+        results = batch_analyzer.analyze_huggingface_batch(texts)
+        
+        assert batch_analyzer._pipeline.calls[0][0] == ["Wind farm opens", "Board adds two directors"]
+        assert [result["sentiment_score"] for result in results] == pytest.approx([0.15, 0.24, 0.15, 0.15])
+    
+    def test_news_batch_updates_articles_in_place(self, batch_analyzer):
+        """Test that each article dict is updated in place and returned in order."""
+        articles = [{"headline": "Refinery spill fouls the river delta", "content": "", "url": "a"},
+                    {"headline": "Wind farm opens", "content": "", "url": "b"}]
+        
+        analyzed = batch_analyzer.analyze_news_batch(articles)
+        
+        assert len(analyzed) == 2
+        assert all(result is article for result, article in zip(analyzed, articles))
+        assert [article["url"] for article in articles] == ["a", "b"]
+        assert [article["sentiment_score"] for article in articles] == pytest.approx([0.37, 0.16])
+        assert all(article["sentiment_method"] == "esg_enhanced" for article in articles)
+    
+    def test_failed_batch_falls_back_to_single_texts(self, batch_analyzer):
+        """Test that each text is scored on its own when the batched call raises."""
+        batch_analyzer._pipeline = FakePipeline(fail_batches=True)
+        texts = ["Refinery spill fouls the river delta", "Wind farm opens"]
+        
+        results = batch_analyzer.analyze_huggingface_batch(texts)
+        
+        assert [call[0] for call in batch_analyzer._pipeline.calls[1:]] == texts
+        assert [result["sentiment_score"] for result in results] == pytest.approx([0.36, 0.15])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,67 @@
+"""
+Tests for the persistent sentiment result cache.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_processing.sentiment_cache import SentimentCache, normalize_text
+
+RESULT = {"sentiment_score": 0.4, "sentiment_label": "positive", "method": "huggingface"}
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "sentiment.db")
+
+
+class TestSentimentCache:
+    """Test lookups, persistence and hit accounting."""
+    
+    def test_normalized_text_hits(self, cache_path):
+        """Test that whitespace and compatibility characters do not change the key."""
+        cache = SentimentCache(cache_path, "model@1")
+        cache.put("Tesla  expands\nsolar output", RESULT)
+        
+        assert cache.get(" Tesla expands solar output ") == RESULT
+        assert normalize_text("Tesla") != normalize_text("tesla")
+    
+    def test_results_persist_across_instances(self, cache_path):
+        """Test that a new process is served from disk and the LRU stays bounded."""
+        writer = SentimentCache(cache_path, "model@1", memory_size=1)
+        writer.put_many([("first headline", RESULT), ("second headline", RESULT)])
+        assert len(writer._memory) == 1
+        
+        reader = SentimentCache(cache_path, "model@1")
+        assert reader.get_many(["first headline", "unseen", "first headline"]) == [RESULT, None, RESULT]
+        assert reader.get("first headline") == RESULT
+        
+        stats = reader.stats()
+        assert (stats["disk_hits"], stats["misses"], stats["memory_hits"]) == (2, 1, 1)
+        assert stats["hit_rate"] == pytest.approx(0.75)
+    
+    def test_model_version_separates_results(self, cache_path):
+        """Test that results of another model version are never served."""
+        SentimentCache(cache_path, "model@1").put("headline", RESULT)
+        
+        assert SentimentCache(cache_path, "model@2").get("headline") is None
+    
+    def test_stats_since_snapshot(self, cache_path):
+        """Test that stats can be reported for one run."""
+        cache = SentimentCache(cache_path, "model@1")
+        cache.get("before the run")
+        before = cache.stats()
+        
+        cache.put("headline", RESULT)
+        cache.get("headline")
+        
+        run = cache.stats(since=before)
+        assert (run["lookups"], run["memory_hits"], run["misses"], run["hit_rate"]) == (1, 1, 0, 1.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+"""
+Tests for the per-ticker stage DAG executor.
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection.stage_dag import StageDAG
+
+
+def sleeper(value, seconds=0.2):
+    def stage(**inputs):
+        time.sleep(seconds)
+        return value
+    return stage
+
+
+class TestStageDAG:
+    """Test stage scheduling, failures and timings."""
+    
+    def test_independent_stages_run_concurrently(self):
+        """Test that independent stages overlap and dependents get their inputs."""
+        dag = StageDAG("AAPL")
+        dag.add("company_info", sleeper({"name": "Apple"}))
+        dag.add("esg_scores", sleeper([1]))
+        dag.add("alpha_overview", sleeper({"Sector": "Technology"}))
+        dag.add("news_api_news", lambda company_info: [company_info["name"]], depends_on=("company_info",))
+        
+        start = time.monotonic()
+        run = dag.run()
+        
+        assert time.monotonic() - start < 0.5
+        assert run.results["news_api_news"] == ["Apple"]
+        assert set(run.timings) == {"company_info", "esg_scores", "alpha_overview", "news_api_news"}
+        assert run.timings["company_info"] >= 0.2
+    
+    def test_failed_stage_passes_none(self):
+        """Test that a failing stage is recorded and its dependents still run."""
+        def broken():
+            raise ConnectionError("provider down")
+        
+        dag = StageDAG("AAPL")
+        dag.add("company_info", broken)
+        dag.add("news_api_news", lambda company_info: company_info, depends_on=("company_info",))
+        
+        run = dag.run()
+        
+        assert isinstance(run.errors["company_info"], ConnectionError)
+        assert run.results == {"company_info": None, "news_api_news": None}
+    
+    def test_unknown_dependency_is_rejected(self):
+        """Test that stages must be added after their dependencies."""
+        with pytest.raises(ValueError):
+            StageDAG().add("news", lambda yahoo_news: yahoo_news, depends_on=("yahoo_news",))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
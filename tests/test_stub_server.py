@@ -0,0 +1,103 @@
+"""
+Tests for fixture recording and the offline provider stub server.
+"""
+
+import pytest
+import sys
+import os
+import json
+import urllib.request
+import urllib.error
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+from src.data_collection.endpoints import get_base_url, split_provider_url
+from src.data_collection.fixtures import FixtureRecorder, load_fixtures
+from src.data_collection.stub_server import start_stub_server
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    """Record one Alpha Vantage overview and one NewsAPI search."""
+    recorder = FixtureRecorder(str(tmp_path))
+    recorder.record(
+        "https://www.alphavantage.co/query",
+        {"function": "OVERVIEW", "symbol": "AAPL", "apikey": "secret-key"},
+        200, b'{"Symbol": "AAPL"}', {"Content-Type": "application/json"}
+    )
+    recorder.record("https://newsapi.org/v2/everything?q=Apple&apiKey=secret-key", None, 200, b'{"articles": []}')
+    return str(tmp_path)
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+class TestFixtureRecorder:
+    """Test fixture recording."""
+
+    def test_credentials_are_not_recorded(self, fixture_dir):
+        """Test that API keys never end up in fixture files."""
+        fixtures = load_fixtures(fixture_dir)
+
+        assert len(fixtures) == 2
+        assert all("secret-key" not in json.dumps(fixture) for fixture in fixtures)
+        assert {fixture["provider"] for fixture in fixtures} == {"alpha_vantage", "news_api"}
+
+
+class TestStubServer:
+    """Test fixture replay over HTTP."""
+
+    def test_replays_recorded_response(self, fixture_dir):
+        """Test that a recorded request is served under its provider prefix."""
+        server = start_stub_server(fixture_dir)
+        try:
+            base_url = server.base_urls()["ALPHA_VANTAGE_BASE_URL"]
+            status, body = _get(f"{base_url}/query?function=OVERVIEW&symbol=AAPL&apikey=other")
+            assert status == 200
+            assert body == {"Symbol": "AAPL"}
+        finally:
+            server.shutdown()
+
+    def test_strict_mode_rejects_unrecorded_queries(self, fixture_dir):
+        """Test that strict mode 404s instead of falling back to a similar fixture."""
+        server = start_stub_server(fixture_dir, strict=True)
+        try:
+            base_url = server.base_urls()["ALPHA_VANTAGE_BASE_URL"]
+            with pytest.raises(urllib.error.HTTPError) as error:
+                _get(f"{base_url}/query?function=OVERVIEW&symbol=MSFT")
+            assert error.value.code == 404
+        finally:
+            server.shutdown()
+
+    def test_injected_errors(self, fixture_dir):
+        """Test that error_rate=1 fails every request with the configured status."""
+        server = start_stub_server(fixture_dir, error_rate=1.0, error_status=502)
+        try:
+            base_url = server.base_urls()["NEWS_API_BASE_URL"]
+            with pytest.raises(urllib.error.HTTPError) as error:
+                _get(f"{base_url}/everything?q=Apple")
+            assert error.value.code == 502
+            assert server.stats["errors"] == 1
+        finally:
+            server.shutdown()
+
+
+class TestEndpoints:
+    """Test provider base URLs from settings."""
+
+    def test_configured_and_public_urls_are_recognised(self, monkeypatch):
+        """Test that a stub base URL from settings is used and public URLs still map to their provider."""
+        monkeypatch.setattr(settings, "fmp_base_url", "http://127.0.0.1:8765/fmp/")
+
+        assert get_base_url("fmp") == "http://127.0.0.1:8765/fmp"
+        assert split_provider_url("http://127.0.0.1:8765/fmp/profile/AAPL") == ("fmp", "/profile/AAPL")
+        assert split_provider_url("https://financialmodelingprep.com/api/v3/profile/AAPL") == ("fmp", "/profile/AAPL")
+        assert split_provider_url("https://example.com/profile") == (None, "https://example.com/profile")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
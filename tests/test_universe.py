@@ -0,0 +1,47 @@
+"""
+Tests for loading the ticker universe.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+from src.data_collection.universe import load_universe, resolve_universe
+
+
+class TestUniverse:
+    """Test universe files and precedence."""
+    
+    def test_text_file_skips_comments_and_duplicates(self, tmp_path):
+        """Test that a text universe is normalized and de-duplicated in order."""
+        path = tmp_path / "universe.txt"
+        path.write_text("# S&P sample\naapl\nMSFT  # software\n\nAAPL\nbrk.b\n")
+        assert load_universe(str(path)) == ["AAPL", "MSFT", "BRK.B"]
+    
+    def test_csv_uses_symbol_column(self, tmp_path):
+        """Test that a CSV universe is read from its symbol column."""
+        path = tmp_path / "universe.csv"
+        path.write_text("name,symbol\nApple,AAPL\nTesla,TSLA\n")
+        assert load_universe(str(path)) == ["AAPL", "TSLA"]
+    
+    def test_precedence(self, tmp_path, monkeypatch):
+        """Test that explicit tickers beat the universe file, which beats ESG_TICKERS and the default."""
+        path = tmp_path / "universe.txt"
+        path.write_text("NVDA\n")
+        monkeypatch.setattr(settings, "esg_universe_file", str(path))
+        monkeypatch.setattr(settings, "esg_tickers", "jpm, v")
+        
+        assert resolve_universe(["jpm"], default=["AAPL"]) == ["JPM"]
+        assert resolve_universe(default=["AAPL"]) == ["NVDA"]
+        monkeypatch.setattr(settings, "esg_universe_file", None)
+        assert resolve_universe(default=["AAPL"]) == ["JPM", "V"]
+        monkeypatch.setattr(settings, "esg_tickers", None)
+        assert resolve_universe(default=["AAPL"]) == ["AAPL"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,189 @@
+"""
+Tests for the vectorized Yahoo Finance metrics against the per-ticker path,
+and for the memoized per-ticker fetch context.
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_collection import yahoo_finance_collector
+from src.data_collection.yahoo_finance_collector import TickerContext, YahooFinanceCollector
+
+DATES = pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])
+SHARES = {"AAPL": 1000, "MSFT": 500}
+
+
+def history(closes, volumes):
+    return pd.DataFrame({"Close": closes, "Volume": volumes}, index=DATES)
+
+
+# MSFT did not trade on the 3rd, which a multi-symbol download reports as a NaN row
+HISTORIES = {
+    "AAPL": history([185.5, 184.25, 181.75], [1_000_000, 1_200_000, np.nan]),
+    "MSFT": history([370.0, np.nan, 367.5], [900_000, np.nan, 950_000])
+}
+
+
+class FakeLimiter:
+    def acquire(self, provider):
+        pass
+
+
+class FakeContext:
+    """Per-ticker fetch context serving the ticker's own history (without the NaN rows)."""
+    
+    def __init__(self, ticker):
+        self.ticker = ticker
+    
+    def history(self, **kwargs):
+        return HISTORIES[self.ticker].dropna(subset=["Close"])
+    
+    def info(self):
+        return {"sharesOutstanding": SHARES[self.ticker]}
+
+
+class CountingTicker:
+    """yf.Ticker stand-in that counts each fetch of its Yahoo Finance attributes."""
+    
+    delay = 0.0
+    
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.accesses = Counter()
+        self._lock = threading.Lock()
+    
+    def _fetch(self, name, value):
+        with self._lock:
+            self.accesses[name] += 1
+        time.sleep(self.delay)
+        return value
+    
+    @property
+    def info(self):
+        return self._fetch("info", {"longName": "Apple Inc.", "sharesOutstanding": SHARES["AAPL"]})
+    
+    @property
+    def sustainability(self):
+        return self._fetch("sustainability", pd.DataFrame())
+    
+    @property
+    def news(self):
+        return self._fetch("news", [])
+    
+    def history(self, **kwargs):
+        return self._fetch("history", HISTORIES["AAPL"].dropna(subset=["Close"]))
+
+
+@pytest.fixture
+def tickers(monkeypatch):
+    """Every CountingTicker created in place of a yf.Ticker"""
+    created = []
+    
+    def make_ticker(symbol):
+        created.append(CountingTicker(symbol))
+        return created[-1]
+    
+    monkeypatch.setattr(yahoo_finance_collector.yf, "Ticker", make_ticker)
+    return created
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    frame = pd.concat(HISTORIES, axis=1)  # (ticker, field) columns, as yf.download(group_by="ticker")
+    monkeypatch.setattr(yahoo_finance_collector.yf, "download", lambda tickers, **kwargs: frame)
+    return YahooFinanceCollector(rate_limiter=FakeLimiter())
+
+
+class TestBatchFinancialMetrics:
+    """Test that one multi-symbol download matches the per-ticker metrics."""
+    
+    def test_batch_matches_per_ticker_path(self, collector):
+        """Test that every ticker gets the same records from the batch as from its own history."""
+        infos = {ticker: {"sharesOutstanding": shares} for ticker, shares in SHARES.items()}
+        batch = collector.get_batch_financial_metrics(["AAPL", "MSFT"], days_back=30, infos=infos)
+        
+        for ticker in ("AAPL", "MSFT"):
+            single = collector.get_financial_metrics(ticker, days_back=30, context=FakeContext(ticker))
+            assert batch[ticker] == single
+        assert [row["date"] for row in batch["MSFT"]] == ["2024-01-02T00:00:00", "2024-01-04T00:00:00"]
+        assert batch["AAPL"][1] == {
+            "date": "2024-01-03T00:00:00", "stock_price": 184.25, "volume": 1_200_000,
+            "market_cap": 184250.0, "data_source": "yahoo_finance"
+        }
+        assert batch["AAPL"][2]["volume"] == 0
+    
+    def test_watermarks_and_missing_tickers(self, collector):
+        """Test that rows at or before a ticker's watermark are dropped and unknown tickers get no rows."""
+        infos = {ticker: {"sharesOutstanding": shares} for ticker, shares in SHARES.items()}
+        since = {"AAPL": datetime(2024, 1, 3)}
+        batch = collector.get_batch_financial_metrics(["AAPL", "MSFT", "NVDA"], infos=infos, since=since)
+        
+        assert [row["date"] for row in batch["AAPL"]] == ["2024-01-04T00:00:00"]
+        assert len(batch["MSFT"]) == 2
+        assert batch["NVDA"] == []
+    
+    def test_missing_shares_outstanding_gives_zero_market_cap(self, collector):
+        """Test that tickers without shares outstanding still get prices."""
+        batch = collector.get_batch_financial_metrics(["AAPL"], infos={"AAPL": None})
+        
+        assert [row["market_cap"] for row in batch["AAPL"]] == [0.0, 0.0, 0.0]
+        assert batch["AAPL"][0]["stock_price"] == 185.5
+
+
+class TestTickerContext:
+    """Test that a context fetches each Yahoo Finance value once, however often it is asked for."""
+    
+    def test_collector_methods_share_one_fetch_per_value(self, tickers):
+        """Test that repeated collector calls on one context reuse its info, sustainability and news."""
+        collector = YahooFinanceCollector(rate_limiter=FakeLimiter())
+        context = collector.ticker_context("AAPL")
+        
+        for _ in range(2):
+            assert collector.get_company_info("AAPL", context=context)["name"] == "Apple Inc."
+            assert collector.get_esg_scores("AAPL", context=context) == []
+            assert collector.get_news("AAPL", context=context) == []
+        assert len(collector.get_financial_metrics("AAPL", context=context)) == 3
+        
+        assert len(tickers) == 1
+        assert tickers[0].accesses == {"info": 1, "sustainability": 1, "news": 1, "history": 1}
+        assert context.fetches == 4
+    
+    def test_history_fetched_once_per_arguments(self, tickers):
+        """Test that each distinct set of history arguments is fetched once."""
+        context = TickerContext("AAPL", FakeLimiter())
+        
+        first = context.history(period="1mo", interval="1d")
+        assert context.history(interval="1d", period="1mo") is first
+        context.history(period="5d")
+        
+        assert tickers[0].accesses == {"history": 2}
+    
+    def test_concurrent_callers_share_one_fetch(self, tickers, monkeypatch):
+        """Test that threads asking for the same value at once wait for a single fetch."""
+        monkeypatch.setattr(CountingTicker, "delay", 0.05)
+        context = TickerContext("AAPL", FakeLimiter())
+        lookups = [context.info, context.sustainability, context.news, lambda: context.history(period="1mo")] * 8
+        
+        with ThreadPoolExecutor(max_workers=len(lookups)) as executor:
+            results = list(executor.map(lambda lookup: lookup(), lookups))
+        
+        assert len(tickers) == 1
+        assert tickers[0].accesses == {"info": 1, "sustainability": 1, "news": 1, "history": 1}
+        for index, result in enumerate(results[4:], start=4):
+            assert result is results[index % 4]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])